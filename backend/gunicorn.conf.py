@@ -0,0 +1,28 @@
+"""
+Gunicorn config for multi-worker serving
+Usage (from backend/): gunicorn -c gunicorn.conf.py main:app
+
+The app is imported once in the master (preload_app + FDP_PRELOAD), which
+loads the CatBoost model, row template and national averages there. Workers
+are forked afterwards and share that memory copy-on-write instead of each
+loading their own copy.
+"""
+
+import gc
+import multiprocessing
+import os
+
+os.environ.setdefault('FDP_PRELOAD', '1')
+
+bind = os.environ.get('FDP_BIND', '0.0.0.0:7860')
+workers = int(os.environ.get('FDP_WORKERS', min(4, multiprocessing.cpu_count())))
+worker_class = 'uvicorn.workers.UvicornWorker'
+preload_app = True
+timeout = 120
+
+def when_ready(server):
+    """Freeze everything the master loaded before the first fork."""
+    # Frozen objects are skipped by the collector, so workers never write to
+    # (and thereby copy) the pages holding the shared model and aggregates
+    gc.freeze()
+    server.log.info("Shared serving state frozen for copy-on-write workers")
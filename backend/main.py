@@ -1,20 +1,60 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
-import pandas as pd
+from startup_profile import StartupProfile
+
+# Created first so the import timings below start from zero (see /health)
+startup = StartupProfile()
+
+with startup.importing('fastapi'):
+    from fastapi import FastAPI, HTTPException, UploadFile, File, Header
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import Response
+    from pydantic import BaseModel, Field, confloat, conint
+from typing import Dict, List, Optional, Union
+from enum import Enum
+with startup.importing('pandas, numpy'):
+    import pandas as pd
+    import numpy as np
 import sys
 import os
 from pathlib import Path
 import json
 import io
+import hmac
+import time
+import uuid
+import asyncio
 
 sys.path.append(str(Path(__file__).parent.parent / 'ml_models'))
 
-from ml_engine import FinancialDistressPredictor
-from recommendation_engine import RecommendationEngine, calculate_national_averages
-from report_generator import FinancialReportGenerator
+# Serving scores with the compiled NumPy scorer; catboost, shap and matplotlib
+# are imported only when an explanation is requested (or no compiled model exists),
+# and reportlab only in the report worker processes
+with startup.importing('compiled_scorer'):
+    from compiled_scorer import (MODEL_VARIANTS, COMPILED_MODEL_FILES, CompiledPredictor, render_shap_waterfall,
+                                 render_shap_waterfalls)
+with startup.importing('model_registry'):
+    from model_registry import REGISTRY_DIR, ModelRegistry
+with startup.importing('feature_engineering'):
+    from feature_engineering import INPUT_COLUMNS, DERIVED_COLUMNS, SERVING_SPENDING_COLUMNS, serving_features
+with startup.importing('recommendation_engine'):
+    from recommendation_engine import RecommendationEngine
+with startup.importing('eda_store'):
+    from eda_store import EDAAggregateStore
+with startup.importing('worker_pool'):
+    from worker_pool import WorkerPools, StageOverloaded, call_by_name
+with startup.importing('prediction_cache'):
+    from prediction_cache import PredictionCache
+with startup.importing('plot_cache'):
+    from plot_cache import PlotCache
+with startup.importing('model_comparison'):
+    from model_comparison import MODES, ModelComparison, timed_call
+with startup.importing('report_jobs'):
+    from report_jobs import ReportJobQueue, ReportQueueFull
+with startup.importing('bulk_reports'):
+    from bulk_reports import ARCHIVE_FORMATS, report_record, chunked, chunk_size_for, write_archive, throughput
+with startup.importing('scenario_engine'):
+    from scenario_engine import ScenarioEngine
+with startup.importing('goal_engine'):
+    from goal_engine import FEASIBILITY_LABELS, MAX_GRID_CELLS, evaluate_goal_grid
 
 app = FastAPI(
     title="Financial Distress Predictor API",
@@ -31,9 +71,41 @@ app.add_middleware(
 )
 
 predictor = None
+fast_predictor = None
 recommendation_engine = None
-report_generator = None
 national_averages = None
+eda_store = None
+pools = None
+
+MODEL_DIR = Path('../ml_models')
+
+# Versioned model bundles (see model_registry.py); the newest one is served when any exist
+model_registry = ModelRegistry(os.environ.get('FDP_MODEL_REGISTRY', MODEL_DIR / REGISTRY_DIR))
+
+# What `predictor` and `fast_predictor` were loaded from; swapped together with them
+serving_model = {'version': None, 'model_dir': str(MODEL_DIR), 'loaded_at': None}
+model_reload_lock = asyncio.Lock()
+model_watcher = None
+
+# Candidate model for shadow scoring / A-B split on /predict (see model_comparison.py)
+model_comparison = ModelComparison()
+
+# Layered LRU + TTL cache for /predict and /simulate (see prediction_cache.py)
+prediction_cache = PredictionCache()
+
+# SHAP waterfall PNGs by model version + feature row, for /predict and /generate_report
+plot_cache = PlotCache()
+
+# Delta / sweep expansion for /simulate_curve
+scenario_engine = ScenarioEngine()
+
+# The in-flight dataset check of /analyze_eda (see refresh_eda_aggregates)
+eda_refresh = None
+
+# Background PDF jobs for /reports; PDFs live in memory until evicted
+report_jobs = ReportJobQueue()
+
+OPTIONAL_HOUSEHOLD_FIELDS = ['Region', 'Household_Type', 'Household_Size', 'Employment_Status']
 
 class HouseholdInput(BaseModel):
     Net_Income: float = Field(..., ge=0, description="Monthly net income")
@@ -107,6 +179,22 @@ class HouseholdWithGoal(BaseModel):
     
     goal: GoalInput
 
+class ExplanationMode(str, Enum):
+    json = "json"
+    plot = "plot"
+    none = "none"
+
+class FeatureContribution(BaseModel):
+    feature: str
+    value: Union[float, str]
+    shap_value: float
+
+class ShapExplanation(BaseModel):
+    predicted_class: str
+    base_value: float
+    contributions: Dict[str, float]
+    top_features: List[FeatureContribution]
+
 class PredictionResponse(BaseModel):
     prediction: str
     confidence: float
@@ -119,6 +207,7 @@ class PredictionResponse(BaseModel):
     
     recommendations: List[Dict]
     shap_plot: Optional[str] = None
+    explanation: Optional[ShapExplanation] = None
     financial_metrics: Dict
     
     recovery_timeline_months: int
@@ -126,40 +215,300 @@ class PredictionResponse(BaseModel):
     
     health_breakdown: HealthScoreBreakdown
 
+class HouseholdColumns(BaseModel):
+    """Columnar household payload: one list per field, all of equal length."""
+    Net_Income: List[confloat(ge=0)]
+    Food: List[confloat(ge=0)]
+    Housing: List[confloat(ge=0)]
+    Transport: List[confloat(ge=0)]
+    Health: List[confloat(ge=0)]
+    Education: List[confloat(ge=0)]
+    Recreation: List[confloat(ge=0)]
+    Clothing: List[confloat(ge=0)]
+    Communication: List[confloat(ge=0)]
+    Restaurants: List[confloat(ge=0)]
+    Miscellaneous: List[confloat(ge=0)]
+    
+    Region: Optional[List[str]] = None
+    Household_Type: Optional[List[str]] = None
+    Household_Size: Optional[List[conint(ge=1, le=10)]] = None
+    Employment_Status: Optional[List[str]] = None
+
+class BatchPredictionInput(BaseModel):
+    households: Optional[List[HouseholdInput]] = Field(None, description="Row-oriented households")
+    columns: Optional[HouseholdColumns] = Field(None, description="Column-oriented households")
+
+class BatchPredictionResponse(BaseModel):
+    count: int
+    results: List[PredictionResponse]
+
+class SimulationSweep(BaseModel):
+    field: str = Field(..., description="Numeric household input to vary, e.g. Housing")
+    start: float
+    stop: float
+    steps: int = Field(..., ge=2, description="Number of points from start to stop (inclusive)")
+
+class SimulationRequest(BaseModel):
+    household: HouseholdInput
+    deltas: Optional[List[Dict[str, float]]] = Field(None, description="Per scenario: input -> amount added to the base value")
+    sweep: Optional[SimulationSweep] = None
+
+class SimulationPoint(BaseModel):
+    inputs: Dict[str, float]
+    prediction: str
+    probabilities: Dict[str, float]
+    health_score: float = Field(..., ge=0, le=100)
+
+class SimulationCurveResponse(BaseModel):
+    base: SimulationPoint
+    points: List[SimulationPoint]
+
+class GoalGridInput(BaseModel):
+    households: Optional[List[HouseholdInput]] = Field(None, description="Row-oriented households")
+    columns: Optional[HouseholdColumns] = Field(None, description="Column-oriented households")
+    goal_amounts: List[confloat(gt=0)]
+    durations_months: Optional[List[conint(gt=0, le=360)]] = Field(None, description="Defaults to every month from 1 to 360")
+
+class GoalGridResponse(BaseModel):
+    households: int
+    goal_amounts: List[float]
+    durations_months: List[int]
+    available_surplus: List[float]                      # [household]
+    required_monthly: List[List[float]]                 # [goal][duration]
+    feasibility: List[List[List[str]]]                  # [household][goal][duration]
+    gap: List[List[List[float]]]                        # [household][goal][duration]
+    distress_impact_pct: List[List[List[float]]]        # [household][goal][duration]
+    recommended_duration_months: List[List[Optional[int]]]  # [household][goal]; None without a safe surplus
+
+class BulkReportInput(BaseModel):
+    households: Optional[List[HouseholdInput]] = Field(None, description="Row-oriented households")
+    columns: Optional[HouseholdColumns] = Field(None, description="Column-oriented households")
+    user_ids: Optional[List[str]] = Field(None, description="One per household (default USER00001, USER00002, ...)")
+
+class ArchiveFormat(str, Enum):
+    zip = "zip"
+    multipart = "multipart"
+
 class EDAResponse(BaseModel):
     summary_stats: Dict
     category_breakdown: List[Dict]
     risk_distribution: Dict
     regional_analysis: Optional[List[Dict]]
 
-@app.on_event("startup")
-async def startup_event():
-    global predictor, recommendation_engine, report_generator, national_averages
+def load_predictor(variant='full', model_dir=MODEL_DIR):
+    """
+    The compiled scorer for a model variant when it has been exported
+    (python ml_engine.py --export), otherwise the CatBoost model itself.
+    Raises FileNotFoundError when the variant has not been trained.
+    """
+    model_dir = Path(model_dir)
     
-    print("🚀 Starting Financial Distress Predictor API...")
+    if (model_dir / COMPILED_MODEL_FILES[variant]).exists():
+        model = CompiledPredictor(model_dir=model_dir)
+    elif (model_dir / MODEL_VARIANTS[variant][0]).exists():
+        from ml_engine import FinancialDistressPredictor
+        
+        model = FinancialDistressPredictor(model_dir=model_dir)
+    else:
+        raise FileNotFoundError(f"No trained '{variant}' model in {model_dir}")
+    
+    model.load_model(variant=variant)
+    return model
+
+def load_serving_state():
+    """
+    Load the model, engines and national averages once per process tree.
+    Under gunicorn with preload_app (see gunicorn.conf.py) this runs in the
+    master before forking, so every worker shares it copy-on-write.
+    """
+    global predictor, fast_predictor, recommendation_engine, national_averages, eda_store
     
-    predictor = FinancialDistressPredictor(model_dir='../ml_models')
+    if predictor is not None:
+        return
+    
+    # The newest registry version, otherwise the model files in ml_models itself
+    version = model_registry.latest()
+    model_dir = model_registry.path(version) if version else MODEL_DIR
+    serving_model.update(version=version, model_dir=str(model_dir), loaded_at=time.time())
     
     try:
-        predictor.load_model()
-        print("ML Model loaded successfully")
+        with startup.stage('load_model'):
+            predictor = load_predictor(model_dir=model_dir)
+        print(f"ML Model loaded successfully (version: {version or 'unversioned'})")
     except FileNotFoundError:
+        # Unloaded predictor: endpoints answer 503 until a model is trained
+        predictor = CompiledPredictor(model_dir=model_dir)
         print("No trained model found. Please train the model first.")
     
-    recommendation_engine = RecommendationEngine()
+    # Distilled model for /simulate (python ml_engine.py --distill); falls back to the full model
+    try:
+        with startup.stage('load_fast_model'):
+            fast_predictor = load_predictor(variant='fast', model_dir=model_dir)
+        print("Fast simulation model loaded")
+    except FileNotFoundError:
+        fast_predictor = predictor
+    
+    with startup.stage('recommendation_engine'):
+        recommendation_engine = RecommendationEngine()
     print("Recommendation Engine initialized")
     
-    report_generator = FinancialReportGenerator()
-    print("Report Generator initialized")
+    eda_store = EDAAggregateStore()
     
     try:
-        df = pd.read_csv('../data/processed/household_budget_processed.csv')
-        national_averages = calculate_national_averages(df)
-        print("National averages calculated")
+        # Precomputed by the preprocessing pipeline; rebuilt only if the dataset changed
+        with startup.stage('national_averages'):
+            national_averages = eda_store.get()['national_averages']
+        print("National averages loaded")
     except FileNotFoundError:
         print("Processed data not found. National averages unavailable.")
         national_averages = {}
 
+if os.environ.get('FDP_PRELOAD') == '1':
+    load_serving_state()
+
+# Households scored by a newly loaded model before it is swapped in
+# (spending at 50%, 80% and 110% of income)
+WARMUP_SPENDING = {
+    'Food': 0.15, 'Housing': 0.30, 'Transport': 0.10, 'Health': 0.05, 'Education': 0.05,
+    'Recreation': 0.05, 'Clothing': 0.03, 'Communication': 0.03, 'Restaurants': 0.02,
+    'Miscellaneous': 0.02
+}
+WARMUP_INCOME = 500000
+WARMUP_SPENDING_LEVELS = [0.5, 0.8, 1.1]
+
+def warm_up(model):
+    """
+    Score the warm-up households through the batch and the single-row paths
+    (and SHAP, if this process already explains), so the first requests on a
+    new model are not cold. Raises ValueError if its probabilities are unusable.
+    """
+    columns = {name: [field.default] * len(WARMUP_SPENDING_LEVELS)
+               for name, field in HouseholdInput.__fields__.items() if name in OPTIONAL_HOUSEHOLD_FIELDS}
+    columns['Net_Income'] = [WARMUP_INCOME] * len(WARMUP_SPENDING_LEVELS)
+    for col, share in WARMUP_SPENDING.items():
+        columns[col] = [WARMUP_INCOME * level * share / sum(WARMUP_SPENDING.values())
+                        for level in WARMUP_SPENDING_LEVELS]
+    
+    start = time.perf_counter()
+    _, _, features = build_household_features(columns, model)
+    results = model.predict_batch(features)
+    results.append(model.predict(features[:1]))
+    for result in results:
+        probabilities = list(result['probabilities'].values())
+        if not np.all(np.isfinite(probabilities)) or abs(sum(probabilities) - 1) > 1e-3:
+            raise ValueError(f"Warm-up prediction has invalid probabilities: {result['probabilities']}")
+    
+    # catboost is only imported once something asked for an explanation
+    if 'catboost' in sys.modules:
+        model.get_shap_summary(features[:1], predicted_class=results[0]['prediction'])
+    
+    return {
+        'predictions': [result['prediction'] for result in results[:len(WARMUP_SPENDING_LEVELS)]],
+        'ms': round((time.perf_counter() - start) * 1000, 1)
+    }
+
+def load_model_version(version):
+    """
+    Load and warm up the full and fast predictors of a registry version;
+    runs on the reload worker thread while the current models keep serving.
+    """
+    model_dir = model_registry.path(version)
+    start = time.perf_counter()
+    
+    full = load_predictor(model_dir=model_dir)
+    try:
+        fast = load_predictor(variant='fast', model_dir=model_dir)
+    except FileNotFoundError:
+        fast = full
+    load_ms = (time.perf_counter() - start) * 1000
+    
+    warmup = {'full': warm_up(full)}
+    if fast is not full:
+        warmup['fast'] = warm_up(fast)
+    
+    return full, fast, {'model_dir': str(model_dir), 'load_ms': round(load_ms, 1), 'warmup': warmup}
+
+async def reload_model(version=None):
+    """
+    Load a registry version (default: the newest) in the background, then swap it in.
+    Requests already running keep the predictor they started with and finish on it.
+    """
+    global predictor, fast_predictor, serving_model
+    
+    async with model_reload_lock:
+        version = version or model_registry.latest()
+        if version is None:
+            raise FileNotFoundError(f"No model versions published in {model_registry.root}")
+        
+        previous = serving_model['version']
+        if version == previous and predictor is not None and predictor.model is not None:
+            return {'previous_version': previous, 'version': version, 'changed': False}
+        
+        full, fast, stats = await pools.run('reload', load_model_version, version)
+        
+        # One step on the event loop: no request sees the new full model with the old fast one
+        predictor, fast_predictor, serving_model = full, fast, {
+            'version': version, 'model_dir': stats['model_dir'], 'loaded_at': time.time()
+        }
+        print(f"🔄 Model version {previous or 'unversioned'} -> {version}")
+        
+        return {'previous_version': previous, 'version': version, 'changed': True, **stats}
+
+async def watch_model_registry(interval):
+    """Reload whenever a newer version is published (FDP_MODEL_WATCH_SECONDS); each worker watches for itself."""
+    failed = set()
+    while True:
+        await asyncio.sleep(interval)
+        latest = model_registry.latest()
+        if latest is None or latest == serving_model['version'] or latest in failed:
+            continue
+        try:
+            await reload_model(latest)
+        except Exception as e:
+            failed.add(latest)
+            print(f"Model version {latest} not loaded: {e}")
+
+@app.on_event("startup")
+async def startup_event():
+    global pools, model_watcher
+    
+    print("🚀 Starting Financial Distress Predictor API...")
+    
+    # No-op when the state was preloaded in the gunicorn master
+    load_serving_state()
+    
+    # Executors hold threads and child processes, so each worker builds its own
+    with startup.stage('worker_pools'):
+        pools = WorkerPools()
+    print("Worker pools initialized")
+    
+    # Candidate for shadow / split scoring, e.g. a model retrained with new class weights
+    candidate_version = os.environ.get('FDP_CANDIDATE_VERSION')
+    if candidate_version:
+        try:
+            await load_candidate(candidate_version)
+        except Exception as e:
+            print(f"Candidate model {candidate_version} not loaded: {e}")
+    
+    if os.environ.get('FDP_ADMIN_TOKEN'):
+        print("Admin endpoints enabled (/admin/models, X-Admin-Token header)")
+    else:
+        print("Admin endpoints disabled; set FDP_ADMIN_TOKEN to enable model reload and candidates")
+    
+    watch_seconds = float(os.environ.get('FDP_MODEL_WATCH_SECONDS', 0))
+    if watch_seconds > 0:
+        model_watcher = asyncio.create_task(watch_model_registry(watch_seconds))
+    
+    startup.mark_ready()
+    startup.print_report()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if model_watcher is not None:
+        model_watcher.cancel()
+    if pools is not None:
+        pools.shutdown()
+
 @app.get("/")
 async def root():
     return {
@@ -168,9 +517,14 @@ async def root():
         "status": "operational",
         "endpoints": {
             "predict": "/predict",
+            "predict_batch": "/predict_batch",
+            "analyze_goal_grid": "/analyze_goal_grid",
             "analyze_eda": "/analyze_eda",
             "generate_report": "/generate_report",
-            "health": "/health"
+            "reports": "/reports",
+            "models": "/admin/models",
+            "health": "/health",
+            "metrics": "/metrics"
         }
     }
 
@@ -179,339 +533,572 @@ async def health_check():
     return {
         "status": "healthy",
         "model_loaded": predictor is not None and predictor.model is not None,
+        "model_version": serving_model['version'],
+        "model_fingerprint": predictor.model_version if predictor is not None else None,
+        "model_loaded_at": serving_model['loaded_at'],
         "services": {
             "predictor": predictor is not None,
+            "compiled_scorer": isinstance(predictor, CompiledPredictor) and predictor.model is not None,
+            "fast_simulation": fast_predictor is not None and fast_predictor.variant == 'fast',
             "recommendations": recommendation_engine is not None,
-            "reports": report_generator is not None
-        }
+            "reports": report_jobs is not None
+        },
+        "startup": startup.report()
     }
 
-@app.post("/predict", response_model=PredictionResponse)
-async def predict_financial_distress(household: HouseholdInput):
-    if predictor is None or predictor.model is None:
-        raise HTTPException(status_code=503, detail="Model not loaded")
+def build_household_features(columns, model=None):
+    """
+    Derive features for a column dict of household inputs and fill the model row template
+    (of `model`, default the full predictor).
+    Returns the columns with the derived features added, per-row user_data dicts
+    (for the response) and the model-ready feature matrix.
+    """
+    inputs = np.column_stack([np.asarray(columns[col], dtype=np.float64) for col in INPUT_COLUMNS])
+    derived = serving_features.transform(inputs)
     
-    try:
-        user_data = household.dict()
-        
-        total_exp = sum([
-            user_data['Food'], user_data['Housing'], user_data['Transport'],
-            user_data['Health'], user_data['Education'], user_data['Recreation'],
-            user_data['Clothing'], user_data['Communication'], user_data['Restaurants'],
-            user_data['Miscellaneous']
-        ])
-        
-        user_data['Total_Expenditure'] = total_exp
-        user_data['Savings'] = user_data['Net_Income'] - total_exp
-        user_data['Expenditure_to_Income_Ratio'] = total_exp / user_data['Net_Income']
-        user_data['Savings_Rate'] = user_data['Savings'] / user_data['Net_Income']
-        user_data['Housing_to_Income_Ratio'] = user_data['Housing'] / user_data['Net_Income']
-        user_data['Food_to_Total_Exp_Ratio'] = user_data['Food'] / total_exp if total_exp > 0 else 0
-        user_data['Transport_to_Income_Ratio'] = user_data['Transport'] / user_data['Net_Income']
-        
-        user_data['Essential_Spending'] = user_data['Food'] + user_data['Housing']
-        user_data['Essential_Spending_Share'] = user_data['Essential_Spending'] / total_exp if total_exp > 0 else 0
-        
-        user_data['Discretionary_Spending'] = (user_data['Recreation'] + 
-                                               user_data['Restaurants'] + 
-                                               user_data['Clothing'])
-        user_data['Discretionary_Spending_Share'] = user_data['Discretionary_Spending'] / total_exp if total_exp > 0 else 0
-        
-        user_data['Per_Capita_Income'] = user_data['Net_Income'] / user_data['Household_Size']
-        user_data['Per_Capita_Expenditure'] = total_exp / user_data['Household_Size']
-        
-        spending_values = [
-            user_data['Food'], user_data['Housing'], user_data['Transport'],
-            user_data['Health'], user_data['Education'], user_data['Recreation'],
-            user_data['Clothing'], user_data['Communication'], user_data['Restaurants'],
-            user_data['Miscellaneous']
-        ]
-        user_data['Spending_Variance'] = pd.Series(spending_values).var()
-        user_data['Spending_Std'] = pd.Series(spending_values).std()
-        user_data['Spending_CV'] = user_data['Spending_Std'] / total_exp if total_exp > 0 else 0
-        
-        user_data['Health_Spending_Ratio'] = user_data['Health'] / user_data['Net_Income']
-        user_data['Education_Spending_Ratio'] = user_data['Education'] / user_data['Net_Income']
-        
-        months_of_savings = user_data['Savings'] / (total_exp / 12) if total_exp > 0 else 0
-        user_data['Months_of_Savings'] = months_of_savings if months_of_savings != float('inf') else 0
-        
-        user_data['Is_Overspending'] = 1 if total_exp > user_data['Net_Income'] else 0
-        user_data['High_Housing_Burden'] = 1 if user_data['Housing_to_Income_Ratio'] > 0.35 else 0
-        user_data['Low_Savings'] = 1 if user_data['Savings_Rate'] < 0.10 else 0
-        
-        housing_defaults = {
-            'Unnamed: 0': 0,
-            'Head_Sex': 'Male',
-            'Head_Age': 40,
-            'Household Head Marital Status': 'Married',
-            'Household Head Highest Grade Completed': 'High School Graduate',
-            'Household Head Occupation': 'Unknown',
-            'Household Head Class of Worker': 'Employed',
-            'Members with age less than 5 year old': 0,
-            'Members with age 5 - 17 years old': 0,
-            'Total number of family members employed': 1,
-            'Bread and Cereals Expenditure': user_data['Food'] * 0.5,
-            'Total Rice Expenditure': user_data['Food'] * 0.4,
-            'Meat Expenditure': user_data['Food'] * 0.2,
-            'Total Fish and  marine products Expenditure': user_data['Food'] * 0.15,
-            'Fruit Expenditure': user_data['Food'] * 0.05,
-            'Vegetables Expenditure': user_data['Food'] * 0.1,
-            'Alcoholic Beverages Expenditure': 0,
-            'Tobacco Expenditure': 0,
-            'Special_Occasions': user_data['Recreation'],
-            'Main Source of Income': 'Wage/Salaries',
-            'Number of Airconditioner': 0,
-            'Electricity': 1,
-            'House Age': 15,
-            'Number of bedrooms': 2,
-            'Number of Personal Computer': 1,
-            'Total Income from Entrepreneurial Acitivites': 0,
-            'Number of Component/Stereo set': 0,
-            'Type of Roof': 'Strong material(galvanized,iron,al,tile,concrete,brick,stone,asbestos)',
-            'Number of Washing Machine': 1,
-            'Number of Motorized Banca': 0,
-            'Number of Cellular phone': 2,
-            'Number of Television': 1,
-            'Imputed House Rental Value': user_data['Housing'] * 0.5,
-            'Toilet Facilities': 'Water-sealed, sewer septic tank, used exclusively by household',
-            'Type of Walls': 'Strong',
-            'House Floor Area': 50,
-            'Agricultural Household indicator': 0,
-            'Type of Building/House': 'Single house',
-            'Number of Stove with Oven/Gas Range': 1,
-            'Number of Refrigerator/Freezer': 1,
-            'Number of Car, Jeep, Van': 0,
-            'Number of Landline/wireless telephones': 0,
-            'Number of Motorcycle/Tricycle': 0,
-            'Crop Farming and Gardening expenses': 0,
-            'Main Source of Water Supply': 'Own use, faucet, community water system',
-            'Tenure Status': 'Own or owner-like possession of house and lot',
-            'Number of CD/VCD/DVD': 0
-        }
-        
-        user_data.update(housing_defaults)
-        
-        df_user = pd.DataFrame([user_data])
-        
-        prediction_result = predictor.predict(df_user)
-        
+    values = {col: columns[col] for col in columns}
+    values.update({col: derived[:, i].tolist() for i, col in enumerate(DERIVED_COLUMNS)})
+    
+    features = (model or predictor).row_template.build(values)
+    user_rows = [dict(zip(values, row)) for row in zip(*values.values())]
+    
+    return values, user_rows, features
+
+def compute_health_score(user_data, probabilities):
+    """The 0-100 Financial Health Score (unrounded) and its HealthScoreBreakdown."""
+    prob_high = probabilities.get('High', 0)
+    prob_medium = probabilities.get('Medium', 0)
+    prob_low = probabilities.get('Low', 0)
+    
+    income_stability = min(100, max(0, (user_data['Savings_Rate'] * 200) + 30))
+    
+    expense_control = max(0, min(100, 100 - (user_data['Expenditure_to_Income_Ratio'] * 100)))
+    
+    debt_pressure = max(0, min(100, 100 - (user_data['Housing_to_Income_Ratio'] * 200)))
+    
+    savings_discipline = min(100, max(0, user_data['Savings_Rate'] * 300))
+    
+    # Calculate composite health score from financial metrics (70%) + ML adjustment (30%)
+    # This provides granular differentiation based on actual inputs
+    metric_score = (
+        income_stability * 0.25 +
+        expense_control * 0.25 +
+        debt_pressure * 0.25 +  # Already inverted (higher = less pressure)
+        savings_discipline * 0.25
+    )
+    
+    # ML adjustment: boost for low risk predictions, penalty for high risk
+    ml_adjustment = (prob_low * 10) - (prob_high * 15) - (prob_medium * 5)
+    
+    # Combine: 70% from metrics, 30% influenced by ML adjustment
+    health_score = max(0, min(100, (metric_score * 0.7) + (50 * 0.3) + ml_adjustment))
+    
+    health_breakdown = HealthScoreBreakdown(
+        income_stability=round(income_stability, 1),
+        expense_control=round(expense_control, 1),
+        debt_pressure=round(debt_pressure, 1),
+        savings_discipline=round(savings_discipline, 1)
+    )
+    
+    return health_score, health_breakdown
+
+def build_prediction_response(user_data, prediction_result, shap_plot=None, explanation=None,
+                              recommendations=None):
+    """
+    Assemble the PredictionResponse payload for one scored household
+    (recommendations are generated unless passed in from a batch run).
+    """
+    total_exp = user_data['Total_Expenditure']
+    
+    if recommendations is None:
         recommendations = recommendation_engine.generate_recommendations(
             user_data, prediction_result
         )
+    
+    financial_metrics = {
+        'total_expenditure': round(total_exp, 2),
+        'savings': round(user_data['Savings'], 2),
+        'savings_rate_pct': round(user_data['Savings_Rate'] * 100, 2),
+        'expenditure_to_income_pct': round(user_data['Expenditure_to_Income_Ratio'] * 100, 2),
+        'housing_burden_pct': round(user_data['Housing_to_Income_Ratio'] * 100, 2),
+        'essential_spending_pct': round(user_data['Essential_Spending_Share'] * 100, 2),
+        'discretionary_spending_pct': round(user_data['Discretionary_Spending_Share'] * 100, 2)
+    }
+    
+    risk_factors = []
+    
+    if user_data['Housing_to_Income_Ratio'] > 0.35:
+        risk_factors.append({
+            'factor': 'Housing Cost Ratio',
+            'value': round(user_data['Housing_to_Income_Ratio'] * 100, 1),
+            'threshold': '>35%',
+            'explanation': f"Housing consumes {round(user_data['Housing_to_Income_Ratio'] * 100)}% of income, leaving little for savings.",
+            'contribution_score': 0.8
+        })
         
-        shap_plot = None
-        try:
-            shap_plot = predictor.get_shap_explanation(df_user, return_base64=True)
-        except Exception as e:
-            print(f"SHAP generation skipped: {e}")
+    if user_data['Expenditure_to_Income_Ratio'] > 1.0:
+        risk_factors.append({
+            'factor': 'Expense to Income Ratio',
+            'value': round(user_data['Expenditure_to_Income_Ratio'], 2),
+            'threshold': '>1.0',
+            'explanation': f"You spend {round(user_data['Expenditure_to_Income_Ratio'], 2)} for every 1.0 earned.",
+            'contribution_score': 0.95
+        })
+    elif user_data['Expenditure_to_Income_Ratio'] > 0.9:
+        risk_factors.append({
+            'factor': 'Expense to Income Ratio',
+            'value': round(user_data['Expenditure_to_Income_Ratio'], 2),
+            'threshold': '>0.9',
+            'explanation': "Expenses are dangerously close to income limit.",
+            'contribution_score': 0.6
+        })
         
-        financial_metrics = {
-            'total_expenditure': round(total_exp, 2),
-            'savings': round(user_data['Savings'], 2),
-            'savings_rate_pct': round(user_data['Savings_Rate'] * 100, 2),
-            'expenditure_to_income_pct': round(user_data['Expenditure_to_Income_Ratio'] * 100, 2),
-            'housing_burden_pct': round(user_data['Housing_to_Income_Ratio'] * 100, 2),
-            'essential_spending_pct': round(user_data['Essential_Spending_Share'] * 100, 2),
-            'discretionary_spending_pct': round(user_data['Discretionary_Spending_Share'] * 100, 2)
-        }
+    if user_data['Savings_Rate'] < 0.05:
+        risk_factors.append({
+            'factor': 'Savings Rate',
+            'value': round(user_data['Savings_Rate'] * 100, 1),
+            'threshold': '<5%',
+            'explanation': "Savings buffer is critically low.",
+            'contribution_score': 0.7
+        })
+    
+    risk_factors_models = [RiskFactor(**rf) for rf in risk_factors]
+    
+    primary_cause = "Balanced financial execution"
+    urgent_action = "Maintain current habits"
+    recovery_months = 0
+    monthly_savings_needed = 0
+    
+    if prediction_result['prediction'] == 'High':
+        status = 'High Financial Risk'
+        if user_data['Housing_to_Income_Ratio'] > 0.4:
+            primary_cause = "Critical housing burden draining resources"
+            urgent_action = "Reduce housing costs or increase income immediately"
+        elif user_data['Is_Overspending']:
+            primary_cause = "Monthly expenses consistently exceed income"
+            urgent_action = "Immediate spending freeze on non-essentials"
+        else:
+            primary_cause = "Combined high fixed costs and low liquidity"
+            urgent_action = "Build emergency fund aggressively"
         
-        prob_high = prediction_result['probabilities'].get('High', 0)
-        prob_medium = prediction_result['probabilities'].get('Medium', 0)
-        prob_low = prediction_result['probabilities'].get('Low', 0)
+        target_buffer = total_exp * 6
+        current_buffer = user_data['Savings']
+        shortfall = target_buffer - max(0, current_buffer)
         
-        risk_factors = []
+        potential_monthly_savings = user_data['Net_Income'] * 0.2
+        recovery_months = int(shortfall / potential_monthly_savings) if potential_monthly_savings > 0 else 24
+        recovery_months = min(24, max(3, recovery_months))
+        monthly_savings_needed = potential_monthly_savings
+
+    
+    elif prediction_result['prediction'] == 'Medium':
+        status = 'Vulnerable'
+        primary_cause = "High Discretionary Spending or Low Buffer"
+        if user_data['Discretionary_Spending_Share'] > 0.3:
+             primary_cause = "High discretionary spending impacting resilience"
+             urgent_action = "Cap discretionary spending to 20%"
+        else:
+             urgent_action = "Optimize utility and food costs"
         
-        if user_data['Housing_to_Income_Ratio'] > 0.35:
-            risk_factors.append({
-                'factor': 'Housing Cost Ratio',
-                'value': round(user_data['Housing_to_Income_Ratio'] * 100, 1),
-                'threshold': '>35%',
-                'explanation': f"Housing consumes {round(user_data['Housing_to_Income_Ratio'] * 100)}% of income, leaving little for savings.",
-                'contribution_score': 0.8
-            })
-            
-        if user_data['Expenditure_to_Income_Ratio'] > 1.0:
-            risk_factors.append({
-                'factor': 'Expense to Income Ratio',
-                'value': round(user_data['Expenditure_to_Income_Ratio'], 2),
-                'threshold': '>1.0',
-                'explanation': f"You spend {round(user_data['Expenditure_to_Income_Ratio'], 2)} for every 1.0 earned.",
-                'contribution_score': 0.95
-            })
-        elif user_data['Expenditure_to_Income_Ratio'] > 0.9:
-            risk_factors.append({
-                'factor': 'Expense to Income Ratio',
-                'value': round(user_data['Expenditure_to_Income_Ratio'], 2),
-                'threshold': '>0.9',
-                'explanation': "Expenses are dangerously close to income limit.",
-                'contribution_score': 0.6
-            })
-            
-        if user_data['Savings_Rate'] < 0.05:
-            risk_factors.append({
-                'factor': 'Savings Rate',
-                'value': round(user_data['Savings_Rate'] * 100, 1),
-                'threshold': '<5%',
-                'explanation': "Savings buffer is critically low.",
-                'contribution_score': 0.7
-            })
-        
-        risk_factors_models = [RiskFactor(**rf) for rf in risk_factors]
-        
-        primary_cause = "Balanced financial execution"
-        urgent_action = "Maintain current habits"
+        recovery_months = 4
+        monthly_savings_needed = user_data['Net_Income'] * 0.15
+        
+    else:
+        status = 'Healthy'
+        primary_cause = "Strong income-to-expense ratio"
+        urgent_action = "Invest surplus for growth"
         recovery_months = 0
-        monthly_savings_needed = 0
-        
-        if prediction_result['prediction'] == 'High':
-            status = 'High Financial Risk'
-            if user_data['Housing_to_Income_Ratio'] > 0.4:
-                primary_cause = "Critical housing burden draining resources"
-                urgent_action = "Reduce housing costs or increase income immediately"
-            elif user_data['Is_Overspending']:
-                primary_cause = "Monthly expenses consistently exceed income"
-                urgent_action = "Immediate spending freeze on non-essentials"
-            else:
-                primary_cause = "Combined high fixed costs and low liquidity"
-                urgent_action = "Build emergency fund aggressively"
-            
-            target_buffer = total_exp * 6
-            current_buffer = user_data['Savings']
-            shortfall = target_buffer - max(0, current_buffer)
-            
-            potential_monthly_savings = user_data['Net_Income'] * 0.2
-            recovery_months = int(shortfall / potential_monthly_savings) if potential_monthly_savings > 0 else 24
-            recovery_months = min(24, max(3, recovery_months))
-            monthly_savings_needed = potential_monthly_savings
-
-        
-        elif prediction_result['prediction'] == 'Medium':
-            status = 'Vulnerable'
-            primary_cause = "High Discretionary Spending or Low Buffer"
-            if user_data['Discretionary_Spending_Share'] > 0.3:
-                 primary_cause = "High discretionary spending impacting resilience"
-                 urgent_action = "Cap discretionary spending to 20%"
-            else:
-                 urgent_action = "Optimize utility and food costs"
-            
-            recovery_months = 4
-            monthly_savings_needed = user_data['Net_Income'] * 0.15
-            
-        else:
-            status = 'Healthy'
-            primary_cause = "Strong income-to-expense ratio"
-            urgent_action = "Invest surplus for growth"
-            recovery_months = 0
-        
-        executive_summary = ExecutiveSummary(
-            status=status,
-            primary_cause=primary_cause,
-            urgent_action=urgent_action,
-            recovery_horizon=f"{recovery_months} - {recovery_months+3} months" if recovery_months > 0 else "Analysis Period"
-        )
+    
+    executive_summary = ExecutiveSummary(
+        status=status,
+        primary_cause=primary_cause,
+        urgent_action=urgent_action,
+        recovery_horizon=f"{recovery_months} - {recovery_months+3} months" if recovery_months > 0 else "Analysis Period"
+    )
+
+    
+    health_score, health_breakdown = compute_health_score(user_data, prediction_result['probabilities'])
+
+    return {
+        'prediction': prediction_result['prediction'],
+        'confidence': prediction_result['confidence'],
+        'probabilities': prediction_result['probabilities'],
+        
+        'health_score': round(health_score, 1),
+        'executive_summary': executive_summary,
+        'risk_factors': risk_factors_models,
+        'risk_explanation_text': [f.explanation for f in risk_factors_models],
+        'recovery_timeline_months': recovery_months,
+        'monthly_savings_needed': round(monthly_savings_needed, 2),
+        
+        'recommendations': recommendations,
+        'shap_plot': shap_plot,
+        'explanation': explanation,
+        'financial_metrics': financial_metrics,
+        'health_breakdown': health_breakdown
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage worker pool metrics, prediction and plot cache counters and report job retention."""
+    return {
+        'pools': pools.metrics() if pools is not None else {},
+        'cache': prediction_cache.metrics(),
+        'plot_cache': plot_cache.metrics(),
+        'reports': report_jobs.metrics(),
+        'comparison': model_comparison.metrics() if model_comparison.active else None
+    }
+
+def check_admin_token(token):
+    """
+    Require the X-Admin-Token header to match FDP_ADMIN_TOKEN. Without a
+    configured token the admin endpoints are disabled, not open.
+    """
+    expected = os.environ.get('FDP_ADMIN_TOKEN')
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (set FDP_ADMIN_TOKEN to enable them)")
+    # Constant-time comparison; bytes, since compare_digest rejects non-ASCII str
+    if not hmac.compare_digest((token or '').encode('utf-8'), expected.encode('utf-8')):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
 
+@app.get("/admin/models")
+async def list_model_versions(x_admin_token: Optional[str] = Header(None)):
+    """The serving model version and every version in the registry."""
+    check_admin_token(x_admin_token)
+    return {
+        'serving': {**serving_model, 'fingerprint': predictor.model_version if predictor is not None else None},
+        'registry': str(model_registry.root),
+        'versions': model_registry.versions()
+    }
+
+@app.post("/admin/models/reload")
+async def reload_model_version(version: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+    """
+    Load a registry version (default: the newest), warm it up and swap it in
+    without dropping requests. Only this worker process reloads; set
+    FDP_MODEL_WATCH_SECONDS to have every worker follow the registry.
+    """
+    check_admin_token(x_admin_token)
+    try:
+        return await reload_model(version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except StageOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model reload error: {str(e)}")
+
+async def load_candidate(version, mode=None, fraction=None):
+    """Load and warm up a registry version on the reload stage and hold it as the candidate."""
+    if mode is not None and mode not in MODES:
+        raise ValueError(f"Unknown candidate mode '{mode}' (expected one of {MODES})")
+    
+    async with model_reload_lock:
+        full, _, stats = await pools.run('reload', load_model_version, version)
+        model_comparison.set_candidate(full, version, mode, fraction)
+    run = model_comparison.run
+    print(f"🧪 Candidate model {version} ({run.mode}, fraction {run.fraction})")
+    return {'candidate_version': version, 'mode': run.mode, 'fraction': run.fraction, **stats}
+
+@app.post("/admin/models/candidate")
+async def set_candidate_model(version: str, mode: Optional[str] = None, fraction: Optional[float] = None,
+                              x_admin_token: Optional[str] = Header(None)):
+    """
+    Load a registry version next to the serving one. mode=shadow scores every
+    /predict household with it in the background; mode=split answers `fraction`
+    of households with it (and shadow-scores them with the serving model).
+    Defaults come from FDP_CANDIDATE_MODE / FDP_CANDIDATE_FRACTION.
+    """
+    check_admin_token(x_admin_token)
+    try:
+        return await load_candidate(version, mode, fraction)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except StageOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Candidate load error: {str(e)}")
+
+@app.delete("/admin/models/candidate")
+async def remove_candidate_model(x_admin_token: Optional[str] = Header(None)):
+    """Stop routing and shadow-scoring; returns the final comparison."""
+    check_admin_token(x_admin_token)
+    if not model_comparison.active:
+        raise HTTPException(status_code=404, detail="No candidate model loaded")
+    
+    final = model_comparison.metrics()
+    model_comparison.set_candidate(None, None)
+    return final
+
+@app.get("/admin/models/comparison")
+async def model_comparison_metrics(x_admin_token: Optional[str] = Header(None)):
+    """Per-model latency and prediction counts and the two models' disagreement."""
+    check_admin_token(x_admin_token)
+    if not model_comparison.active:
+        raise HTTPException(status_code=404, detail="No candidate model loaded")
+    return {'primary_version': serving_model['version'], **model_comparison.metrics()}
+
+@app.post("/predict", response_model=PredictionResponse)
+async def predict_financial_distress(household: HouseholdInput,
+                                     explanation: ExplanationMode = ExplanationMode.json,
+                                     top_k: int = 10):
+    """
+    Score one household. explanation=json returns SHAP contributions as data,
+    explanation=plot also renders the waterfall PNG, explanation=none skips SHAP.
+    """
+    if predictor is None or predictor.model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    primary, comparison = predictor, model_comparison
+    if not comparison.active:
+        response = await score_household(primary, household, explanation, top_k)
+        startup.mark_first_predict(explanation.value)
+        return response
+    
+    # With a candidate loaded, the model that did not answer is scored in the shadow.
+    # Both record into the run of this candidate, even if it is replaced meanwhile
+    candidate, run = comparison.candidate, comparison.run
+    role = 'candidate' if comparison.routes_to_candidate(household.dict()) else 'primary'
+    served, shadow = (candidate, primary) if role == 'candidate' else (primary, candidate)
+    
+    response = await score_household(served, household, explanation, top_k, comparison_run=run, role=role)
+    startup.mark_first_predict(explanation.value)
+    
+    other_role = 'primary' if role == 'candidate' else 'candidate'
+    comparison.track(run, asyncio.create_task(
+        shadow_score(run, shadow, other_role, household.dict(), response)
+    ))
+    return response
+
+def shadow_predict(model, household_values):
+    """Derive features for one household and time its prediction; runs on the shadow worker thread."""
+    _, _, features = build_household_features({name: [value] for name, value in household_values.items()}, model)
+    return timed_call(model.predict, features)
+
+async def shadow_score(run, model, role, household_values, served_response):
+    """
+    Score a household with the model that did not answer it and record the
+    comparison in `run` (a ComparisonRun). Runs as a background task after the
+    response is returned; dropped when the shadow stage's queue is full.
+    """
+    try:
+        result, latency_ms = await pools.run('shadow', shadow_predict, model, household_values)
+    except StageOverloaded:
+        run.shadow_dropped += 1
+        return
+    except Exception as e:
+        run.shadow_failed += 1
+        print(f"Shadow scoring failed: {e}")
+        return
+    
+    run.record(role, result, latency_ms)
+    if role == 'candidate':
+        run.compare(served_response, result)
+    else:
+        run.compare(result, served_response)
+
+async def score_household(model, household, explanation, top_k, comparison_run=None, role=None):
+    """
+    Score one household with `model` (the full or the fast predictor).
+    Prediction, response and explanation are each served from
+    prediction_cache when present and computed (then cached) otherwise;
+    payloads equal after rounding share the first one's results.
+    The plot is served from plot_cache by model version and feature row.
+    With a comparison_run, the served prediction (cached or not) is recorded
+    in it for `role` ('primary' or 'candidate').
+    """
+    try:
+        household_values = household.dict()
+        cache_key = prediction_cache.key(model, household_values)
+        explanation_key = f'{cache_key}:{top_k}'
+        
+        prediction_result = prediction_cache.get('prediction', cache_key)
+        response = prediction_cache.get('response', cache_key)
+        shap_summary = None
+        shap_plot = None
+        if explanation != ExplanationMode.none:
+            shap_summary = prediction_cache.get('explanation', explanation_key)
         
-        income_stability = min(100, max(0, (user_data['Savings_Rate'] * 200) + 30))
+        missing_explanation = explanation != ExplanationMode.none and shap_summary is None
         
-        expense_control = max(0, min(100, 100 - (user_data['Expenditure_to_Income_Ratio'] * 100)))
+        # Derived features are only needed when some layer missed or a plot is asked for (its key)
+        if (prediction_result is None or response is None or missing_explanation
+                or explanation == ExplanationMode.plot):
+            _, user_rows, features = build_household_features(
+                {name: [value] for name, value in household_values.items()}, model
+            )
         
-        debt_pressure = max(0, min(100, 100 - (user_data['Housing_to_Income_Ratio'] * 200)))
+        if explanation == ExplanationMode.plot:
+            plot_key = plot_cache.key(model.model_version, features[0])
+            shap_plot = plot_cache.get_base64(plot_key)
+        missing_plot = explanation == ExplanationMode.plot and shap_plot is None
         
-        savings_discipline = min(100, max(0, user_data['Savings_Rate'] * 300))
+        latency_ms = None
+        if prediction_result is None:
+            prediction_result, latency_ms = await pools.run('inference', timed_call, model.predict, features)
+            prediction_cache.put('prediction', cache_key, prediction_result)
+        if comparison_run is not None:
+            # latency_ms stays None for a cached prediction (counted, but not in the percentiles)
+            comparison_run.record(role, prediction_result, latency_ms)
         
-        # Calculate composite health score from financial metrics (70%) + ML adjustment (30%)
-        # This provides granular differentiation based on actual inputs
-        metric_score = (
-            income_stability * 0.25 +
-            expense_control * 0.25 +
-            debt_pressure * 0.25 +  # Already inverted (higher = less pressure)
-            savings_discipline * 0.25
-        )
+        try:
+            if missing_explanation:
+                shap_summary = (await pools.run(
+                    'inference', model.get_shap_summary,
+                    features, predicted_class=prediction_result['prediction'], top_k=top_k
+                ))[0]
+                prediction_cache.put('explanation', explanation_key, shap_summary)
+            if missing_plot:
+                # matplotlib is not thread-safe: render in a plot worker process
+                shap_plot = await pools.run(
+                    'plot', render_shap_waterfall,
+                    list(shap_summary['contributions'].values()),
+                    shap_summary['base_value'],
+                    pd.Series(features[0], index=model.feature_columns),
+                    model.feature_columns,
+                    ['Low', 'Medium', 'High'].index(shap_summary['predicted_class'])
+                )
+                plot_cache.put_base64(plot_key, shap_plot)
+        except Exception as e:
+            print(f"SHAP generation skipped: {e}")
         
-        # ML adjustment: boost for low risk predictions, penalty for high risk
-        ml_adjustment = (prob_low * 10) - (prob_high * 15) - (prob_medium * 5)
+        if response is None:
+            # Recommendations, health score and risk factors; the SHAP fields are set per request
+            response = build_prediction_response(user_rows[0], prediction_result)
+            prediction_cache.put('response', cache_key, response)
         
-        # Combine: 70% from metrics, 30% influenced by ML adjustment
-        health_score = max(0, min(100, (metric_score * 0.7) + (50 * 0.3) + ml_adjustment))
+        return {**response, 'shap_plot': shap_plot, 'explanation': shap_summary}
         
-        health_breakdown = HealthScoreBreakdown(
-            income_stability=round(income_stability, 1),
-            expense_control=round(expense_control, 1),
-            debt_pressure=round(debt_pressure, 1),
-            savings_discipline=round(savings_discipline, 1)
+    except StageOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+def score_households(columns, explanation=ExplanationMode.none, top_k=10, model=None):
+    """
+    Score a column dict of households end to end with `model` (default: the
+    serving predictor); runs on the batch worker thread.
+    """
+    # Read once: a model reload during the batch must not mix two versions
+    model = model or predictor
+    values, user_rows, features = build_household_features(columns, model)
+    
+    prediction_results = model.predict_batch(features)
+    
+    shap_summaries = [None] * len(user_rows)
+    if explanation == ExplanationMode.json:
+        shap_summaries = model.get_shap_summary(
+            features,
+            predicted_class=[result['prediction'] for result in prediction_results],
+            top_k=top_k
         )
+    
+    # One pass over the rule table for the whole batch
+    all_recommendations = recommendation_engine.generate_recommendations_batch(
+        values, [result['prediction'] for result in prediction_results]
+    )
+    
+    return [
+        build_prediction_response(user_data, prediction_result, explanation=shap_summary,
+                                  recommendations=recommendations)
+        for user_data, prediction_result, shap_summary, recommendations
+        in zip(user_rows, prediction_results, shap_summaries, all_recommendations)
+    ]
 
-        return {
-            'prediction': prediction_result['prediction'],
-            'confidence': prediction_result['confidence'],
-            'probabilities': prediction_result['probabilities'],
-            
-            'health_score': round(health_score, 1),
-            'executive_summary': executive_summary,
-            'risk_factors': risk_factors_models,
-            'risk_explanation_text': [f.explanation for f in risk_factors_models],
-            'recovery_timeline_months': recovery_months,
-            'monthly_savings_needed': round(monthly_savings_needed, 2),
-            
-            'recommendations': recommendations,
-            'shap_plot': shap_plot,
-            'financial_metrics': financial_metrics,
-            'health_breakdown': health_breakdown
-        }
+def batch_columns(batch):
+    """Column dict of a row- or column-oriented household batch, with optional fields defaulted."""
+    if (batch.households is None) == (batch.columns is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of 'households' or 'columns'")
+    
+    if batch.households is not None:
+        records = [household.dict() for household in batch.households]
+        columns = {name: [record[name] for record in records] for name in HouseholdInput.__fields__}
+    else:
+        columns = {name: values for name, values in batch.columns.dict().items() if values is not None}
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise HTTPException(status_code=422, detail="All columns must have the same length")
+        n_rows = lengths.pop()
+        for name in OPTIONAL_HOUSEHOLD_FIELDS:
+            columns.setdefault(name, [HouseholdInput.__fields__[name].default] * n_rows)
+    
+    check_finite_columns(columns, 'households' if batch.households is not None else 'columns')
+    return columns
+
+def check_finite_columns(columns, orientation):
+    """
+    Reject a batch holding Infinity (which the JSON parser and the ge=0 bounds let
+    through) with one 422 error per bad value, located like FastAPI's own errors,
+    instead of failing every household of the batch later on.
+    """
+    errors = []
+    for name in INPUT_COLUMNS:
+        for row in np.flatnonzero(~np.isfinite(np.asarray(columns[name], dtype=np.float64))).tolist():
+            loc = ['body', 'households', row, name] if orientation == 'households' else ['body', 'columns', name, row]
+            errors.append({'loc': loc, 'msg': 'Input should be a finite number', 'type': 'finite_number'})
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+@app.post("/predict_batch", response_model=BatchPredictionResponse)
+async def predict_batch(batch: BatchPredictionInput,
+                        explanation: ExplanationMode = ExplanationMode.none,
+                        top_k: int = 10):
+    """Score a whole portfolio in one model call. SHAP plots are not rendered per row."""
+    if predictor is None or predictor.model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    if explanation == ExplanationMode.plot:
+        raise HTTPException(status_code=422, detail="Batch explanations are available as json only")
+    
+    columns = batch_columns(batch)
+    
+    if not columns['Net_Income']:
+        return {'count': 0, 'results': []}
+    
+    try:
+        results = await pools.run('batch', score_households, columns, explanation, top_k)
         
+        return {'count': len(results), 'results': results}
+        
+    except StageOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction error: {str(e)}")
+
+def refresh_eda_aggregates():
+    """
+    Check the dataset fingerprint (and rebuild the aggregates if it changed) on the
+    'eda' worker, one check at a time; returns the task of the check in flight.
+    """
+    global eda_refresh
+    if eda_refresh is None or eda_refresh.done():
+        eda_refresh = asyncio.ensure_future(pools.run('eda', eda_store.get))
+        eda_refresh.add_done_callback(report_eda_refresh)
+    return eda_refresh
+
+def report_eda_refresh(task):
+    """Log a failed background check (requests still get the aggregates in memory)."""
+    if not task.cancelled() and task.exception() is not None:
+        print(f"EDA aggregate refresh failed: {task.exception()}")
 
 @app.post("/analyze_eda", response_model=EDAResponse)
 async def analyze_eda():
     try:
-        df = pd.read_csv('../data/processed/household_budget_processed.csv')
-        
-        summary_stats = {
-            'total_households': len(df),
-            'avg_income': round(df['Net_Income'].mean(), 2),
-            'median_income': round(df['Net_Income'].median(), 2),
-            'avg_expenditure': round(df['Total_Expenditure'].mean(), 2),
-            'avg_savings': round(df['Savings'].mean(), 2),
-            'avg_savings_rate': round(df['Savings_Rate'].mean() * 100, 2)
-        }
-        
-        categories = ['Food', 'Housing', 'Transport', 'Health', 'Education', 
-                     'Recreation', 'Clothing', 'Communication', 'Restaurants', 'Miscellaneous']
-        
-        category_breakdown = []
-        for cat in categories:
-            avg_amount = df[cat].mean()
-            pct_of_income = (avg_amount / df['Net_Income'].mean()) * 100
-            category_breakdown.append({
-                'category': cat,
-                'average_amount': round(avg_amount, 2),
-                'percentage_of_income': round(pct_of_income, 2)
-            })
-        
-        risk_counts = df['Financial_Distress'].value_counts().to_dict()
-        risk_distribution = {
-            'Low': risk_counts.get('Low', 0),
-            'Medium': risk_counts.get('Medium', 0),
-            'High': risk_counts.get('High', 0)
-        }
-        
-        regional_analysis = []
-        for region in df['Region'].unique():
-            region_df = df[df['Region'] == region]
-            regional_analysis.append({
-                'region': region,
-                'avg_income': round(region_df['Net_Income'].mean(), 2),
-                'avg_expenditure': round(region_df['Total_Expenditure'].mean(), 2),
-                'high_risk_pct': round((region_df['Financial_Distress'] == 'High').mean() * 100, 2)
-            })
+        # Served from memory at once; a changed dataset is picked up by the worker
+        # check this starts and served from the request after it finishes
+        refresh = refresh_eda_aggregates()
+        aggregates = eda_store.aggregates
+        if aggregates is None:
+            # Nothing loaded yet: wait for the check (shielded, it is shared by other requests)
+            aggregates = await asyncio.shield(refresh)
         
         return {
-            'summary_stats': summary_stats,
-            'category_breakdown': category_breakdown,
-            'risk_distribution': risk_distribution,
-            'regional_analysis': regional_analysis
+            'summary_stats': aggregates['summary_stats'],
+            'category_breakdown': aggregates['category_breakdown'],
+            'risk_distribution': aggregates['risk_distribution'],
+            'regional_analysis': aggregates['regional_analysis']
         }
         
     except FileNotFoundError:
@@ -519,86 +1106,205 @@ async def analyze_eda():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
 
-@app.post("/generate_report")
-async def generate_report(household: HouseholdInput, user_id: Optional[str] = "USER001"):
-    if report_generator is None:
-        raise HTTPException(status_code=503, detail="Report generator not initialized")
+async def render_report(household, user_id):
+    """Score the household (with the SHAP plot) and render its PDF report; returns the PDF bytes."""
+    prediction_response = await predict_financial_distress(household, explanation=ExplanationMode.plot)
+    
+    # reportlab layout is CPU-bound: build the PDF in a report worker process
+    return await pools.run(
+        'report', call_by_name, 'report_generator:render_report_in_worker',
+        **report_record(user_id, household.dict(), prediction_response)
+    )
+
+async def render_bulk_reports(columns, user_ids, archive_format, boundary, stats):
+    """
+    Score a portfolio in one batch call, render its reports in chunks across the
+    report worker processes and pack them into one archive; returns the archive
+    bytes and fills `stats` with throughput figures.
+    """
+    start = time.perf_counter()
     
+    # Same content as a single report: explanations for the batch, then every waterfall
+    model = predictor
+    results = await pools.run('batch', score_households, columns, ExplanationMode.json, 10, model)
+    await attach_shap_plots(model, columns, results)
+    households = [dict(zip(columns, row)) for row in zip(*columns.values())]
+    records = [report_record(*args) for args in zip(user_ids, households, results)]
+    
+    workers = pools.stages['report'].max_workers
+    chunks = await asyncio.gather(*[
+        pools.run('report', call_by_name, 'bulk_reports:render_chunk', chunk)
+        for chunk in chunked(records, chunk_size_for(len(records), workers, chunks_per_worker=2))
+    ])
+    
+    def pack():
+        buffer = io.BytesIO()
+        write_archive((pair for chunk in chunks for pair in chunk), buffer, archive_format, boundary)
+        return buffer.getvalue()
+    
+    archive = await pools.run('batch', pack)
+    
+    n_bytes = sum(len(pdf) for chunk in chunks for _, pdf in chunk)
+    stats.update(throughput(len(records), n_bytes, time.perf_counter() - start, workers))
+    return archive
+
+async def attach_shap_plots(model, columns, results):
+    """
+    Set each batch result's shap_plot from plot_cache, rendering the misses in
+    chunks across the plot worker processes (and caching them).
+    """
+    _, _, features = await pools.run('batch', build_household_features, columns, model)
+    keys = [plot_cache.key(model.model_version, row) for row in features]
+    
+    missing = []
+    for i, (key, result) in enumerate(zip(keys, results)):
+        result['shap_plot'] = plot_cache.get_base64(key)
+        if result['shap_plot'] is None and result['explanation'] is not None:
+            missing.append(i)
+    if not missing:
+        return
+    
+    plots = [
+        (
+            list(results[i]['explanation']['contributions'].values()),
+            results[i]['explanation']['base_value'],
+            pd.Series(features[i], index=model.feature_columns),
+            model.feature_columns,
+            ['Low', 'Medium', 'High'].index(results[i]['explanation']['predicted_class'])
+        )
+        for i in missing
+    ]
+    workers = pools.stages['plot'].max_workers
+    chunk_size = chunk_size_for(len(plots), workers, chunks_per_worker=2)
+    rendered = await asyncio.gather(*[
+        pools.run('plot', render_shap_waterfalls, chunk) for chunk in chunked(plots, chunk_size)
+    ])
+    
+    for i, shap_plot in zip(missing, (plot for chunk in rendered for plot in chunk)):
+        results[i]['shap_plot'] = shap_plot
+        plot_cache.put_base64(keys[i], shap_plot)
+
+def content_response(content, media_type, filename):
+    """Serve report bytes (PDF or archive) as a download."""
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+def report_job_status(job):
+    """Job summary plus the URLs to poll and download it."""
+    return {
+        **job.summary(),
+        'status_url': f'/reports/{job.job_id}',
+        'download_url': f'/reports/{job.job_id}/download'
+    }
+
+@app.post("/reports", status_code=202)
+async def submit_report(household: HouseholdInput, user_id: Optional[str] = "USER001"):
+    """Queue a PDF report and return its job id at once; poll /reports/{job_id}."""
     try:
-        prediction_response = await predict_financial_distress(household)
-        
-        user_data = household.dict()
-        user_data['Total_Expenditure'] = prediction_response.financial_metrics['total_expenditure']
-        user_data['Savings'] = prediction_response.financial_metrics['savings']
-        
-        pdf_path = report_generator.generate_report(
-            user_id=user_id,
-            user_data=user_data,
-            prediction_result={
-                'prediction': prediction_response.prediction,
-                'confidence': prediction_response.confidence,
-                'probabilities': prediction_response.probabilities
-            },
-            recommendations=prediction_response.recommendations,
-            financial_metrics=prediction_response.financial_metrics,
-            shap_plot_base64=prediction_response.shap_plot
+        job = report_jobs.submit(lambda: render_report(household, user_id),
+                                 filename=f'financial_report_{user_id}.pdf')
+    except ReportQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return report_job_status(job)
+
+@app.post("/reports/bulk", status_code=202)
+async def submit_bulk_reports(batch: BulkReportInput, archive_format: ArchiveFormat = ArchiveFormat.zip):
+    """
+    Queue reports for a whole portfolio as one job whose download is a zip
+    archive or a multipart/mixed stream of PDFs. The job status carries
+    throughput figures (reports per second) once it has finished.
+    """
+    columns = batch_columns(batch)
+    n_rows = len(columns['Net_Income'])
+    if n_rows == 0:
+        raise HTTPException(status_code=422, detail="No households given")
+    
+    user_ids = batch.user_ids or [f'USER{i:05d}' for i in range(1, n_rows + 1)]
+    if len(user_ids) != n_rows:
+        raise HTTPException(status_code=422, detail="Provide one user id per household")
+    
+    boundary = uuid.uuid4().hex
+    media_type = ARCHIVE_FORMATS[archive_format.value]
+    if archive_format == ArchiveFormat.multipart:
+        media_type = f'{media_type}; boundary={boundary}'
+    
+    stats = {}
+    try:
+        job = report_jobs.submit(
+            lambda: render_bulk_reports(columns, user_ids, archive_format.value, boundary, stats),
+            filename=f'financial_reports.{archive_format.value}',
+            media_type=media_type,
+            stats=stats
         )
+    except ReportQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return report_job_status(job)
+
+@app.get("/reports/{job_id}")
+async def report_status(job_id: str):
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired report job")
+    
+    return report_job_status(job)
+
+@app.get("/reports/{job_id}/download")
+async def download_report(job_id: str):
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired report job")
+    if job.status == 'failed':
+        raise HTTPException(status_code=500, detail=f"Report generation error: {job.error}")
+    if job.status != 'done':
+        raise HTTPException(status_code=409, detail=f"Report is {job.status}")
+    
+    return content_response(job.content, job.media_type, job.filename)
+
+@app.post("/generate_report")
+async def generate_report(household: HouseholdInput, user_id: Optional[str] = "USER001"):
+    """Synchronous report download (rendered in memory); /reports is the non-blocking variant."""
+    try:
+        pdf = await render_report(household, user_id)
         
-        return FileResponse(
-            pdf_path,
-            media_type='application/pdf',
-            filename=f'financial_report_{user_id}.pdf'
-        )
+        return content_response(pdf, 'application/pdf', f'financial_report_{user_id}.pdf')
         
+    except HTTPException:
+        raise
+    except StageOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Report generation error: {str(e)}")
 
 @app.post("/analyze_goal", response_model=GoalAnalysis)
 async def analyze_goal(data: HouseholdWithGoal):
     try:
-        I = data.Net_Income
-        
-        E = sum([
-            data.Food, data.Housing, data.Transport,
-            data.Health, data.Education, data.Recreation,
-            data.Clothing, data.Communication, data.Restaurants,
-            data.Miscellaneous
-        ])
-        
-        D = data.Housing
+        # Same formulas as the /analyze_goal_grid engine, for a 1 x 1 x 1 grid
+        grid = evaluate_goal_grid(
+            {col: [getattr(data, col)] for col in ['Net_Income'] + SERVING_SPENDING_COLUMNS},
+            [data.goal.goal_amount], [data.goal.duration_months]
+        )
         
-        G = data.goal.goal_amount
         T = data.goal.duration_months
         
-        S_raw = I - (E + D)
-        
-        S_emergency = 0.10 * I
-        S_safe1 = S_raw - S_emergency
-        
-        S_safe2 = (0.60 * I) - D
+        S_raw = float(grid['raw_surplus'][0])
+        S_emergency = float(grid['emergency_buffer'][0])
+        # max() keeps the int 0 the suggestions have always shown as "$0"
+        S_safe = max(0, float(grid['safe_surplus'][0]))
+        S_required = float(grid['required_monthly'][0, 0])
+        gap = float(grid['gap'][0, 0, 0])
+        distress_impact = float(grid['distress_impact_pct'][0, 0, 0])
         
-        S_safe = min(S_safe1, S_safe2)
+        T_healthy = grid['healthy_months'][0, 0]
+        T_healthy = int(T_healthy) if np.isfinite(T_healthy) else float('inf')
         
-        S_safe = max(0, S_safe)
+        feasibility = FEASIBILITY_LABELS[grid['feasibility'][0, 0, 0]]
         
-        S_required = G / T
-        
-        T_healthy = int(G / S_safe) if S_safe > 0 else float('inf')
-        
-        gap = S_required - S_safe
-        
-        DIR_current = (I - (E + D)) / I if I > 0 else 0
-        DIR_with_goal = (I - (E + D + S_required)) / I if I > 0 else 0
-        
-        if DIR_with_goal < 0.20:
-            distress_impact = 15.0
-        elif DIR_with_goal < DIR_current:
-            distress_impact = abs(DIR_current - DIR_with_goal) * 50
-        else:
-            distress_impact = 0
-        
-        if S_required <= S_safe:
-            feasibility = "Achievable"
+        if feasibility == "Achievable":
             suggestions = [
                 f"Goal is financially healthy. Save ${round(S_required, 0)}/month safely.",
                 f"Your safe saving capacity is ${round(S_safe, 0)}/month.",
@@ -606,8 +1312,7 @@ async def analyze_goal(data: HouseholdWithGoal):
                 "Consider automating savings for consistency."
             ]
             
-        elif S_safe < S_required <= S_raw:
-            feasibility = "Tight"
+        elif feasibility == "Tight":
             suggestions = [
                 f"⚠️ Goal achievable but increases financial risk.",
                 f"Safe saving: ${round(S_safe, 0)}/month. Required: ${round(S_required, 0)}/month.",
@@ -617,8 +1322,6 @@ async def analyze_goal(data: HouseholdWithGoal):
             ]
             
         else:
-            feasibility = "Not Feasible"
-            
             if S_safe <= 0:
                 suggestions = [
                     "❌ Current financial structure has no saving capacity.",
@@ -647,10 +1350,114 @@ async def analyze_goal(data: HouseholdWithGoal):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Goal analysis error: {str(e)}")
 
+# Python's round() elementwise: np.round can land on the other side of a tie
+# (x.xx5) and disagree with the cents /analyze_goal reports
+round_cents = np.frompyfunc(lambda value: round(value, 2), 1, 1)
+
+def goal_grid_response(columns, goal_amounts, durations):
+    """Evaluate the goal grid and shape it for GoalGridResponse; runs on the batch worker thread."""
+    grid = evaluate_goal_grid(columns, goal_amounts, durations)
+    
+    healthy_months = grid['healthy_months']
+    recommended = np.where(np.isfinite(healthy_months), healthy_months, 0).astype(np.int64).astype(object)
+    recommended[~np.isfinite(healthy_months)] = None
+    
+    return {
+        'households': len(grid['safe_surplus']),
+        'goal_amounts': goal_amounts,
+        'durations_months': durations,
+        'available_surplus': round_cents(grid['safe_surplus'].astype(object)).tolist(),
+        'required_monthly': round_cents(grid['required_monthly'].astype(object)).tolist(),
+        'feasibility': np.array(FEASIBILITY_LABELS)[grid['feasibility']].tolist(),
+        'gap': round_cents(grid['gap'].astype(object)).tolist(),
+        'distress_impact_pct': round_cents(grid['distress_impact_pct'].astype(object)).tolist(),
+        'recommended_duration_months': recommended.tolist()
+    }
+
+@app.post("/analyze_goal_grid", response_model=GoalGridResponse)
+async def analyze_goal_grid(data: GoalGridInput):
+    """
+    /analyze_goal over households x goal amounts x durations in one vectorized
+    pass. Accepts the same row- or column-oriented households as /predict_batch.
+    """
+    columns = batch_columns(data)
+    durations = data.durations_months or list(range(1, 361))
+    
+    n_cells = len(columns['Net_Income']) * len(data.goal_amounts) * len(durations)
+    if n_cells > MAX_GRID_CELLS:
+        raise HTTPException(status_code=422, detail=f"Grid has {n_cells} cells; at most {MAX_GRID_CELLS} per request")
+    
+    try:
+        return await pools.run('batch', goal_grid_response, columns, data.goal_amounts, durations)
+    except StageOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Goal grid error: {str(e)}")
+
 @app.post("/simulate", response_model=PredictionResponse)
-async def simulate_scenario(household: HouseholdInput):
+async def simulate_scenario(household: HouseholdInput,
+                            explanation: ExplanationMode = ExplanationMode.json,
+                            top_k: int = 10):
+    """
+    What-if scoring for interactive sliders; uses the distilled fast model
+    when one has been trained.
+    """
+    if fast_predictor is None or fast_predictor.model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    try:
+        return await score_household(fast_predictor, household, explanation, top_k)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Simulation error: {str(e)}")
+
+def score_scenarios(model, base, variants):
+    """Score the base household and its variants in one model call; runs on an inference thread."""
+    derived, features = scenario_engine.build(model.row_template, base, variants)
+    prediction_results = model.predict_batch(features)
+    
+    points = []
+    for variant, derived_row, prediction_result in zip([{}] + variants, derived, prediction_results):
+        health_score, _ = compute_health_score(dict(zip(DERIVED_COLUMNS, derived_row)),
+                                               prediction_result['probabilities'])
+        points.append({
+            'inputs': variant,
+            'prediction': prediction_result['prediction'],
+            'probabilities': prediction_result['probabilities'],
+            'health_score': round(health_score, 1)
+        })
+    
+    return {'base': points[0], 'points': points[1:]}
+
+@app.post("/simulate_curve", response_model=SimulationCurveResponse)
+async def simulate_curve(request: SimulationRequest):
+    """
+    Response curve for a base household: either one point per delta or one
+    per step of a sweep. Only the moved inputs and the derived features that
+    depend on them are recomputed, and all points are scored in one call to
+    the fast model. Each point's inputs hold just the values that changed.
+    """
+    if fast_predictor is None or fast_predictor.model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    if (request.deltas is None) == (request.sweep is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of 'deltas' or 'sweep'")
+    
+    base = request.household.dict()
+    try:
+        if request.sweep is not None:
+            sweep = request.sweep
+            variants = scenario_engine.expand_sweep(base, sweep.field, sweep.start, sweep.stop, sweep.steps)
+        else:
+            variants = scenario_engine.expand_deltas(base, request.deltas)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
     try:
-        return await predict_financial_distress(household)
+        return await pools.run('inference', score_scenarios, fast_predictor, base, variants)
+    except StageOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Simulation error: {str(e)}")
 
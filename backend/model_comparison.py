@@ -0,0 +1,183 @@
+"""
+Model Comparison: Shadow scoring and A/B traffic split for a candidate model
+A second model version (the candidate) is held next to the serving one. In
+'shadow' mode every /predict is answered by the serving model and the
+candidate scores the same household afterwards, off the response path; in
+'split' mode a fraction of households (chosen by a hash of the household, so
+each one sticks to one model) is answered by the candidate and the serving
+model is the one scored in the shadow. Either way, per-model latency and
+prediction counts and the two models' disagreement are recorded.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+from compiled_scorer import RISK_LEVELS
+
+MODES = ['shadow', 'split']
+
+def timed_call(fn, *args, **kwargs):
+    """fn(*args, **kwargs) and its duration in milliseconds."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+class ModelStats:
+    """Scoring counters and inference latency of one model."""
+
+    def __init__(self):
+        """Initialize empty counters."""
+        self.scored = 0
+        self.cached = 0
+        self.predictions = {level: 0 for level in RISK_LEVELS}
+        self.latencies_ms = deque(maxlen=1000)
+
+    def record(self, prediction_result, latency_ms=None):
+        """Count one prediction; latency_ms is None when it was served from the prediction cache."""
+        self.scored += 1
+        self.predictions[prediction_result['prediction']] += 1
+        if latency_ms is None:
+            self.cached += 1
+        else:
+            self.latencies_ms.append(latency_ms)
+
+    def metrics(self):
+        """Counters and latency percentiles (of the predictions actually computed)."""
+        latencies = np.array(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        return {
+            'scored': self.scored,
+            'cached': self.cached,
+            'predictions': dict(self.predictions),
+            'latency_ms': {
+                'p50': round(float(np.percentile(latencies, 50)), 3),
+                'p99': round(float(np.percentile(latencies, 99)), 3),
+                'max': round(float(latencies.max()), 3)
+            }
+        }
+
+class ComparisonRun:
+    """
+    One candidate's comparison metrics. Shadow tasks hold the run they were
+    scheduled for, so results that arrive after the candidate was replaced
+    are dropped instead of counted against the new one.
+    """
+
+    def __init__(self, version, mode, fraction):
+        """Initialize empty metrics."""
+        self.version = version
+        self.mode = mode
+        self.fraction = fraction
+        self.started_at = time.time()
+        self.closed = False
+
+        self.models = {'primary': ModelStats(), 'candidate': ModelStats()}
+        self.compared = 0
+        self.disagreements = 0
+        self.confusion = np.zeros((len(RISK_LEVELS), len(RISK_LEVELS)), dtype=np.int64)
+        self.probability_shift = 0.0
+        self.shadow_submitted = 0
+        self.shadow_dropped = 0
+        self.shadow_failed = 0
+        self.shadow_late = 0
+
+    def record(self, role, prediction_result, latency_ms=None):
+        """Count a prediction made by the 'primary' or 'candidate' model."""
+        if self.closed:
+            self.shadow_late += 1
+            return
+        self.models[role].record(prediction_result, latency_ms)
+
+    def compare(self, primary_result, candidate_result):
+        """Record both models' predictions for one household."""
+        if self.closed:
+            return
+        self.compared += 1
+        primary, candidate = primary_result['prediction'], candidate_result['prediction']
+        self.disagreements += primary != candidate
+        self.confusion[RISK_LEVELS.index(primary), RISK_LEVELS.index(candidate)] += 1
+        # Total variation distance between the two class distributions
+        self.probability_shift += 0.5 * sum(
+            abs(primary_result['probabilities'][level] - candidate_result['probabilities'][level])
+            for level in RISK_LEVELS
+        )
+
+    def metrics(self, pending=0):
+        """Mode, per-model stats, disagreement and shadow counters."""
+        return {
+            'candidate_version': self.version,
+            'mode': self.mode,
+            'fraction': self.fraction,
+            'started_at': self.started_at,
+            'models': {role: stats.metrics() for role, stats in self.models.items()},
+            'compared': self.compared,
+            'disagreements': self.disagreements,
+            'disagreement_rate': round(self.disagreements / self.compared, 4) if self.compared else None,
+            'mean_probability_shift': round(self.probability_shift / self.compared, 4) if self.compared else None,
+            # primary prediction -> candidate prediction -> count
+            'confusion': {
+                primary: {candidate: int(self.confusion[i, j]) for j, candidate in enumerate(RISK_LEVELS)}
+                for i, primary in enumerate(RISK_LEVELS)
+            },
+            'shadow': {
+                'submitted': self.shadow_submitted,
+                'pending': pending,
+                'dropped': self.shadow_dropped,
+                'failed': self.shadow_failed,
+                'late': self.shadow_late
+            }
+        }
+
+class ModelComparison:
+    """
+    The candidate model, how traffic reaches it and the current ComparisonRun.
+    Mode and fraction default to FDP_CANDIDATE_MODE / FDP_CANDIDATE_FRACTION.
+    """
+
+    def __init__(self, mode='shadow', fraction=0.1):
+        """Initialize without a candidate."""
+        self.default_mode = os.environ.get('FDP_CANDIDATE_MODE', mode)
+        self.default_fraction = float(os.environ.get('FDP_CANDIDATE_FRACTION', fraction))
+        self.candidate = None
+        self.run = None
+        self._shadow_tasks = set()
+
+    @property
+    def active(self):
+        """Whether a candidate is loaded."""
+        return self.candidate is not None
+
+    def set_candidate(self, model, version, mode=None, fraction=None):
+        """Hold `model` as the candidate (None removes it) and start a new run for it."""
+        mode = mode or self.default_mode
+        fraction = self.default_fraction if fraction is None else fraction
+        if mode not in MODES:
+            raise ValueError(f"Unknown candidate mode '{mode}' (expected one of {MODES})")
+        if not 0 <= fraction <= 1:
+            raise ValueError(f"Candidate traffic fraction must be between 0 and 1 ({fraction} given)")
+
+        if self.run is not None:
+            self.run.closed = True
+        self.candidate = model
+        self.run = ComparisonRun(version, mode, fraction) if model is not None else None
+
+    def routes_to_candidate(self, household):
+        """Whether a household's /predict is answered by the candidate ('split' mode only)."""
+        if not self.active or self.run.mode != 'split':
+            return False
+        digest = hashlib.blake2b(json.dumps(household, sort_keys=True).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, 'big') / 2 ** 64 < self.run.fraction
+
+    def track(self, run, task):
+        """Keep a shadow task of `run` referenced until it finishes."""
+        run.shadow_submitted += 1
+        self._shadow_tasks.add(task)
+        task.add_done_callback(self._shadow_tasks.discard)
+
+    def metrics(self):
+        """The current run's metrics (None without a candidate)."""
+        return self.run.metrics(pending=len(self._shadow_tasks)) if self.run is not None else None
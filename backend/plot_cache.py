@@ -0,0 +1,184 @@
+"""
+Plot Cache: Content-addressed cache for rendered SHAP waterfall PNGs
+A waterfall is fully determined by the model and the feature row it explains,
+so plots are keyed by the model version plus the canonical feature vector:
+a shared demo profile or a repeat submission is rendered by matplotlib once.
+PNG bytes are kept in a byte-bounded in-memory LRU and, when FDP_PLOT_CACHE_DIR
+is set, in a size-bounded directory of <key>.png files that API workers share.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+class PlotCache:
+    """
+    PNG bytes by content key, configured from FDP_PLOT_CACHE_MB, FDP_PLOT_CACHE_DIR
+    and FDP_PLOT_CACHE_DISK_MB. Least recently used entries are evicted once a
+    tier exceeds its size.
+    """
+
+    def __init__(self, max_mb=64, disk_dir=None, disk_max_mb=512, significant_digits=6):
+        """Initialize the memory tier and, if a directory is configured, the disk tier."""
+        self.significant_digits = significant_digits
+        self.max_bytes = int(float(os.environ.get('FDP_PLOT_CACHE_MB', max_mb)) * 1024 * 1024)
+        disk_dir = os.environ.get('FDP_PLOT_CACHE_DIR', disk_dir)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = int(float(os.environ.get('FDP_PLOT_CACHE_DISK_MB', disk_max_mb)) * 1024 * 1024)
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self.disk_bytes = sum(path.stat().st_size for path in self.disk_dir.glob('*.png'))
+
+    def canonicalize(self, features):
+        """
+        Feature row as plain values, numbers rounded to significant_digits (finer than
+        the waterfall prints), so rows that differ only in float noise share a plot.
+        """
+        row = []
+        for value in features:
+            if isinstance(value, np.generic):
+                value = value.item()
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = float(f'{value:.{self.significant_digits}g}')
+            row.append(value)
+        return row
+
+    def key(self, model_version, features):
+        """Content key of the plot explaining one feature row under a model version."""
+        payload = json.dumps([model_version, self.canonicalize(features)], default=str)
+        return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+    def _path(self, key):
+        """Disk tier file of a key."""
+        return self.disk_dir / f'{key}.png'
+
+    def _remember(self, key, png):
+        """Put PNG bytes in the memory tier, evicting the least recently used beyond max_bytes."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = png
+            self.memory_bytes += len(png)
+            while len(self._entries) > 1 and self.memory_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.memory_bytes -= len(evicted)
+                self.evictions += 1
+
+    def get(self, key):
+        """The cached PNG bytes (memory first, then disk), or None on a miss."""
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return png
+
+        if self.disk_dir is not None:
+            path = self._path(key)
+            try:
+                png = path.read_bytes()
+                # Touch it, so disk eviction also goes least recently used first
+                os.utime(path)
+            except OSError:
+                png = None
+            if png is not None:
+                self._remember(key, png)
+                self.disk_hits += 1
+                return png
+
+        self.misses += 1
+        return None
+
+    def put(self, key, png):
+        """Store PNG bytes in memory and, when configured, on disk."""
+        self._remember(key, png)
+        if self.disk_dir is None:
+            return
+
+        path = self._path(key)
+        if path.exists():
+            return
+        # Write then rename, so other workers never read a partial file
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            tmp_path.write_bytes(png)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Plot cache write skipped: {e}")
+            return
+        with self._lock:
+            self.disk_bytes += len(png)
+        if self.disk_bytes > self.disk_max_bytes:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Delete the least recently used files until the disk tier fits disk_max_bytes."""
+        files = []
+        for path in self.disk_dir.glob('*.png'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        # Recount from the directory: other workers may have written or evicted too
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files[:-1]:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.disk_evictions += 1
+
+        with self._lock:
+            self.disk_bytes = total
+
+    def get_base64(self, key):
+        """The cached plot as the base64 text /predict returns, or None."""
+        png = self.get(key)
+        return base64.b64encode(png).decode('utf-8') if png is not None else None
+
+    def put_base64(self, key, image_base64):
+        """Store a plot rendered as base64 text."""
+        self.put(key, base64.b64decode(image_base64))
+
+    def metrics(self):
+        """Tier sizes, limits and hit/miss counters."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'memory_bytes': self.memory_bytes,
+            'max_bytes': self.max_bytes,
+            'disk_dir': str(self.disk_dir) if self.disk_dir is not None else None,
+            'disk_bytes': self.disk_bytes if self.disk_dir is not None else None,
+            'disk_max_bytes': self.disk_max_bytes if self.disk_dir is not None else None,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else None,
+            'evictions': self.evictions,
+            'disk_evictions': self.disk_evictions
+        }
@@ -0,0 +1,123 @@
+"""
+Prediction Cache: Layered LRU + TTL cache for single-household scoring
+What-if sliders resend near-identical HouseholdInput payloads. Keys hash the
+canonicalized inputs (money rounded to cents), and each part of the response
+is cached in its own layer, so the prediction and recommendation pass can hit
+even when the explanation for that household is new. Waterfall plots are
+cached by content instead (see plot_cache.py).
+Entries are keyed per model variant and version (a hash of the model file), so
+a reloaded or candidate model never sees another model's results; entries of a
+replaced version simply age out.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# layer -> (max entries, TTL seconds)
+DEFAULT_LAYERS = {
+    'prediction': (4096, 600),
+    'response': (4096, 600),
+    'explanation': (1024, 600),
+}
+
+class LRUCache:
+    """Bounded map with least-recently-used eviction, a per-entry TTL and counters."""
+
+    def __init__(self, name, max_entries=1024, ttl_seconds=600):
+        """Initialize an empty cache."""
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """The cached value, or None on a miss or an expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expired += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Store value, evicting the least recently used entries beyond max_entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def metrics(self):
+        """Size, configuration and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            'expired': self.expired,
+            'evictions': self.evictions
+        }
+
+class PredictionCache:
+    """The cache layers, configured from FDP_CACHE_<LAYER>_SIZE / _TTL."""
+
+    def __init__(self, layers=None, decimals=2):
+        """Build one LRUCache per layer; layers maps name -> (max entries, TTL seconds)."""
+        layers = layers or DEFAULT_LAYERS
+        self.decimals = int(os.environ.get('FDP_CACHE_DECIMALS', decimals))
+        self.layers = {}
+        for name, (size, ttl) in layers.items():
+            prefix = f'FDP_CACHE_{name.upper()}'
+            self.layers[name] = LRUCache(
+                name,
+                max_entries=int(os.environ.get(f'{prefix}_SIZE', size)),
+                ttl_seconds=float(os.environ.get(f'{prefix}_TTL', ttl))
+            )
+
+    def canonicalize(self, household):
+        """Household fields with floats rounded, so near-identical payloads share a key."""
+        return {
+            name: round(value, self.decimals) if isinstance(value, float) else value
+            for name, value in household.items()
+        }
+
+    def key(self, model, household):
+        """Cache key for a household (canonicalized here) scored by `model` (its variant and version)."""
+        payload = json.dumps([model.variant, model.model_version, self.canonicalize(household)],
+                             sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def get(self, layer, key):
+        """Look up key in a layer (None on a miss)."""
+        return self.layers[layer].get(key)
+
+    def put(self, layer, key, value):
+        """Store a value in a layer."""
+        self.layers[layer].put(key, value)
+
+    def metrics(self):
+        """Per-layer metrics."""
+        return {
+            'decimals': self.decimals,
+            'layers': {name: cache.metrics() for name, cache in self.layers.items()}
+        }
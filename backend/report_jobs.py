@@ -0,0 +1,160 @@
+"""
+Report Jobs: Asynchronous PDF report generation with in-memory results
+Submitting a report returns a job id at once; the job runs in the background
+(prediction, then PDF rendering in report worker processes) and its PDF (or
+bulk archive) is kept in memory until fetched by id. Finished jobs are evicted
+oldest first once the retention limits (job count, total bytes, age) are
+exceeded, so nothing accumulates on disk or in memory.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+class ReportQueueFull(Exception):
+    """Raised when too many report jobs are queued or running."""
+
+class ReportJob:
+    """One report request and, once finished, its content (PDF or archive) or error."""
+
+    def __init__(self, filename, media_type='application/pdf', stats=None):
+        """Initialize a queued job; `stats` is a dict the job may fill in while it runs."""
+        self.job_id = uuid.uuid4().hex
+        self.filename = filename
+        self.media_type = media_type
+        self.stats = stats
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.finished_at = None
+        self.content = None
+        self.error = None
+        self.task = None
+
+    @property
+    def finished(self):
+        """Whether the job has completed or failed."""
+        return self.status in ('done', 'failed')
+
+    def summary(self):
+        """JSON-ready status (without the content)."""
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'filename': self.filename,
+            'media_type': self.media_type,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+            'size_bytes': len(self.content) if self.content is not None else None,
+            'stats': self.stats,
+            'error': self.error
+        }
+
+class ReportJobQueue:
+    """
+    Report jobs by id, configured from FDP_REPORT_MAX_PENDING / _MAX_JOBS /
+    _MAX_MB / _TTL. Rendering concurrency is bounded by the 'report' worker
+    pool stage the jobs run on.
+    """
+
+    def __init__(self, max_pending=32, max_jobs=256, max_mb=64, ttl_seconds=3600):
+        """Initialize an empty queue."""
+        self.max_pending = int(os.environ.get('FDP_REPORT_MAX_PENDING', max_pending))
+        self.max_jobs = int(os.environ.get('FDP_REPORT_MAX_JOBS', max_jobs))
+        self.max_bytes = int(float(os.environ.get('FDP_REPORT_MAX_MB', max_mb)) * 1024 * 1024)
+        self.ttl_seconds = float(os.environ.get('FDP_REPORT_TTL', ttl_seconds))
+
+        self._jobs = OrderedDict()
+        self.retained_bytes = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def pending(self):
+        """Number of jobs queued or running."""
+        return sum(not job.finished for job in self._jobs.values())
+
+    def submit(self, render, filename, media_type='application/pdf', stats=None):
+        """
+        Start a job in the background; returns the ReportJob.
+
+        Args:
+            render: zero-argument coroutine function returning the content bytes
+            filename: download name for the content
+            media_type: content type of the download
+            stats: dict shown in the job status (render may fill it in)
+        """
+        self._evict()
+        if self.pending() >= self.max_pending:
+            self.rejected += 1
+            raise ReportQueueFull(f"Report queue is full ({self.max_pending} jobs pending)")
+
+        job = ReportJob(filename, media_type, stats)
+        self._jobs[job.job_id] = job
+        self.submitted += 1
+        job.task = asyncio.get_running_loop().create_task(self._run(job, render))
+        return job
+
+    async def _run(self, job, render):
+        """Run one job, keep its content (or error) and apply retention."""
+        job.status = 'running'
+        try:
+            job.content = await render()
+            job.status = 'done'
+            self.retained_bytes += len(job.content)
+            self.completed += 1
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(getattr(e, 'detail', e))
+            self.failed += 1
+        finally:
+            job.finished_at = time.time()
+            job.task = None
+            self._evict()
+
+    def _drop(self, job_id):
+        """Forget a finished job and release its content."""
+        job = self._jobs.pop(job_id)
+        if job.content is not None:
+            self.retained_bytes -= len(job.content)
+        self.evicted += 1
+
+    def _evict(self):
+        """Drop expired finished jobs, then the oldest finished ones beyond the count or byte limit."""
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished]
+
+        for job in finished:
+            if now - job.finished_at > self.ttl_seconds:
+                self._drop(job.job_id)
+        finished = [job for job in finished if job.job_id in self._jobs]
+
+        # Oldest first; the newest finished job is kept so it can still be fetched
+        while len(finished) > 1 and (len(self._jobs) > self.max_jobs or self.retained_bytes > self.max_bytes):
+            self._drop(finished.pop(0).job_id)
+
+    def get(self, job_id):
+        """The job, or None if it is unknown or has been evicted."""
+        self._evict()
+        return self._jobs.get(job_id)
+
+    def metrics(self):
+        """Queue depth, retention and counters."""
+        self._evict()
+        return {
+            'pending': self.pending(),
+            'retained_jobs': sum(job.finished for job in self._jobs.values()),
+            'retained_bytes': self.retained_bytes,
+            'max_pending': self.max_pending,
+            'max_jobs': self.max_jobs,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'evicted': self.evicted
+        }
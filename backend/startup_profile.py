@@ -0,0 +1,92 @@
+"""
+Startup Profile: Import and init-stage timings for the API process
+main.py wraps its imports and load stages in StartupProfile.importing() /
+stage(); the report is printed when startup completes (per item with
+FDP_STARTUP_PROFILE=1) and served on /health together with the time to the
+first successful /predict.
+
+Target: the first successful /predict completes within FIRST_PREDICT_TARGET_MS
+of main.py starting to import, on one core with the compiled scorer exported
+(python ml_engine.py --export). The target is for the default request
+(explanation=json): its native CatBoost SHAP imports catboost on first use,
+which counts against the target, while shap, matplotlib and scikit-learn stay
+unloaded. explanation=plot renders in the plot worker processes and is not
+part of the target. /health reports the explanation mode the first /predict used.
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+FIRST_PREDICT_TARGET_MS = 2000
+
+# Heavy libraries the API only imports on first use; /health shows which are loaded
+LAZY_MODULES = ['catboost', 'shap', 'matplotlib', 'sklearn', 'reportlab']
+
+class StartupProfile:
+    """Wall-clock timings from the moment the profile is created."""
+
+    def __init__(self):
+        """Start the clock (create this before the imports being timed)."""
+        self.origin = time.perf_counter()
+        self.import_ms = {}
+        self.stage_ms = {}
+        self.ready_ms = None
+        self.first_predict_ms = None
+        self.first_predict_explanation = None
+
+    def _since_origin_ms(self):
+        """Milliseconds since the profile was created."""
+        return round((time.perf_counter() - self.origin) * 1000, 2)
+
+    @contextmanager
+    def _measure(self, timings, name):
+        """Store the duration of the with-block under timings[name]."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    def importing(self, name):
+        """Time an import block: `with profile.importing('pandas'): import pandas`."""
+        return self._measure(self.import_ms, name)
+
+    def stage(self, name):
+        """Time an initialization stage (model load, engine setup, ...)."""
+        return self._measure(self.stage_ms, name)
+
+    def mark_ready(self):
+        """Record that startup has finished and requests can be served."""
+        self.ready_ms = self._since_origin_ms()
+
+    def mark_first_predict(self, explanation=None):
+        """Record the first successful /predict and its explanation mode (later calls are ignored)."""
+        if self.first_predict_ms is None:
+            self.first_predict_ms = self._since_origin_ms()
+            self.first_predict_explanation = explanation
+
+    def report(self):
+        """Timings as a JSON-ready dict."""
+        return {
+            'imports_ms': dict(self.import_ms),
+            'stages_ms': dict(self.stage_ms),
+            'ready_ms': self.ready_ms,
+            'first_predict_ms': self.first_predict_ms,
+            'first_predict_explanation': self.first_predict_explanation,
+            'first_predict_target_ms': FIRST_PREDICT_TARGET_MS,
+            'within_target': None if self.first_predict_ms is None
+                             else self.first_predict_ms <= FIRST_PREDICT_TARGET_MS,
+            'lazy_modules_loaded': {name: name in sys.modules for name in LAZY_MODULES}
+        }
+
+    def print_report(self):
+        """Print the startup summary; itemized when FDP_STARTUP_PROFILE=1."""
+        print(f"⏱️  Startup: imports {sum(self.import_ms.values()):.0f} ms, "
+              f"init {sum(self.stage_ms.values()):.0f} ms, ready after {self.ready_ms:.0f} ms")
+
+        if os.environ.get('FDP_STARTUP_PROFILE') == '1':
+            for section, timings in [('import', self.import_ms), ('stage', self.stage_ms)]:
+                for name, ms in sorted(timings.items(), key=lambda item: -item[1]):
+                    print(f"   {section:<6} {name:<32} {ms:>9.2f} ms")
@@ -0,0 +1,178 @@
+"""
+Worker Pools: Off-event-loop execution for CPU-bound serving stages
+CatBoost inference runs on threads (it releases the GIL); matplotlib and
+reportlab rendering run in worker processes. Each stage has its own
+concurrency limit, a bounded wait queue and latency metrics.
+"""
+
+import asyncio
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+import numpy as np
+
+# stage name -> (executor kind, default workers, default queue length)
+DEFAULT_STAGES = {
+    'inference': ('thread', 4, 64),
+    'batch': ('thread', 1, 4),
+    'plot': ('process', 2, 16),
+    'report': ('process', 2, 16),
+    'reload': ('thread', 1, 1),
+    'shadow': ('thread', 1, 32),
+    'eda': ('thread', 1, 1),
+}
+
+def call_by_name(target, *args, **kwargs):
+    """
+    Import 'module:function' and call it. Submitting this instead of the function
+    keeps the module (e.g. reportlab via report_generator) out of the API process;
+    only the worker that runs the call imports it.
+    """
+    module_name, function_name = target.split(':')
+    return getattr(importlib.import_module(module_name), function_name)(*args, **kwargs)
+
+class StageOverloaded(Exception):
+    """Raised when a stage's wait queue is full."""
+
+class StagePool:
+    """One executor with a concurrency limit, a bounded queue and metrics."""
+
+    def __init__(self, name, kind='thread', max_workers=4, max_queue=64):
+        """Initialize the stage; processes are spawned lazily on first use."""
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+
+        self.executor = self._new_executor()
+        self._executor_lock = threading.Lock()
+
+        self._slots = None
+        self.in_flight = 0
+        self.queued = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.restarts = 0
+        self.latencies_ms = deque(maxlen=1000)
+
+    def _new_executor(self):
+        """A fresh executor of this stage's kind."""
+        if self.kind == 'process':
+            # spawn: never fork a process that is running event-loop and CatBoost threads
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f'fdp-{self.name}')
+
+    def _replace_broken(self, broken):
+        """Swap in a new process pool after a worker died, unless another call already did."""
+        with self._executor_lock:
+            if self.executor is not broken:
+                return
+            self.executor = self._new_executor()
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        print(f"Worker pool '{self.name}' restarted after a worker process died")
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on this stage's executor and await the result."""
+        if self._slots is None:
+            # Created lazily so it binds to the serving event loop
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        if self._slots.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise StageOverloaded(f"'{self.name}' stage queue is full ({self.max_queue} waiting)")
+
+        self.submitted += 1
+        start = time.perf_counter()
+
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        executor = self.executor
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+        except BrokenProcessPool:
+            # This call fails; later calls get a new pool instead of failing until restart
+            self.failed += 1
+            self._replace_broken(executor)
+            raise
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+            self.latencies_ms.append((time.perf_counter() - start) * 1000)
+
+        self.completed += 1
+        return result
+
+    def metrics(self):
+        """Counters and latency percentiles (queue wait + execution) for this stage."""
+        latencies = np.array(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        return {
+            'kind': self.kind,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            'queued': self.queued,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'restarts': self.restarts,
+            'latency_ms': {
+                'p50': round(float(np.percentile(latencies, 50)), 3),
+                'p99': round(float(np.percentile(latencies, 99)), 3),
+                'max': round(float(latencies.max()), 3)
+            }
+        }
+
+    def shutdown(self):
+        """Stop accepting work and release the workers."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class WorkerPools:
+    """The set of serving stages, configured from FDP_POOL_<STAGE>_WORKERS / _QUEUE."""
+
+    def __init__(self, stages=None):
+        """Build one StagePool per stage; stages maps name -> (kind, workers, queue)."""
+        stages = stages or DEFAULT_STAGES
+        self.stages = {}
+        for name, (kind, workers, queue) in stages.items():
+            prefix = f'FDP_POOL_{name.upper()}'
+            self.stages[name] = StagePool(
+                name,
+                kind=kind,
+                max_workers=int(os.environ.get(f'{prefix}_WORKERS', workers)),
+                max_queue=int(os.environ.get(f'{prefix}_QUEUE', queue))
+            )
+
+    async def run(self, stage, fn, *args, **kwargs):
+        """Dispatch fn to the named stage."""
+        return await self.stages[stage].run(fn, *args, **kwargs)
+
+    def metrics(self):
+        """Metrics for every stage."""
+        return {name: pool.metrics() for name, pool in self.stages.items()}
+
+    def shutdown(self):
+        """Shut down every stage."""
+        for pool in self.stages.values():
+            pool.shutdown()
@@ -3,6 +3,11 @@ Data Preprocessing for Real Housing Dataset
 Merges 3 CSV files and creates financial distress prediction features
 """
 
+import sys
+import argparse
+from itertools import zip_longest
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
 from scipy import stats
@@ -11,6 +16,254 @@ from statsmodels.stats.outliers_influence import variance_inflation_factor
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.append(str(Path(__file__).parent.parent / 'ml_models'))
+
+from feature_engineering import training_features
+from eda_store import EDAAggregateStore, EDAAccumulator
+from processed_dataset import PARQUET_PATH, save_processed_dataset, ProcessedDatasetWriter
+
+# Rename columns for consistency
+COLUMN_MAPPING = {
+    'Total Household Income': 'Net_Income',
+    'Total Food Expenditure': 'Food',
+    'Housing and water Expenditure': 'Housing',
+    'Transportation Expenditure': 'Transport',
+    'Medical Care Expenditure': 'Health',
+    'Education Expenditure': 'Education',
+    'Restaurant and hotels Expenditure': 'Restaurants',
+    'Clothing, Footwear and Other Wear Expenditure': 'Clothing',
+    'Communication Expenditure': 'Communication',
+    'Miscellaneous Goods and Services Expenditure': 'Miscellaneous',
+    'Special Occasions Expenditure': 'Special_Occasions',
+    'Total Number of Family members': 'Household_Size',
+    'Type of Household': 'Household_Type',
+    'Household Head Sex': 'Head_Sex',
+    'Household Head Age': 'Head_Age',
+    'Household Head Job or Business Indicator': 'Employment_Status',
+    'Region': 'Region'
+}
+
+EXPENDITURE_COLUMNS = ['Food', 'Housing', 'Transport', 'Health', 'Education',
+                       'Restaurants', 'Clothing', 'Communication', 'Miscellaneous']
+
+DISTRESS_MAPPING = {'Low': 0, 'Medium': 1, 'High': 2}
+
+# Files merged side by side (household_expenses.csv is not part of the model data)
+MERGED_FILES = ['family_info', 'house_utilities']
+
+def clean_frame(df, household_size_median=None):
+    """
+    Rename, filter and fill one frame (the whole dataset or one chunk).
+    household_size_median defaults to the frame's own median.
+    Returns (cleaned frame, rows removed).
+    """
+    df = df.rename(columns=COLUMN_MAPPING)
+    
+    # Drop rows with missing income (can't calculate distress without it)
+    initial_count = len(df)
+    df = df[df['Net_Income'] > 0].copy()
+    removed = initial_count - len(df)
+    
+    # Fill missing expenditure values with 0 (assumption: didn't spend)
+    for col in EXPENDITURE_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].fillna(0)
+    
+    # Add Recreation column (combine special occasions and restaurant partially)
+    if 'Special_Occasions' in df.columns:
+        df['Recreation'] = df['Special_Occasions']
+    else:
+        df['Recreation'] = 0
+    
+    # Handle missing household size
+    if 'Household_Size' in df.columns:
+        if household_size_median is None:
+            household_size_median = df['Household_Size'].median()
+        df['Household_Size'] = df['Household_Size'].fillna(household_size_median)
+    else:
+        df['Household_Size'] = 4
+    
+    # Create Region if not exists
+    if 'Region' not in df.columns:
+        df['Region'] = 'Unknown'
+    
+    # Employment status
+    if 'Employment_Status' in df.columns:
+        df['Employment_Status'] = df['Employment_Status'].fillna('Unknown')
+    else:
+        df['Employment_Status'] = 'Unknown'
+    
+    # Household type
+    if 'Household_Type' not in df.columns:
+        df['Household_Type'] = 'Single Family'
+    
+    # Fill ALL categorical columns with 'Unknown' for any NaN values
+    categorical_cols = df.select_dtypes(include=['object']).columns
+    for col in categorical_cols:
+        df[col] = df[col].fillna('Unknown').astype(str)
+    
+    return df, removed
+
+def label_frame(df):
+    """Add Total_Expenditure, Savings, the expenditure/income ratio and Financial_Distress."""
+    # Total expenditure, savings and expenditure/income ratio come from the shared kernel
+    derived = training_features.transform_frame(df)
+    for col in ['Total_Expenditure', 'Savings', 'Expenditure_to_Income_Ratio']:
+        df[col] = derived[col]
+    
+    # Create distress labels
+    conditions = [
+        df['Expenditure_to_Income_Ratio'] > 0.90,
+        (df['Expenditure_to_Income_Ratio'] >= 0.70) & (df['Expenditure_to_Income_Ratio'] <= 0.90),
+        df['Expenditure_to_Income_Ratio'] < 0.70
+    ]
+    choices = ['High', 'Medium', 'Low']
+    df['Financial_Distress'] = np.select(conditions, choices, default='Low')
+    return df
+
+def engineer_frame(df):
+    """Add every derived feature from the shared kernel."""
+    # Ratios, risk metrics, volatility, buffer and flags are computed by the
+    # same vectorized kernel the API uses at serving time
+    derived = training_features.transform_frame(df)
+    for col in derived.columns:
+        df[col] = derived[col]
+    return df
+
+def finalize_frame(df, medians=None):
+    """
+    Replace inf, fill numeric NaNs with medians and encode the target.
+    medians defaults to the frame's own column medians.
+    """
+    # Handle inf/nan values
+    df = df.replace([np.inf, -np.inf], np.nan)
+    
+    # Fill NaN values
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    for col in numeric_cols:
+        if df[col].isna().sum() > 0:
+            median = df[col].median() if medians is None else medians.get(col, np.nan)
+            df[col] = df[col].fillna(median)
+    
+    # Encode target variable
+    df['Financial_Distress_Encoded'] = df['Financial_Distress'].map(DISTRESS_MAPPING)
+    return df
+
+def report_anova(f_stat, p_value):
+    """Print the Region ANOVA result."""
+    print(f"   F-statistic: {f_stat:.4f}")
+    print(f"   P-value: {p_value:.6f}")
+    if p_value < 0.05:
+        print(f" Region SIGNIFICANTLY affects financial distress")
+    else:
+        print(f"Region does NOT significantly affect financial distress")
+
+def report_chi_square(contingency_table):
+    """Run and print the Household Size vs Financial Distress chi-square test."""
+    chi2, p_value, dof, expected = chi2_contingency(contingency_table)
+    print(f"   Chi-Square: {chi2:.4f}")
+    print(f"   P-value: {p_value:.6f}")
+    if p_value < 0.05:
+        print(f"  Household Size SIGNIFICANTLY affects financial distress")
+    else:
+        print(f"   Household Size does NOT significantly affect financial distress")
+
+def unify_dtype(current, dtype):
+    """Column dtype that holds both chunks' values: object if either is text, else the numeric promotion."""
+    if not pd.api.types.is_numeric_dtype(dtype):
+        return np.dtype(object)
+    if current is None:
+        return dtype
+    if current == np.dtype(object):
+        return current
+    return np.result_type(current, dtype)
+
+class ColumnReservoir:
+    """
+    Uniform fixed-size row sample of numeric columns, used for medians over data
+    that does not fit in memory. Medians are exact while at most `capacity`
+    rows have been added.
+    """
+    
+    def __init__(self, capacity=100_000, seed=42):
+        """Initialize an empty reservoir; columns are fixed by the first add()."""
+        self.capacity = capacity
+        self.columns = None
+        self.sample = None
+        self.seen = 0
+        self._rng = np.random.default_rng(seed)
+    
+    def add(self, df):
+        """Offer every row of df to the sample (Algorithm R, vectorized per chunk)."""
+        if self.columns is None:
+            self.columns = list(df.columns)
+            self.sample = np.empty((self.capacity, len(self.columns)))
+        
+        values = df[self.columns].to_numpy(dtype=np.float64)
+        
+        # Fill the free slots first, then replace at random with probability capacity/(row+1)
+        free = min(max(self.capacity - self.seen, 0), len(values))
+        self.sample[self.seen:self.seen + free] = values[:free]
+        rest = values[free:]
+        if len(rest):
+            row_numbers = self.seen + free + np.arange(len(rest))
+            slots = self._rng.integers(0, row_numbers + 1)
+            keep = slots < self.capacity
+            self.sample[slots[keep]] = rest[keep]
+        
+        self.seen += len(values)
+    
+    def medians(self):
+        """Median of each column, ignoring NaN."""
+        if self.columns is None:
+            return {}
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            medians = np.nanmedian(self.sample[:min(self.seen, self.capacity)], axis=0)
+        return dict(zip(self.columns, medians))
+
+class StreamingValidation:
+    """Sufficient statistics for the ANOVA and chi-square tests, accumulated chunk by chunk."""
+    
+    def __init__(self):
+        """Initialize empty accumulators."""
+        self.regions = {}
+        self.contingency_table = None
+    
+    def add(self, df):
+        """Fold one labeled chunk into the per-region moments and the contingency table."""
+        grouped = df.groupby('Region', sort=False)['Expenditure_to_Income_Ratio']
+        for region, (n, mean, var) in grouped.agg(['count', 'mean', 'var']).fillna(0).iterrows():
+            n_a, mean_a, m2_a = self.regions.get(region, (0, 0.0, 0.0))
+            m2 = var * (n - 1)
+            # Chan et al. parallel combination of count, mean and sum of squared deviations
+            total = n_a + n
+            delta = mean - mean_a
+            self.regions[region] = (
+                total,
+                mean_a + delta * n / total,
+                m2_a + m2 + delta ** 2 * n_a * n / total
+            )
+        
+        table = pd.crosstab(df['Household_Size'], df['Financial_Distress'])
+        if self.contingency_table is None:
+            self.contingency_table = table
+        else:
+            self.contingency_table = self.contingency_table.add(table, fill_value=0)
+    
+    def anova(self):
+        """One-way ANOVA F statistic and p-value across regions."""
+        counts = np.array([n for n, _, _ in self.regions.values()], dtype=np.float64)
+        means = np.array([mean for _, mean, _ in self.regions.values()])
+        m2s = np.array([m2 for _, _, m2 in self.regions.values()])
+        
+        n_total, k = counts.sum(), len(counts)
+        grand_mean = (counts * means).sum() / n_total
+        between = (counts * (means - grand_mean) ** 2).sum() / (k - 1)
+        within = m2s.sum() / (n_total - k)
+        f_stat = between / within
+        return f_stat, stats.f.sf(f_stat, k - 1, n_total - k)
+
 class HousingDataProcessor:
     """Process real housing dataset for financial distress prediction."""
     
@@ -18,7 +271,7 @@ class HousingDataProcessor:
         """Initialize with housing data directory."""
         self.data_dir = data_dir
         self.df = None
-        
+    
     def load_and_merge_datasets(self):
         """Load and merge the 3 CSV files."""
         print("\ Loading Housing Datasets...")
@@ -33,7 +286,7 @@ class HousingDataProcessor:
         
         self.df = pd.concat([family_info, house_utilities], axis=1)
         
- 
+        
         print(f"\n Merged dataset shape: {self.df.shape}")
         print(f"   Total columns: {len(self.df.columns)}")
         
@@ -43,75 +296,11 @@ class HousingDataProcessor:
         """Clean data and prepare for feature engineering."""
         print("\n🧹 Cleaning Data...")
         
-        # Rename columns for consistency
-        column_mapping = {
-            'Total Household Income': 'Net_Income',
-            'Total Food Expenditure': 'Food',
-            'Housing and water Expenditure': 'Housing',
-            'Transportation Expenditure': 'Transport',
-            'Medical Care Expenditure': 'Health',
-            'Education Expenditure': 'Education',
-            'Restaurant and hotels Expenditure': 'Restaurants',
-            'Clothing, Footwear and Other Wear Expenditure': 'Clothing',
-            'Communication Expenditure': 'Communication',
-            'Miscellaneous Goods and Services Expenditure': 'Miscellaneous',
-            'Special Occasions Expenditure': 'Special_Occasions',
-            'Total Number of Family members': 'Household_Size',
-            'Type of Household': 'Household_Type',
-            'Household Head Sex': 'Head_Sex',
-            'Household Head Age': 'Head_Age',
-            'Household Head Job or Business Indicator': 'Employment_Status',
-            'Region': 'Region'
-        }
-        
-        self.df.rename(columns=column_mapping, inplace=True)
-        
-        # Drop rows with missing income (can't calculate distress without it)
-        initial_count = len(self.df)
-        self.df = self.df[self.df['Net_Income'] > 0].copy()
-        print(f"   Removed {initial_count - len(self.df)} rows with zero/missing income")
-        
-        # Fill missing expenditure values with 0 (assumption: didn't spend)
-        expenditure_cols = ['Food', 'Housing', 'Transport', 'Health', 'Education', 
-                           'Restaurants', 'Clothing', 'Communication', 'Miscellaneous']
-        
-        for col in expenditure_cols:
-            if col in self.df.columns:
-                self.df[col].fillna(0, inplace=True)
-        
-        # Add Recreation column (combine special occasions and restaurant partially)
-        if 'Special_Occasions' in self.df.columns:
-            self.df['Recreation'] = self.df['Special_Occasions']
-        else:
-            self.df['Recreation'] = 0
-        
-        # Handle missing household size
-        if 'Household_Size' in self.df.columns:
-            self.df['Household_Size'].fillna(self.df['Household_Size'].median(), inplace=True)
-        else:
-            self.df['Household_Size'] = 4  
-        
-        # Create Region if not exists
-        if 'Region' not in self.df.columns:
-            self.df['Region'] = 'Unknown'
-        
-        # Employment status
-        if 'Employment_Status' in self.df.columns:
-            self.df['Employment_Status'] = self.df['Employment_Status'].fillna('Unknown')
-        else:
-            self.df['Employment_Status'] = 'Unknown'
-        
-        # Household type
-        if 'Household_Type' not in self.df.columns:
-            self.df['Household_Type'] = 'Single Family'
-        
-        # Fill ALL categorical columns with 'Unknown' for any NaN values
-        categorical_cols = self.df.select_dtypes(include=['object']).columns
-        for col in categorical_cols:
-            self.df[col] = self.df[col].fillna('Unknown').astype(str)
+        self.df, removed = clean_frame(self.df)
+        print(f"   Removed {removed} rows with zero/missing income")
         
         print(f"Data cleaned: {len(self.df)} usable records")
-        
+    
     def create_financial_distress_label(self):
         """
         Create target variable: Financial Distress Level
@@ -122,27 +311,7 @@ class HousingDataProcessor:
         """
         print("\n📊 Creating Financial Distress Labels...")
         
-        # Calculate total expenditure
-        expenditure_cols = ['Food', 'Housing', 'Transport', 'Health', 'Education', 
-                           'Recreation', 'Clothing', 'Communication', 'Miscellaneous']
-        
-        available_cols = [col for col in expenditure_cols if col in self.df.columns]
-        self.df['Total_Expenditure'] = self.df[available_cols].sum(axis=1)
-        
-        # Calculate savings
-        self.df['Savings'] = self.df['Net_Income'] - self.df['Total_Expenditure']
-        
-        # Calculate expenditure to income ratio
-        self.df['Expenditure_to_Income_Ratio'] = self.df['Total_Expenditure'] / self.df['Net_Income']
-        
-        # Create distress labels
-        conditions = [
-            self.df['Expenditure_to_Income_Ratio'] > 0.90,
-            (self.df['Expenditure_to_Income_Ratio'] >= 0.70) & (self.df['Expenditure_to_Income_Ratio'] <= 0.90),
-            self.df['Expenditure_to_Income_Ratio'] < 0.70
-        ]
-        choices = ['High', 'Medium', 'Low']
-        self.df['Financial_Distress'] = np.select(conditions, choices, default='Low')
+        self.df = label_frame(self.df)
         
         # Distribution
         print(f"Financial Distress Distribution:")
@@ -150,55 +319,15 @@ class HousingDataProcessor:
         print(f"\n   High Risk: {(self.df['Financial_Distress'] == 'High').sum() / len(self.df) * 100:.1f}%")
         print(f"   Medium Risk: {(self.df['Financial_Distress'] == 'Medium').sum() / len(self.df) * 100:.1f}%")
         print(f"   Low Risk: {(self.df['Financial_Distress'] == 'Low').sum() / len(self.df) * 100:.1f}%")
-        
+    
     def engineer_features(self):
         """Advanced feature engineering for financial analysis."""
         print("\n🔧 Engineering Advanced Features...")
         
-        # 1. RATIOS
-        self.df['Savings_Rate'] = self.df['Savings'] / self.df['Net_Income']
-        self.df['Housing_to_Income_Ratio'] = self.df['Housing'] / self.df['Net_Income']
-        self.df['Food_to_Total_Exp_Ratio'] = self.df['Food'] / self.df['Total_Expenditure'].replace(0, 1)
-        self.df['Transport_to_Income_Ratio'] = self.df['Transport'] / self.df['Net_Income']
-        
-        # 2. RISK METRICS
-        self.df['Essential_Spending'] = self.df['Food'] + self.df['Housing']
-        self.df['Essential_Spending_Share'] = self.df['Essential_Spending'] / self.df['Total_Expenditure'].replace(0, 1)
-        
-        self.df['Discretionary_Spending'] = (self.df['Recreation'] + 
-                                             self.df['Restaurants'] + 
-                                             self.df['Clothing'])
-        self.df['Discretionary_Spending_Share'] = self.df['Discretionary_Spending'] / self.df['Total_Expenditure'].replace(0, 1)
-        
-        # Per capita metrics
-        self.df['Per_Capita_Income'] = self.df['Net_Income'] / self.df['Household_Size']
-        self.df['Per_Capita_Expenditure'] = self.df['Total_Expenditure'] / self.df['Household_Size']
-        
-        # 3. VOLATILITY METRICS
-        spending_cols = ['Food', 'Housing', 'Transport', 'Health', 'Education', 
-                        'Recreation', 'Clothing', 'Communication', 'Miscellaneous']
-        available_spending = [col for col in spending_cols if col in self.df.columns]
-        
-        self.df['Spending_Variance'] = self.df[available_spending].var(axis=1)
-        self.df['Spending_Std'] = self.df[available_spending].std(axis=1)
-        self.df['Spending_CV'] = self.df['Spending_Std'] / self.df['Total_Expenditure'].replace(0, 1)
-        
-        # 4. ADDITIONAL INSIGHTS
-        self.df['Health_Spending_Ratio'] = self.df['Health'] / self.df['Net_Income']
-        self.df['Education_Spending_Ratio'] = self.df['Education'] / self.df['Net_Income']
-        
-        # Financial buffer
-        monthly_exp = self.df['Total_Expenditure'] / 12
-        self.df['Months_of_Savings'] = self.df['Savings'] / monthly_exp.replace(0, 1)
-        self.df['Months_of_Savings'] = self.df['Months_of_Savings'].replace([np.inf, -np.inf], 0)
-        
-        # Binary flags
-        self.df['Is_Overspending'] = (self.df['Total_Expenditure'] > self.df['Net_Income']).astype(int)
-        self.df['High_Housing_Burden'] = (self.df['Housing_to_Income_Ratio'] > 0.35).astype(int)
-        self.df['Low_Savings'] = (self.df['Savings_Rate'] < 0.10).astype(int)
+        self.df = engineer_frame(self.df)
         
         print(f"Feature engineering complete")
-        
+    
     def statistical_validation(self):
         """Perform statistical tests."""
         print("\nRunning Statistical Validation...")
@@ -208,60 +337,159 @@ class HousingDataProcessor:
             print("\n ANOVA Test: Region vs Expenditure/Income Ratio")
             try:
                 regions = self.df['Region'].unique()
-                groups = [self.df[self.df['Region'] == region]['Expenditure_to_Income_Ratio'].values 
+                groups = [self.df[self.df['Region'] == region]['Expenditure_to_Income_Ratio'].values
                          for region in regions if len(self.df[self.df['Region'] == region]) > 0]
                 if len(groups) > 1:
-                    f_stat, p_value = stats.f_oneway(*groups)
-                    print(f"   F-statistic: {f_stat:.4f}")
-                    print(f"   P-value: {p_value:.6f}")
-                    if p_value < 0.05:
-                        print(f" Region SIGNIFICANTLY affects financial distress")
-                    else:
-                        print(f"Region does NOT significantly affect financial distress")
+                    report_anova(*stats.f_oneway(*groups))
             except:
                 print(" Could not perform ANOVA test")
         
         # 2. Chi-Square: Household Size vs Financial Distress
         print("\n Chi-Square Test: Household Size vs Financial Distress")
         try:
-            contingency_table = pd.crosstab(self.df['Household_Size'], self.df['Financial_Distress'])
-            chi2, p_value, dof, expected = chi2_contingency(contingency_table)
-            print(f"   Chi-Square: {chi2:.4f}")
-            print(f"   P-value: {p_value:.6f}")
-            if p_value < 0.05:
-                print(f"  Household Size SIGNIFICANTLY affects financial distress")
-            else:
-                print(f"   Household Size does NOT significantly affect financial distress")
+            report_chi_square(pd.crosstab(self.df['Household_Size'], self.df['Financial_Distress']))
         except:
             print(" Could not perform Chi-Square test")
-        
+    
     def prepare_final_dataset(self):
         """Prepare final dataset for ML."""
         print("\n Preparing Final Dataset...")
         
-        # Handle inf/nan values
-        self.df = self.df.replace([np.inf, -np.inf], np.nan)
-        
-        # Fill NaN values
-        numeric_cols = self.df.select_dtypes(include=[np.number]).columns
-        for col in numeric_cols:
-            if self.df[col].isna().sum() > 0:
-                self.df[col].fillna(self.df[col].median(), inplace=True)
-        
-        # Encode target variable
-        distress_mapping = {'Low': 0, 'Medium': 1, 'High': 2}
-        self.df['Financial_Distress_Encoded'] = self.df['Financial_Distress'].map(distress_mapping)
+        self.df = finalize_frame(self.df)
         
-        # Save processed data
-        output_path = '../data/processed/household_budget_processed.csv'
-        self.df.to_csv(output_path, index=True)
+        # Save processed data (Parquet, categorical columns dictionary-encoded)
+        output_path = save_processed_dataset(self.df, PARQUET_PATH)
         print(f" Processed dataset saved to: {output_path}")
+        
+        # Precompute the aggregates the API serves from /analyze_eda
+        store = EDAAggregateStore(output_path)
+        store.build(self.df)
+        print(f" EDA aggregates saved to: {store.store_path}")
         print(f"   Total features: {len(self.df.columns)}")
         print(f"   Total samples: {len(self.df)}")
         
         return self.df
+    
+    def _iter_aligned_chunks(self, chunksize, dtypes=None):
+        """Yield lists of row-aligned chunks, one per file in MERGED_FILES."""
+        dtypes = dtypes or {}
+        readers = [
+            pd.read_csv(f'{self.data_dir}/{name}.csv', index_col=0, chunksize=chunksize, dtype=dtypes.get(name))
+            for name in MERGED_FILES
+        ]
+        for parts in zip_longest(*readers):
+            if any(part is None for part in parts) or not all(part.index.equals(parts[0].index) for part in parts):
+                raise ValueError(f"Streaming mode needs {', '.join(MERGED_FILES)} with the same rows in the same order")
+            yield list(parts)
+    
+    def _iter_labeled_chunks(self, chunksize, dtypes, household_size_median):
+        """Yield cleaned, labeled and engineered chunks with the global dtypes and Household_Size median."""
+        for parts in self._iter_aligned_chunks(chunksize, dtypes):
+            df, removed = clean_frame(pd.concat(parts, axis=1), household_size_median)
+            if len(df):
+                yield engineer_frame(label_frame(df)), removed
+    
+    def process_streaming(self, chunksize=50_000, output_path=PARQUET_PATH, median_sample_size=100_000):
+        """
+        Run the whole pipeline in row-aligned chunks so peak memory follows the
+        chunk size, not the file size. Two statistics passes come first:
+        1. Column dtypes across all chunks and the Household_Size median
+        2. Medians of every numeric column after feature engineering
+        The third pass cleans, labels, engineers, fills and appends each chunk
+        to the Parquet output. Medians are exact up to median_sample_size rows
+        and estimated from a uniform sample beyond that.
+        """
+        print(f"\n🌊 Streaming Preprocessing ({chunksize:,} rows per chunk)...")
+        
+        # Pass 1: raw column dtypes and household size median
+        print("\n   Pass 1/3: scanning column types and household size")
+        dtypes = {name: {} for name in MERGED_FILES}
+        household_sizes = ColumnReservoir(median_sample_size)
+        rows_read = 0
+        for parts in self._iter_aligned_chunks(chunksize):
+            rows_read += len(parts[0])
+            for name, part in zip(MERGED_FILES, parts):
+                for col, dtype in part.dtypes.items():
+                    dtypes[name][col] = unify_dtype(dtypes[name].get(col), dtype)
+            
+            df = pd.concat(parts, axis=1).rename(columns=COLUMN_MAPPING)
+            if 'Household_Size' in df.columns:
+                household_sizes.add(df.loc[df['Net_Income'] > 0, ['Household_Size']])
+        household_size_median = household_sizes.medians().get('Household_Size')
+        print(f"   Household size median: {household_size_median}")
+        
+        # Pass 2: medians of the engineered numeric columns, for the final NaN fill
+        print("\n   Pass 2/3: sampling engineered features for median imputation")
+        feature_sample = ColumnReservoir(median_sample_size)
+        for df, _ in self._iter_labeled_chunks(chunksize, dtypes, household_size_median):
+            df = df.replace([np.inf, -np.inf], np.nan)
+            feature_sample.add(df.select_dtypes(include=[np.number]))
+        medians = feature_sample.medians()
+        print(f"   Sampled {min(feature_sample.seen, median_sample_size):,} of {feature_sample.seen:,} rows")
+        
+        # Nothing to label, validate or aggregate: stop before writing anything
+        if feature_sample.seen == 0:
+            raise ValueError(f"No rows left after removing zero/missing income ({rows_read:,} rows read); "
+                             f"no processed dataset written")
+        
+        # Pass 3: transform and append
+        print("\n   Pass 3/3: transforming and writing chunks")
+        writer = ProcessedDatasetWriter(output_path)
+        validation = StreamingValidation()
+        eda = EDAAccumulator()
+        removed_total = 0
+        n_columns = 0
+        try:
+            for df, removed in self._iter_labeled_chunks(chunksize, dtypes, household_size_median):
+                removed_total += removed
+                validation.add(df)
+                
+                df = finalize_frame(df, medians)
+                writer.write(df)
+                eda.add(df)
+                n_columns = len(df.columns)
+                print(f"   Rows written: {writer.rows_written:,}")
+        finally:
+            writer.close()
+        
+        n_rows = writer.rows_written
+        print(f"   Removed {removed_total} rows with zero/missing income")
+        print(f" Processed dataset saved to: {output_path}")
+        
+        distribution = validation.contingency_table.sum(axis=0)
+        print(f"\nFinancial Distress Distribution:")
+        for level in ['High', 'Medium', 'Low']:
+            print(f"   {level} Risk: {distribution.get(level, 0) / n_rows * 100:.1f}%")
+        
+        print("\nRunning Statistical Validation...")
+        if len(validation.regions) > 1:
+            print("\n ANOVA Test: Region vs Expenditure/Income Ratio")
+            try:
+                report_anova(*validation.anova())
+            except:
+                print(" Could not perform ANOVA test")
+        
+        print("\n Chi-Square Test: Household Size vs Financial Distress")
+        try:
+            report_chi_square(validation.contingency_table)
+        except:
+            print(" Could not perform Chi-Square test")
+        
+        # Precompute the aggregates the API serves from /analyze_eda
+        aggregates = eda.result(medians['Net_Income'])
+        store = EDAAggregateStore(output_path)
+        store.save(aggregates)
+        print(f"\n EDA aggregates saved to: {store.store_path}")
+        
+        return {
+            'samples': n_rows,
+            'features': n_columns,
+            'avg_income': aggregates['summary_stats']['avg_income'],
+            'avg_expenditure': aggregates['summary_stats']['avg_expenditure'],
+            'avg_savings': aggregates['summary_stats']['avg_savings']
+        }
 
-def main():
+def main(chunksize=None):
     """Main preprocessing pipeline for real housing data."""
     print("="*70)
     print(" HOUSING DATASET - DATA PREPROCESSING PIPELINE")
@@ -270,25 +498,40 @@ def main():
     # Initialize processor
     processor = HousingDataProcessor()
     
-    # Execute pipeline
-    processor.load_and_merge_datasets()
-    processor.clean_and_prepare_data()
-    processor.create_financial_distress_label()
-    processor.engineer_features()
-    processor.statistical_validation()
-    df_processed = processor.prepare_final_dataset()
+    if chunksize:
+        # Streaming mode for survey extracts larger than memory
+        summary = processor.process_streaming(chunksize)
+    else:
+        # Execute pipeline
+        processor.load_and_merge_datasets()
+        processor.clean_and_prepare_data()
+        processor.create_financial_distress_label()
+        processor.engineer_features()
+        processor.statistical_validation()
+        df_processed = processor.prepare_final_dataset()
+        summary = {
+            'samples': len(df_processed),
+            'features': len(df_processed.columns),
+            'avg_income': df_processed['Net_Income'].mean(),
+            'avg_expenditure': df_processed['Total_Expenditure'].mean(),
+            'avg_savings': df_processed['Savings'].mean()
+        }
     
     print("\n" + "="*70)
     print(" DATA PREPROCESSING COMPLETE!")
     print("="*70)
     print(f"\n Final Dataset Summary:")
-    print(f"   Samples: {len(df_processed):,}")
-    print(f"   Features: {len(df_processed.columns)}")
-    print(f"   Avg Income: ${df_processed['Net_Income'].mean():,.0f}")
-    print(f"   Avg Expenditure: ${df_processed['Total_Expenditure'].mean():,.0f}")
-    print(f"   Avg Savings: ${df_processed['Savings'].mean():,.0f}")
+    print(f"   Samples: {summary['samples']:,}")
+    print(f"   Features: {summary['features']}")
+    print(f"   Avg Income: ${summary['avg_income']:,.0f}")
+    print(f"   Avg Expenditure: ${summary['avg_expenditure']:,.0f}")
+    print(f"   Avg Savings: ${summary['avg_savings']:,.0f}")
     
-    return df_processed
+    return summary if chunksize else df_processed
 
 if __name__ == '__main__':
-    df_final = main()
+    parser = argparse.ArgumentParser(description='Preprocess the housing survey data')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Stream the input in chunks of this many rows (for files larger than memory)')
+    args = parser.parse_args()
+    df_final = main(chunksize=args.chunksize)
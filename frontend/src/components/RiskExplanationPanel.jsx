@@ -1,6 +1,9 @@
 import { Info, BarChart3, ChevronRight } from 'lucide-react'
 
-const RiskExplanationPanel = ({ riskFactors }) => {
+const RiskExplanationPanel = ({ riskFactors, explanation }) => {
+    const topFeatures = explanation?.top_features || []
+    const maxImpact = Math.max(...topFeatures.map(f => Math.abs(f.shap_value)), 1e-9)
+
     return (
         <div className="bg-white/5 border border-white/10 rounded-lg p-6 animate-fadeInUp delay-100">
             <div className="flex items-center mb-6">
@@ -50,6 +53,33 @@ const RiskExplanationPanel = ({ riskFactors }) => {
                 )}
             </div>
 
+            {/* Model drivers: SHAP contributions for the predicted risk level */}
+            {topFeatures.length > 0 && (
+                <div className="mt-6 pt-4 border-t border-white/5">
+                    <h4 className="text-sm font-bold font-mono tracking-wide text-gray-300 mb-4">
+                        MODEL DRIVERS ({explanation.predicted_class.toUpperCase()} RISK)
+                    </h4>
+                    <div className="space-y-2">
+                        {topFeatures.map((feature) => (
+                            <div key={feature.feature} className="font-mono text-xs">
+                                <div className="flex justify-between text-gray-400 mb-1">
+                                    <span>{feature.feature.replace(/_/g, ' ')}</span>
+                                    <span className={feature.shap_value >= 0 ? 'text-red-400' : 'text-emerald-400'}>
+                                        {feature.shap_value >= 0 ? '+' : ''}{feature.shap_value.toFixed(3)}
+                                    </span>
+                                </div>
+                                <div className="w-full bg-gray-800 h-1 rounded-full overflow-hidden">
+                                    <div
+                                        className={feature.shap_value >= 0 ? 'bg-red-400 h-full' : 'bg-emerald-400 h-full'}
+                                        style={{ width: `${(Math.abs(feature.shap_value) / maxImpact) * 100}%` }}
+                                    ></div>
+                                </div>
+                            </div>
+                        ))}
+                    </div>
+                </div>
+            )}
+
             <div className="mt-6 pt-4 border-t border-white/5 text-xs font-mono text-gray-600 text-center uppercase tracking-widest">
                 AI-Driven Risk Factor Analysis
             </div>
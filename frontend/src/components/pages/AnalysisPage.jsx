@@ -25,7 +25,7 @@ const AnalysisPage = ({ data, inputData, onNext }) => {
 
             {/* Risk Explanation Panel */}
             <div className="mb-8">
-                <RiskExplanationPanel riskFactors={data.risk_factors} />
+                <RiskExplanationPanel riskFactors={data.risk_factors} explanation={data.explanation} />
             </div>
 
             {/* Insights Summary Box */}
@@ -0,0 +1,77 @@
+"""
+Benchmarks: Latency comparisons for the serving hot paths
+Run from ml_models/ after training: python benchmarks.py
+"""
+
+import time
+
+import numpy as np
+
+from ml_engine import FinancialDistressPredictor
+from processed_dataset import load_processed_dataset
+
+def _time_call(fn, repeats):
+    """Return (mean, p95) wall time in milliseconds over `repeats` calls after one warm-up."""
+    fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.mean(timings)), float(np.percentile(timings, 95))
+
+def benchmark_shap_paths(predictor, X, repeats=50):
+    """
+    Compare the two ways of explaining one prediction:
+    - tree_explainer: shap.TreeExplainer.shap_values + a second model.predict to pick the class
+    - catboost_native: get_feature_importance(type='ShapValues'), reusing the prediction
+    The native path gets the feature-ordered array the API builds; the
+    TreeExplainer path gets the DataFrame it was always served with.
+    Also times the native path on the whole batch X.
+    """
+    row = X.iloc[0:1]
+    row_array = row.to_numpy(dtype=object)
+    X_array = X.to_numpy(dtype=object)
+    predicted_class = predictor.predict(row_array)['prediction']
+
+    def tree_explainer_path():
+        predictor._tree_explainer_shap_values(row)
+        predictor.model.predict(row)
+
+    def native_path():
+        predictor.get_shap_values(row_array, predicted_class)
+
+    def native_batch_path():
+        predictor.get_shap_values(X_array)
+
+    results = {}
+    for name, fn in [('tree_explainer', tree_explainer_path),
+                     ('catboost_native', native_path),
+                     (f'catboost_native_batch_{len(X)}', native_batch_path)]:
+        mean_ms, p95_ms = _time_call(fn, repeats)
+        results[name] = {'mean_ms': round(mean_ms, 3), 'p95_ms': round(p95_ms, 3)}
+
+    results['speedup'] = round(results['tree_explainer']['mean_ms'] / results['catboost_native']['mean_ms'], 2)
+    return results
+
+def main():
+    """Run the serving benchmarks against the trained model and processed data."""
+    print("="*70)
+    print("⏱️  FINANCIAL DISTRESS PREDICTOR - SERVING BENCHMARKS")
+    print("="*70)
+
+    predictor = FinancialDistressPredictor()
+    predictor.load_model()
+
+    df = load_processed_dataset(columns=predictor.feature_columns, nrows=1000)
+    X = predictor._align_features(df)
+    print(f"\n   Benchmark rows: {len(X)}")
+
+    print("\n🔍 SHAP explanation paths:")
+    for name, stats in benchmark_shap_paths(predictor, X).items():
+        print(f"   - {name}: {stats}")
+
+    return predictor
+
+if __name__ == '__main__':
+    main()
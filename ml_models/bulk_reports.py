@@ -0,0 +1,179 @@
+"""
+Bulk Reports: PDF reports for a whole portfolio in one run
+Takes batch-scored report records (the inputs of one report per household,
+see report_record), renders them in chunks across worker processes, each
+reusing one FinancialReportGenerator, and writes a single zip archive or a
+multipart/mixed stream of PDFs.
+
+    python bulk_reports.py scored.jsonl --output reports.zip --workers 4
+
+scored.jsonl holds one report record per line.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+# archive format -> media type
+ARCHIVE_FORMATS = {
+    'zip': 'application/zip',
+    'multipart': 'multipart/mixed'
+}
+
+def report_record(user_id, household, prediction_response):
+    """Report inputs for one household from its /predict or /predict_batch result."""
+    financial_metrics = prediction_response['financial_metrics']
+
+    user_data = dict(household)
+    user_data['Total_Expenditure'] = financial_metrics['total_expenditure']
+    user_data['Savings'] = financial_metrics['savings']
+
+    return {
+        'user_id': user_id,
+        'user_data': user_data,
+        'prediction_result': {
+            'prediction': prediction_response['prediction'],
+            'confidence': prediction_response['confidence'],
+            'probabilities': prediction_response['probabilities']
+        },
+        'recommendations': prediction_response['recommendations'],
+        'financial_metrics': financial_metrics,
+        'shap_plot_base64': prediction_response.get('shap_plot')
+    }
+
+def report_filename(user_id):
+    """Download name of a user's report."""
+    return f'financial_report_{user_id}.pdf'
+
+def render_chunk(records):
+    """Render report records in a worker process; returns (filename, PDF bytes) pairs."""
+    # Imported here so only the rendering processes load reportlab
+    from report_generator import render_report_in_worker
+
+    return [(report_filename(record['user_id']), render_report_in_worker(**record)) for record in records]
+
+def chunked(records, chunk_size):
+    """Split records into lists of at most chunk_size."""
+    return [records[i:i + chunk_size] for i in range(0, len(records), chunk_size)]
+
+def chunk_size_for(n_records, workers, chunks_per_worker=4):
+    """Chunk size that gives each worker a few chunks (fewer round trips, still balanced)."""
+    return max(1, math.ceil(n_records / (workers * chunks_per_worker)))
+
+def write_archive(named_pdfs, output, archive_format='zip', boundary=None):
+    """
+    Write (filename, PDF bytes) pairs to a binary file object as it receives them.
+
+    Args:
+        named_pdfs: iterable of (filename, PDF bytes); repeated names get a numeric suffix
+        output: writable binary file object
+        archive_format: 'zip' or 'multipart'
+        boundary: multipart boundary (generated if None)
+
+    Returns:
+        media type of what was written (with the boundary for multipart)
+    """
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown archive format '{archive_format}' (expected one of {list(ARCHIVE_FORMATS)})")
+
+    def unique_names():
+        seen = {}
+        for filename, pdf in named_pdfs:
+            count = seen.get(filename, 0)
+            seen[filename] = count + 1
+            if count:
+                stem, ext = os.path.splitext(filename)
+                filename = f'{stem}_{count + 1}{ext}'
+            yield filename, pdf
+
+    if archive_format == 'zip':
+        # PDF streams are already compressed, so entries are stored as-is
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for filename, pdf in unique_names():
+                archive.writestr(filename, pdf)
+        return ARCHIVE_FORMATS['zip']
+
+    boundary = boundary or uuid.uuid4().hex
+    for filename, pdf in unique_names():
+        output.write(
+            f'--{boundary}\r\n'
+            f'Content-Type: application/pdf\r\n'
+            f'Content-Disposition: attachment; filename="{filename}"\r\n'
+            f'Content-Length: {len(pdf)}\r\n\r\n'.encode()
+        )
+        output.write(pdf)
+        output.write(b'\r\n')
+    output.write(f'--{boundary}--\r\n'.encode())
+    return f"{ARCHIVE_FORMATS['multipart']}; boundary={boundary}"
+
+def throughput(n_reports, n_bytes, seconds, workers):
+    """Throughput figures for a bulk run."""
+    return {
+        'reports': n_reports,
+        'workers': workers,
+        'seconds': round(seconds, 3),
+        'reports_per_second': round(n_reports / seconds, 2) if seconds > 0 else None,
+        'bytes': n_bytes
+    }
+
+def render_bulk(records, output, archive_format='zip', workers=None, chunk_size=None):
+    """
+    Render every record across worker processes into one archive.
+
+    Args:
+        records: list of report records
+        output: writable binary file object
+        archive_format: 'zip' or 'multipart'
+        workers: number of rendering processes (default: CPU count)
+        chunk_size: records per task (default: a few chunks per worker)
+
+    Returns:
+        throughput figures (reports, seconds, reports_per_second, ...)
+    """
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or chunk_size_for(len(records), workers)
+    start = time.perf_counter()
+    n_bytes = 0
+
+    # spawn: same start method as the API's report workers
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        def rendered():
+            nonlocal n_bytes
+            # map yields chunks in order as they finish, so the archive is written while rendering continues
+            for chunk in pool.map(render_chunk, chunked(records, chunk_size)):
+                for filename, pdf in chunk:
+                    n_bytes += len(pdf)
+                    yield filename, pdf
+
+        write_archive(rendered(), output, archive_format)
+
+    return throughput(len(records), n_bytes, time.perf_counter() - start, workers)
+
+def main():
+    """Render a JSON Lines file of report records into an archive."""
+    parser = argparse.ArgumentParser(description='Render PDF reports for a portfolio of scored households')
+    parser.add_argument('input', help='JSON Lines file, one report record per line')
+    parser.add_argument('--output', default='reports.zip', help='archive to write')
+    parser.add_argument('--format', choices=list(ARCHIVE_FORMATS), default='zip', dest='archive_format')
+    parser.add_argument('--workers', type=int, default=None, help='rendering processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=None, help='records per worker task')
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    print(f"📄 Rendering {len(records)} reports...")
+
+    with open(args.output, 'wb') as output:
+        stats = render_bulk(records, output, args.archive_format, args.workers, args.chunk_size)
+
+    print(f"✅ {stats['reports']} reports in {stats['seconds']:.1f}s "
+          f"({stats['reports_per_second']} reports/s, {stats['workers']} workers) -> {args.output}")
+
+if __name__ == '__main__':
+    main()
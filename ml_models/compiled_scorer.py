@@ -0,0 +1,455 @@
+"""
+Compiled Scorer: CatBoost oblivious trees as NumPy arrays
+export_compiled_model() flattens a trained CatBoostClassifier (float borders,
+one-hot values, CTR hash tables, tree splits and leaf values) into one .npz.
+CompiledScorer evaluates it vectorized over rows and trees with NumPy alone,
+so the API can score households without importing catboost; CompiledPredictor
+loads the CatBoost model (and shap, matplotlib) only when an explanation is asked for.
+"""
+
+import hashlib
+import json
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from feature_engineering import FeatureRowTemplate
+
+# variant -> (model file, metadata file); 'fast' is the distilled serving model
+MODEL_VARIANTS = {
+    'full': ('catboost_model.cbm', 'model_metadata.json'),
+    'fast': ('catboost_model_fast.cbm', 'model_metadata_fast.json')
+}
+
+# variant -> compiled model file (see export_compiled_model)
+COMPILED_MODEL_FILES = {
+    'full': 'catboost_model_compiled.npz',
+    'fast': 'catboost_model_fast_compiled.npz'
+}
+
+RISK_LEVELS = ['Low', 'Medium', 'High']
+
+def model_fingerprint(model_dir, variant='full'):
+    """
+    Version of a model variant: a hash of its CatBoost file (of the compiled
+    export when only that is present), the same for both predictor types.
+    """
+    model_dir = Path(model_dir)
+    path = model_dir / MODEL_VARIANTS[variant][0]
+    if not path.exists():
+        path = model_dir / COMPILED_MODEL_FILES[variant]
+
+    digest = hashlib.blake2b(digest_size=8)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return f'{variant}-{digest.hexdigest()}'
+
+# Hash used for categories not seen at export time. CatBoost hashes such a
+# value to something no one-hot split or CTR table contains, and so does this
+UNKNOWN_CATEGORY_HASH = 0x7fffffff
+
+# CatBoost's CTR projection hash: CalcHash(a, b) = MULT * (a + MULT * b) mod 2^64
+CTR_HASH_MULT = np.uint64(0x4906ba494954cb65)
+EMPTY_CTR_SLOT = 0xffffffffffffffff
+
+# ctr_type -> how the CTR value is read from a table row of per-class counts
+CTR_KINDS = {'Borders': 0, 'Buckets': 1, 'Counter': 2, 'FeatureFreq': 2}
+
+# combination element of a CTR projection -> code
+ELEMENT_KINDS = {'cat_feature_value': 0, 'cat_feature_exact_value': 1, 'float_feature': 2}
+
+def format_predictions(probabilities):
+    """One result dict per row of class probabilities, as the API returns them."""
+    predictions = probabilities.argmax(axis=1)
+    return [
+        {
+            'prediction': RISK_LEVELS[prediction],
+            'confidence': float(row[prediction]),
+            'probabilities': {
+                'Low': float(row[0]),
+                'Medium': float(row[1]),
+                'High': float(row[2])
+            }
+        }
+        for prediction, row in zip(predictions, probabilities)
+    ]
+
+def category_hashes(values):
+    """CatBoost's hash of each category string (low 32 bits of CityHash64, signed)."""
+    from catboost import Pool
+
+    values = list(values)
+    # Group ids go through the same CityHash64 CatBoost applies to category strings
+    group_hashes = np.asarray(
+        Pool(np.zeros((len(values), 1)), group_id=values).get_group_id_hash(), dtype=np.uint64
+    )
+    return (group_hashes & np.uint64(0xffffffff)).astype(np.uint32).view(np.int32).astype(np.int64)
+
+def export_compiled_model(model, X, path, extra_categories=(), check_rows=1000):
+    """
+    Compile a trained CatBoostClassifier into NumPy arrays and save them as .npz.
+
+    Args:
+        model: Trained CatBoostClassifier
+        X: DataFrame with the model's feature columns (the training data); its
+            category values become the hash table and its first check_rows rows
+            verify the export
+        path: Output .npz path
+        extra_categories: Category strings to hash as well (e.g. serving defaults)
+
+    Returns:
+        The CompiledScorer that was saved
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = Path(tmp_dir) / 'model.json'
+        model.save_model(str(json_path), format='json')
+        with open(json_path, 'r') as f:
+            spec = json.load(f)
+
+    info = spec['features_info']
+    float_info = info.get('float_features', [])
+    cat_info = info.get('categorical_features', [])
+    ctr_info = info.get('ctrs', [])
+    trees = spec['oblivious_trees']
+
+    feature_columns = list(X.columns)
+    if list(model.feature_names_) != feature_columns:
+        raise ValueError("X columns must be the model's features, in training order")
+    categorical_features = [feature_columns[c['flat_feature_index']] for c in cat_info]
+
+    # Category string -> CatBoost hash, for every value in the data. Values missing
+    # here score as unseen categories, so X must cover the training categories
+    vocabulary = {str(value) for col in categorical_features for value in X[col].dropna().unique()}
+    vocabulary = sorted(vocabulary | {str(value) for value in extra_categories})
+
+    arrays = {
+        'float_columns': np.array([f['flat_feature_index'] for f in float_info], dtype=np.int32),
+        'float_nan_as_true': np.array([f.get('nan_value_treatment') == 'AsTrue' for f in float_info], dtype=bool),
+        'cat_columns': np.array([c['flat_feature_index'] for c in cat_info], dtype=np.int32),
+        'category_strings': np.array(vocabulary, dtype=str),
+        'category_hashes': category_hashes(vocabulary) if vocabulary else np.zeros(0, dtype=np.int64)
+    }
+
+    # CTR tables: one per projection, shared by the CTRs computed from it
+    table_ids = {}
+    table_elements = []
+    for ctr in ctr_info:
+        if ctr['ctr_type'] not in CTR_KINDS:
+            raise ValueError(f"Cannot compile CTR type {ctr['ctr_type']}")
+        if ctr['identifier'] in table_ids:
+            continue
+        table = table_ids[ctr['identifier']] = len(table_ids)
+
+        ctr_data = spec['ctr_data'][ctr['identifier']]
+        stride = ctr_data['hash_stride']
+        hash_map = np.array([int(v) for v in ctr_data['hash_map']], dtype=np.uint64).reshape(-1, stride)
+        hash_map = hash_map[hash_map[:, 0] != np.uint64(EMPTY_CTR_SLOT)]
+        hash_map = hash_map[np.argsort(hash_map[:, 0])]
+        arrays[f'ctr_table_{table}_keys'] = hash_map[:, 0]
+        arrays[f'ctr_table_{table}_counts'] = hash_map[:, 1:].astype(np.float32)
+        arrays[f'ctr_table_{table}_denominator'] = np.float32(ctr_data.get('counter_denominator', 0))
+
+        # Hashed in the listed order: categories, then float and one-hot bits
+        table_elements.append([
+            (
+                ELEMENT_KINDS[e['combination_element']],
+                e['float_feature_index'] if 'float_feature_index' in e else e['cat_feature_index'],
+                e.get('border', 0.0),
+                e.get('value', 0)
+            )
+            for e in ctr['elements']
+        ])
+
+    elements = [e for table in table_elements for e in table]
+    arrays['table_element_offsets'] = np.cumsum([0] + [len(t) for t in table_elements]).astype(np.int32)
+    arrays['element_kind'] = np.array([e[0] for e in elements], dtype=np.int8)
+    arrays['element_feature'] = np.array([e[1] for e in elements], dtype=np.int32)
+    arrays['element_border'] = np.array([e[2] for e in elements], dtype=np.float32)
+    arrays['element_value'] = np.array([e[3] for e in elements], dtype=np.int64)
+
+    arrays['ctr_table'] = np.array([table_ids[c['identifier']] for c in ctr_info], dtype=np.int32)
+    arrays['ctr_kind'] = np.array([CTR_KINDS[c['ctr_type']] for c in ctr_info], dtype=np.int8)
+    arrays['ctr_target_border'] = np.array([c.get('target_border_idx', 0) for c in ctr_info], dtype=np.int32)
+    for key, field in [('ctr_prior_num', 'prior_numerator'), ('ctr_prior_denom', 'prior_denomerator'),
+                       ('ctr_shift', 'shift'), ('ctr_scale', 'scale')]:
+        arrays[key] = np.array([c[field] for c in ctr_info], dtype=np.float32)
+
+    # Binary features are numbered float borders, then one-hot values, then CTR borders
+    splits = {s['split_index']: s for tree in trees for s in tree['splits']}
+    n_float_borders = sum(len(f['borders']) for f in float_info)
+    n_one_hot = len({(s['cat_feature_index'], s['value']) for s in splits.values()
+                     if s['split_type'] == 'OneHotFeature'})
+    ctr_borders = [(i, border) for i, ctr in enumerate(ctr_info) for border in ctr['borders']]
+
+    float_splits, one_hot_splits, ctr_splits = [], [], []
+    for split_index in sorted(splits):
+        split = splits[split_index]
+        if split['split_type'] == 'FloatFeature':
+            float_splits.append((split_index, split['float_feature_index'], split['border']))
+        elif split['split_type'] == 'OneHotFeature':
+            one_hot_splits.append((split_index, split['cat_feature_index'], split['value']))
+        elif split['split_type'] == 'OnlineCtr':
+            ctr, border = ctr_borders[split_index - n_float_borders - n_one_hot]
+            if ctr_info[ctr].get('target_border_idx', 0) != split['ctr_target_border_idx'] \
+                    or not np.isclose(border, split['border']):
+                raise ValueError(f"Unexpected CTR split layout at split {split_index}")
+            ctr_splits.append((split_index, ctr, border))
+        else:
+            raise ValueError(f"Cannot compile split type {split['split_type']}")
+
+    arrays['float_split_feature'] = np.array([s[1] for s in float_splits], dtype=np.int32)
+    arrays['float_split_border'] = np.array([s[2] for s in float_splits], dtype=np.float32)
+    arrays['one_hot_split_feature'] = np.array([s[1] for s in one_hot_splits], dtype=np.int32)
+    arrays['one_hot_split_value'] = np.array([s[2] for s in one_hot_splits], dtype=np.int64)
+    arrays['ctr_split_ctr'] = np.array([s[1] for s in ctr_splits], dtype=np.int32)
+    arrays['ctr_split_border'] = np.array([s[2] for s in ctr_splits], dtype=np.float32)
+
+    # Trees: split condition columns per depth level (shallower trees padded with the
+    # always-false column) and leaf values per leaf index
+    condition = {s[0]: i for i, s in enumerate(float_splits + one_hot_splits + ctr_splits)}
+    pad = len(condition)
+    scale, bias = spec.get('scale_and_bias', [1.0, [0.0]])
+    dimension = len(bias)
+    max_depth = max(len(tree['splits']) for tree in trees)
+
+    tree_splits = np.full((len(trees), max_depth), pad, dtype=np.int32)
+    leaf_values = np.zeros((len(trees), 2 ** max_depth, dimension))
+    for t, tree in enumerate(trees):
+        depth = len(tree['splits'])
+        tree_splits[t, :depth] = [condition[s['split_index']] for s in tree['splits']]
+        leaf_values[t, :2 ** depth] = np.reshape(tree['leaf_values'], (2 ** depth, dimension))
+
+    arrays['tree_splits'] = tree_splits
+    arrays['leaf_values'] = leaf_values
+    arrays['scale'] = np.float64(scale)
+    arrays['bias'] = np.array(bias, dtype=np.float64)
+    arrays['meta'] = np.array(json.dumps({
+        'feature_columns': feature_columns,
+        'categorical_features': categorical_features
+    }))
+
+    scorer = CompiledScorer(arrays)
+
+    # The export must reproduce CatBoost's raw scores before it is written
+    sample = X.iloc[:check_rows]
+    expected = model.predict(sample, prediction_type='RawFormulaVal')
+    actual = scorer.raw_predict(sample.to_numpy(dtype=object))
+    max_diff = float(np.abs(np.reshape(expected, actual.shape) - actual).max())
+    if max_diff > 1e-6:
+        raise ValueError(f"Compiled model differs from CatBoost by {max_diff:.3g}")
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, **arrays)
+    print(f"   ✅ Compiled model saved to: {path} ({len(trees)} trees, max |Δraw| = {max_diff:.2g})")
+    return scorer
+
+class CompiledScorer:
+    """NumPy evaluator for a model compiled by export_compiled_model()."""
+
+    def __init__(self, arrays):
+        """Build the scorer from the exported arrays."""
+        self.arrays = arrays
+        for key in ['float_columns', 'float_nan_as_true', 'cat_columns',
+                    'float_split_feature', 'float_split_border', 'one_hot_split_feature',
+                    'one_hot_split_value', 'ctr_split_ctr', 'ctr_split_border',
+                    'ctr_table', 'ctr_kind', 'ctr_target_border', 'ctr_prior_num',
+                    'ctr_prior_denom', 'ctr_shift', 'ctr_scale', 'tree_splits', 'leaf_values', 'bias']:
+            setattr(self, key, np.asarray(arrays[key]))
+        self.scale = float(arrays['scale'])
+
+        meta = json.loads(str(arrays['meta']))
+        self.feature_columns = meta['feature_columns']
+        self.categorical_features = meta['categorical_features']
+
+        self.category_hash = dict(zip(arrays['category_strings'].tolist(), arrays['category_hashes'].tolist()))
+
+        offsets = arrays['table_element_offsets']
+        self.tables = [
+            {
+                'keys': arrays[f'ctr_table_{t}_keys'],
+                'counts': arrays[f'ctr_table_{t}_counts'],
+                'denominator': np.float32(arrays[f'ctr_table_{t}_denominator']),
+                'elements': list(zip(
+                    arrays['element_kind'][offsets[t]:offsets[t + 1]].tolist(),
+                    arrays['element_feature'][offsets[t]:offsets[t + 1]].tolist(),
+                    arrays['element_border'][offsets[t]:offsets[t + 1]],
+                    arrays['element_value'][offsets[t]:offsets[t + 1]].tolist()
+                ))
+            }
+            for t in range(len(offsets) - 1)
+        ]
+
+        self.tree_index = np.arange(len(self.tree_splits))[np.newaxis, :]
+        self.depth_weights = 1 << np.arange(self.tree_splits.shape[1])
+
+    @classmethod
+    def load(cls, path):
+        """Load a compiled model saved by export_compiled_model()."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def _ctr_values(self, floats, cat_hashes):
+        """(rows, ctrs) CTR feature values, computed as CatBoost does in float32."""
+        n_rows = len(floats)
+        values = np.empty((n_rows, len(self.ctr_table)), dtype=np.float32)
+
+        table_rows = []
+        for table in self.tables:
+            projection_hash = np.zeros(n_rows, dtype=np.uint64)
+            for kind, feature, border, value in table['elements']:
+                if kind == 0:
+                    element = cat_hashes[:, feature].astype(np.uint64)
+                elif kind == 1:
+                    element = (cat_hashes[:, feature] == value).astype(np.uint64)
+                else:
+                    element = (floats[:, feature] > border).astype(np.uint64)
+                projection_hash = CTR_HASH_MULT * (projection_hash + CTR_HASH_MULT * element)
+
+            keys = table['keys']
+            position = np.minimum(np.searchsorted(keys, projection_hash), max(len(keys) - 1, 0))
+            found = keys[position] == projection_hash if len(keys) else np.zeros(n_rows, dtype=bool)
+            counts = table['counts'][position] if len(keys) else np.zeros((n_rows, 1), dtype=np.float32)
+            table_rows.append((np.where(found[:, np.newaxis], counts, np.float32(0)), found))
+
+        for i, (table, kind, target) in enumerate(zip(self.ctr_table, self.ctr_kind, self.ctr_target_border)):
+            counts, found = table_rows[table]
+            if kind == 0:
+                good, total = counts[:, target + 1:].sum(axis=1), counts.sum(axis=1)
+            elif kind == 1:
+                good, total = counts[:, target], counts.sum(axis=1)
+            else:
+                good = counts[:, 0]
+                total = np.where(found, self.tables[table]['denominator'], np.float32(0))
+            ctr = (good + self.ctr_prior_num[i]) / (total + self.ctr_prior_denom[i])
+            values[:, i] = (ctr + self.ctr_shift[i]) * self.ctr_scale[i]
+
+        return values
+
+    def raw_predict(self, X):
+        """
+        Raw per-class scores for a feature-ordered (rows, features) array,
+        equal to CatBoost's RawFormulaVal.
+        """
+        X = np.asarray(X, dtype=object)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        n_rows = len(X)
+
+        floats = X[:, self.float_columns].astype(np.float32)
+        if self.float_nan_as_true.any():
+            nan_as_true = floats[:, self.float_nan_as_true]
+            floats[:, self.float_nan_as_true] = np.where(np.isnan(nan_as_true), np.inf, nan_as_true)
+
+        cat_values = X[:, self.cat_columns].ravel()
+        cat_hashes = np.fromiter(
+            (self.category_hash.get(str(value), UNKNOWN_CATEGORY_HASH) for value in cat_values),
+            dtype=np.int64, count=len(cat_values)
+        ).reshape(n_rows, len(self.cat_columns))
+
+        # One boolean column per split used by the trees, plus an always-false pad column
+        conditions = [
+            floats[:, self.float_split_feature] > self.float_split_border,
+            cat_hashes[:, self.one_hot_split_feature] == self.one_hot_split_value
+        ]
+        if len(self.ctr_split_ctr):
+            ctr_values = self._ctr_values(floats, cat_hashes)
+            conditions.append(ctr_values[:, self.ctr_split_ctr] > self.ctr_split_border)
+        conditions.append(np.zeros((n_rows, 1), dtype=bool))
+        conditions = np.concatenate(conditions, axis=1)
+
+        # Oblivious trees: the leaf index is the depth-ordered bits of the tree's splits
+        leaves = (conditions[:, self.tree_splits] * self.depth_weights).sum(axis=2)
+        raw = self.leaf_values[self.tree_index, leaves].sum(axis=1)
+        return self.scale * raw + self.bias
+
+    def predict_proba(self, X):
+        """Class probabilities (softmax of the raw scores), as CatBoost's predict_proba."""
+        raw = self.raw_predict(X)
+        exp = np.exp(raw - raw.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+class CompiledPredictor:
+    """
+    Serving predictor backed by a CompiledScorer.
+    Exposes the scoring interface of FinancialDistressPredictor; the SHAP
+    methods load the CatBoost model from the same directory on first use.
+    """
+
+    def __init__(self, model_dir='../ml_models'):
+        """Initialize an empty predictor; call load_model() to use it."""
+        self.model_dir = Path(model_dir)
+        self.variant = 'full'
+        self.model_version = None
+        self.model = None
+        self.feature_columns = None
+        self.categorical_features = None
+        self.row_template = None
+        self.explainer = None
+        self._explainer_lock = threading.Lock()
+
+    def load_model(self, variant='full'):
+        """Load the compiled export of a model variant ('full' or 'fast')."""
+        path = self.model_dir / COMPILED_MODEL_FILES[variant]
+        if not path.exists():
+            raise FileNotFoundError(f"Compiled model not found at {path}")
+
+        self.model = CompiledScorer.load(path)
+        self.variant = variant
+        self.model_version = model_fingerprint(self.model_dir, variant)
+        self.feature_columns = self.model.feature_columns
+        self.categorical_features = self.model.categorical_features
+        self.row_template = FeatureRowTemplate(self.feature_columns, self.categorical_features)
+        self.explainer = None
+        print(f"   ✅ Compiled model loaded from: {path}")
+
+    def predict(self, user_data):
+        """Make prediction with confidence scores."""
+        return self.predict_batch(user_data)[0]
+
+    def predict_batch(self, user_data):
+        """
+        Score many households in one vectorized pass.
+        user_data: feature-ordered array (see FeatureRowTemplate) or DataFrame.
+        """
+        if self.model is None:
+            raise ValueError("Model must be loaded before prediction")
+
+        if not isinstance(user_data, np.ndarray):
+            user_data = user_data[self.feature_columns].to_numpy(dtype=object)
+        return format_predictions(self.model.predict_proba(user_data))
+
+    def _explainer(self):
+        """The CatBoost-backed FinancialDistressPredictor, imported and loaded on first use."""
+        with self._explainer_lock:
+            if self.explainer is None:
+                from ml_engine import FinancialDistressPredictor
+
+                explainer = FinancialDistressPredictor(model_dir=self.model_dir)
+                explainer.load_model(variant=self.variant)
+                self.explainer = explainer
+        return self.explainer
+
+    def get_shap_values(self, user_data, predicted_class=None):
+        """SHAP values for the predicted class of every row (see FinancialDistressPredictor)."""
+        return self._explainer().get_shap_values(user_data, predicted_class)
+
+    def get_shap_summary(self, user_data, predicted_class=None, top_k=10):
+        """Structured SHAP explanation for every row (see FinancialDistressPredictor)."""
+        return self._explainer().get_shap_summary(user_data, predicted_class, top_k)
+
+    def get_shap_explanation(self, user_data, return_base64=True, predicted_class=None):
+        """SHAP waterfall plot for the first row (see FinancialDistressPredictor)."""
+        return self._explainer().get_shap_explanation(user_data, return_base64, predicted_class)
+
+def render_shap_waterfall(*args, **kwargs):
+    """ml_engine.render_shap_waterfall, importing shap and matplotlib only when called."""
+    from ml_engine import render_shap_waterfall as render
+    return render(*args, **kwargs)
+
+def render_shap_waterfalls(plots):
+    """Render several waterfalls in one worker call; plots is a list of render_shap_waterfall argument tuples."""
+    from ml_engine import render_shap_waterfall as render
+    return [render(*args) for args in plots]
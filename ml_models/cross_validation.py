@@ -0,0 +1,101 @@
+"""
+Cross Validation: Parallel stratified k-fold training on one quantized pool
+The dataset is quantized once (see pool_cache.py); each fold runs in its own
+process, loads that pool and slices its rows, and trains with a fixed thread
+budget so concurrent folds do not oversubscribe the cores. Float borders are
+therefore fitted on all rows, validation folds included: they use feature
+values only (no labels), and every fold shares them, so fold scores stay
+comparable. train() quantizes its training rows alone.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from catboost import CatBoostClassifier, Pool
+
+# result key -> CatBoost metric name reported on each fold's validation slice
+CV_METRICS = {
+    'accuracy': 'Accuracy',
+    'macro_f1': 'TotalF1:average=Macro',
+    'high_recall': 'Recall:class=2'
+}
+
+def available_cores():
+    """CPU cores this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def train_fold(pool_path, fold, train_idx, val_idx, params, thread_count):
+    """
+    Train one fold on its rows of the saved quantized pool.
+    Metrics are computed by CatBoost on the validation slice (quantized pools
+    with categorical features cannot be passed to predict).
+    """
+    start = time.perf_counter()
+    pool = Pool(f'quantized://{pool_path}')
+    train_pool = pool.slice(train_idx)
+    val_pool = pool.slice(val_idx)
+
+    model = CatBoostClassifier(
+        **params,
+        thread_count=thread_count,
+        custom_metric=['Accuracy', 'TotalF1:average=Macro', 'Recall'],
+        use_best_model=False
+    )
+    model.fit(train_pool, eval_set=val_pool)
+
+    # Last iteration = the metrics of the final fold model
+    evals = model.get_evals_result()['validation']
+    result = {'fold': fold}
+    for key, metric in CV_METRICS.items():
+        result[key] = float(evals[metric][-1])
+    result['seconds'] = round(time.perf_counter() - start, 2)
+    return result
+
+def parallel_cross_validate(pool_path, y, params, n_splits=5, n_jobs=None,
+                            thread_count=None, random_state=42):
+    """
+    Stratified k-fold cross-validation with folds trained in parallel.
+
+    Args:
+        pool_path: Saved quantized pool of the features and target
+        y: Encoded target (row order of the pool), used to stratify the folds
+        params: CatBoostClassifier parameters shared by every fold
+        n_jobs: Folds trained at once (default: one per core, at most n_splits)
+        thread_count: CatBoost threads per fold (default: cores // n_jobs)
+
+    Returns:
+        dict with per-fold metrics and their mean and std
+    """
+    # Imported here: ml_engine imports this module, and the API must not load scikit-learn
+    from sklearn.model_selection import StratifiedKFold
+
+    cores = available_cores()
+    n_jobs = n_jobs or min(n_splits, cores)
+    thread_count = thread_count or max(1, cores // n_jobs)
+
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    splits = list(skf.split(np.zeros(len(y)), y))
+
+    jobs = [(pool_path, fold, train_idx, val_idx, params, thread_count)
+            for fold, (train_idx, val_idx) in enumerate(splits, start=1)]
+
+    if n_jobs == 1:
+        folds = [train_fold(*job) for job in jobs]
+    else:
+        # spawn: CatBoost's thread pools do not survive fork
+        with ProcessPoolExecutor(max_workers=n_jobs,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            folds = list(executor.map(train_fold, *zip(*jobs)))
+
+    return {
+        'n_jobs': n_jobs,
+        'thread_count': thread_count,
+        'folds': folds,
+        'mean': {key: float(np.mean([f[key] for f in folds])) for key in CV_METRICS},
+        'std': {key: float(np.std([f[key] for f in folds])) for key in CV_METRICS}
+    }
@@ -0,0 +1,191 @@
+"""
+EDA Aggregate Store: Precomputed dataset statistics for the API
+Built once when preprocessing runs, persisted next to the processed dataset
+and rebuilt only when that dataset changes on disk.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from recommendation_engine import NATIONAL_AVERAGE_CATEGORIES
+from processed_dataset import load_processed_dataset, resolve_dataset_path
+
+EDA_CATEGORIES = ['Food', 'Housing', 'Transport', 'Health', 'Education',
+                  'Recreation', 'Clothing', 'Communication', 'Restaurants', 'Miscellaneous']
+
+EDA_COLUMNS = ['Net_Income', 'Total_Expenditure', 'Savings', 'Savings_Rate',
+               'Financial_Distress', 'Region'] + EDA_CATEGORIES
+
+SUMMARY_COLUMNS = ['Net_Income', 'Total_Expenditure', 'Savings', 'Savings_Rate']
+
+class EDAAccumulator:
+    """
+    Running sums and counts behind every EDA aggregate, so the aggregates can be
+    built chunk by chunk. The median income is passed in at the end.
+    """
+
+    def __init__(self):
+        """Initialize empty accumulators."""
+        self.n_rows = 0
+        self.sums = pd.Series(dtype=np.float64)
+        self.counts = pd.Series(dtype=np.float64)
+        self.share_sums = pd.Series(dtype=np.float64)
+        self.share_counts = pd.Series(dtype=np.float64)
+        self.risk_counts = {level: 0 for level in ['Low', 'Medium', 'High']}
+        self.regions = None
+
+    def add(self, df):
+        """Fold one chunk of the processed dataset into the totals."""
+        self.n_rows += len(df)
+
+        values = df[SUMMARY_COLUMNS + EDA_CATEGORIES]
+        self.sums = self.sums.add(values.sum(), fill_value=0)
+        self.counts = self.counts.add(values.count(), fill_value=0)
+
+        shares = df[NATIONAL_AVERAGE_CATEGORIES].div(df['Net_Income'], axis=0)
+        self.share_sums = self.share_sums.add(shares.sum(), fill_value=0)
+        self.share_counts = self.share_counts.add(shares.count(), fill_value=0)
+
+        for level, count in df['Financial_Distress'].value_counts().items():
+            if level in self.risk_counts:
+                self.risk_counts[level] += int(count)
+
+        # Single groupby instead of filtering the frame once per region;
+        # sort=False keeps regions in order of first appearance
+        regional = (
+            df.assign(_is_high=df['Financial_Distress'] == 'High')
+              .groupby('Region', sort=False, observed=True)
+              .agg(income_sum=('Net_Income', 'sum'), income_count=('Net_Income', 'count'),
+                   expenditure_sum=('Total_Expenditure', 'sum'), expenditure_count=('Total_Expenditure', 'count'),
+                   high_count=('_is_high', 'sum'), rows=('_is_high', 'size'))
+        )
+        regional.index = regional.index.astype(str)
+        if self.regions is None:
+            self.regions = regional
+        else:
+            order = self.regions.index.append(regional.index.difference(self.regions.index, sort=False))
+            self.regions = self.regions.add(regional, fill_value=0).reindex(order)
+
+    def result(self, median_income):
+        """Aggregates in the /analyze_eda layout, plus the national averages."""
+        means = self.sums / self.counts
+
+        summary_stats = {
+            'total_households': int(self.n_rows),
+            'avg_income': round(float(means['Net_Income']), 2),
+            'median_income': round(float(median_income), 2),
+            'avg_expenditure': round(float(means['Total_Expenditure']), 2),
+            'avg_savings': round(float(means['Savings']), 2),
+            'avg_savings_rate': round(float(means['Savings_Rate']) * 100, 2)
+        }
+
+        category_breakdown = [
+            {
+                'category': cat,
+                'average_amount': round(float(means[cat]), 2),
+                'percentage_of_income': round(float(means[cat] / means['Net_Income'] * 100), 2)
+            }
+            for cat in EDA_CATEGORIES
+        ]
+
+        regional_analysis = [
+            {
+                'region': region,
+                'avg_income': round(float(row.income_sum / row.income_count), 2),
+                'avg_expenditure': round(float(row.expenditure_sum / row.expenditure_count), 2),
+                'high_risk_pct': round(float(row.high_count / row.rows) * 100, 2)
+            }
+            for region, row in self.regions.iterrows()
+        ]
+
+        shares = self.share_sums / self.share_counts
+        national_averages = {
+            f'{cat}_Pct': round(float(shares[cat]) * 100, 2) for cat in NATIONAL_AVERAGE_CATEGORIES
+        }
+
+        return {
+            'summary_stats': summary_stats,
+            'category_breakdown': category_breakdown,
+            'risk_distribution': dict(self.risk_counts),
+            'regional_analysis': regional_analysis,
+            'national_averages': national_averages
+        }
+
+def compute_eda_aggregates(df):
+    """Summary stats, category breakdown, risk distribution, regional stats and national averages."""
+    accumulator = EDAAccumulator()
+    accumulator.add(df)
+    return accumulator.result(df['Net_Income'].median())
+
+class EDAAggregateStore:
+    """In-memory EDA aggregates backed by a small JSON file next to the dataset."""
+
+    def __init__(self, data_path=None, store_path=None):
+        """
+        Initialize the store for a processed dataset.
+        With no data_path it follows whichever processed file exists (Parquet first).
+        """
+        self.data_path = Path(data_path) if data_path else None
+        self.store_path = Path(store_path) if store_path else resolve_dataset_path(data_path).with_name('eda_aggregates.json')
+        self.aggregates = None
+        self._served_fingerprint = None
+        self._lock = threading.Lock()
+
+    def _fingerprint(self):
+        """Identify the current dataset file by name, size and modification time (None if missing)."""
+        path = resolve_dataset_path(self.data_path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return {'file': path.name, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def build(self, df=None):
+        """Compute aggregates (from df, or by reading the dataset) and persist them."""
+        if df is None:
+            df = load_processed_dataset(columns=EDA_COLUMNS, path=self.data_path)
+        return self.save(compute_eda_aggregates(df))
+
+    def save(self, aggregates):
+        """Persist aggregates computed elsewhere (e.g. by a streaming EDAAccumulator) for the current dataset."""
+        aggregates['source'] = self._fingerprint()
+
+        with open(self.store_path, 'w') as f:
+            json.dump(aggregates, f, indent=2)
+
+        self.aggregates = aggregates
+        self._served_fingerprint = aggregates['source']
+        return aggregates
+
+    def get(self):
+        """
+        Current aggregates. Reloads the persisted file or rebuilds when the
+        dataset changed; raises FileNotFoundError if neither exists.
+        """
+        fingerprint = self._fingerprint()
+        if self.aggregates is not None and self._served_fingerprint == fingerprint:
+            return self.aggregates
+
+        with self._lock:
+            if self.aggregates is not None and self._served_fingerprint == fingerprint:
+                return self.aggregates
+
+            if self.store_path.exists():
+                with open(self.store_path, 'r') as f:
+                    stored = json.load(f)
+                # Serve the stored aggregates if they match the dataset (or it is not deployed)
+                if fingerprint is None or stored.get('source') == fingerprint:
+                    self.aggregates = stored
+                    self._served_fingerprint = fingerprint
+                    return stored
+
+            if fingerprint is None:
+                raise FileNotFoundError(f"Processed data not found at {resolve_dataset_path(self.data_path)}")
+
+            print(f"   Rebuilding EDA aggregates from {resolve_dataset_path(self.data_path)}")
+            return self.build()
@@ -0,0 +1,302 @@
+"""
+Feature Engineering: Vectorized derived-feature kernel
+Shared by the preprocessing pipeline and the API so training and serving compute identical columns
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Column layout of the float matrix the kernel consumes
+INPUT_COLUMNS = ['Net_Income', 'Household_Size',
+                 'Food', 'Housing', 'Transport', 'Health', 'Education',
+                 'Recreation', 'Clothing', 'Communication', 'Restaurants', 'Miscellaneous']
+
+# Categories summed into Total_Expenditure by the preprocessing pipeline
+TRAINING_SPENDING_COLUMNS = ['Food', 'Housing', 'Transport', 'Health', 'Education',
+                             'Recreation', 'Clothing', 'Communication', 'Miscellaneous']
+
+# The API also counts Restaurants, which users enter as a separate category
+SERVING_SPENDING_COLUMNS = ['Food', 'Housing', 'Transport', 'Health', 'Education',
+                            'Recreation', 'Clothing', 'Communication', 'Restaurants', 'Miscellaneous']
+
+DERIVED_COLUMNS = [
+    'Total_Expenditure', 'Savings', 'Expenditure_to_Income_Ratio',
+    'Savings_Rate', 'Housing_to_Income_Ratio', 'Food_to_Total_Exp_Ratio', 'Transport_to_Income_Ratio',
+    'Essential_Spending', 'Essential_Spending_Share',
+    'Discretionary_Spending', 'Discretionary_Spending_Share',
+    'Per_Capita_Income', 'Per_Capita_Expenditure',
+    'Spending_Variance', 'Spending_Std', 'Spending_CV',
+    'Health_Spending_Ratio', 'Education_Spending_Ratio',
+    'Months_of_Savings',
+    'Is_Overspending', 'High_Housing_Burden', 'Low_Savings'
+]
+
+FLAG_COLUMNS = ['Is_Overspending', 'High_Housing_Burden', 'Low_Savings']
+
+# Inputs each derived column is computed from; SPENDING stands for every
+# column in the transformer's spending_columns (through Total_Expenditure)
+SPENDING = 'spending'
+DERIVED_INPUTS = {
+    'Total_Expenditure': {SPENDING},
+    'Savings': {'Net_Income', SPENDING},
+    'Expenditure_to_Income_Ratio': {'Net_Income', SPENDING},
+    'Savings_Rate': {'Net_Income', SPENDING},
+    'Housing_to_Income_Ratio': {'Housing', 'Net_Income'},
+    'Food_to_Total_Exp_Ratio': {'Food', SPENDING},
+    'Transport_to_Income_Ratio': {'Transport', 'Net_Income'},
+    'Essential_Spending': {'Food', 'Housing'},
+    'Essential_Spending_Share': {'Food', 'Housing', SPENDING},
+    'Discretionary_Spending': {'Recreation', 'Restaurants', 'Clothing'},
+    'Discretionary_Spending_Share': {'Recreation', 'Restaurants', 'Clothing', SPENDING},
+    'Per_Capita_Income': {'Net_Income', 'Household_Size'},
+    'Per_Capita_Expenditure': {'Household_Size', SPENDING},
+    'Spending_Variance': {SPENDING},
+    'Spending_Std': {SPENDING},
+    'Spending_CV': {SPENDING},
+    'Health_Spending_Ratio': {'Health', 'Net_Income'},
+    'Education_Spending_Ratio': {'Education', 'Net_Income'},
+    'Months_of_Savings': {'Net_Income', SPENDING},
+    'Is_Overspending': {'Net_Income', SPENDING},
+    'High_Housing_Burden': {'Housing', 'Net_Income'},
+    'Low_Savings': {'Net_Income', SPENDING}
+}
+
+# Model columns the API fills per request; every other column is a constant
+# (or a fixed share of one of these) at serving time
+API_VARIED_COLUMNS = INPUT_COLUMNS + ['Region', 'Household_Type', 'Employment_Status'] + DERIVED_COLUMNS
+
+class FeatureTransformer:
+    """
+    Compute the derived financial features for N households at once.
+    Works on a (N, len(INPUT_COLUMNS)) float array and returns (N, len(DERIVED_COLUMNS)).
+    """
+
+    def __init__(self, spending_columns=TRAINING_SPENDING_COLUMNS):
+        """Initialize with the spending categories that make up total expenditure."""
+        self.spending_columns = list(spending_columns)
+        self._spending_idx = [INPUT_COLUMNS.index(col) for col in self.spending_columns]
+        self._input_idx = {col: i for i, col in enumerate(INPUT_COLUMNS)}
+        self._output_idx = {col: i for i, col in enumerate(DERIVED_COLUMNS)}
+
+    def dependent_columns(self, changed_inputs):
+        """Derived columns whose value can change when any of `changed_inputs` changes."""
+        changed = set(changed_inputs)
+        if changed & set(self.spending_columns):
+            changed.add(SPENDING)
+        return [col for col in DERIVED_COLUMNS if DERIVED_INPUTS[col] & changed]
+
+    def transform(self, X):
+        """Derive features from an (N, len(INPUT_COLUMNS)) float array."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+
+        out = np.empty((X.shape[0], len(DERIVED_COLUMNS)), dtype=np.float64)
+
+        def col(name):
+            return X[:, self._input_idx[name]]
+
+        def put(name, values):
+            out[:, self._output_idx[name]] = values
+
+        income = col('Net_Income')
+        spending = X[:, self._spending_idx]
+
+        with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+
+            # Row reductions skip missing categories, like pandas sum/var(axis=1)
+            total_exp = np.nansum(spending, axis=1)
+            savings = income - total_exp
+            # Zero total spending divides by 1 instead (same as the training pipeline)
+            safe_total = np.where(total_exp == 0, 1.0, total_exp)
+
+            put('Total_Expenditure', total_exp)
+            put('Savings', savings)
+            put('Expenditure_to_Income_Ratio', total_exp / income)
+
+            # 1. RATIOS
+            savings_rate = savings / income
+            housing_ratio = col('Housing') / income
+            put('Savings_Rate', savings_rate)
+            put('Housing_to_Income_Ratio', housing_ratio)
+            put('Food_to_Total_Exp_Ratio', col('Food') / safe_total)
+            put('Transport_to_Income_Ratio', col('Transport') / income)
+
+            # 2. RISK METRICS
+            essential = col('Food') + col('Housing')
+            discretionary = col('Recreation') + col('Restaurants') + col('Clothing')
+            put('Essential_Spending', essential)
+            put('Essential_Spending_Share', essential / safe_total)
+            put('Discretionary_Spending', discretionary)
+            put('Discretionary_Spending_Share', discretionary / safe_total)
+
+            # Per capita metrics
+            put('Per_Capita_Income', income / col('Household_Size'))
+            put('Per_Capita_Expenditure', total_exp / col('Household_Size'))
+
+            # 3. VOLATILITY METRICS
+            variance = np.nanvar(spending, axis=1, ddof=1)
+            std = np.sqrt(variance)
+            put('Spending_Variance', variance)
+            put('Spending_Std', std)
+            put('Spending_CV', std / safe_total)
+
+            # 4. ADDITIONAL INSIGHTS
+            put('Health_Spending_Ratio', col('Health') / income)
+            put('Education_Spending_Ratio', col('Education') / income)
+
+            # Financial buffer
+            monthly_exp = total_exp / 12
+            months_of_savings = savings / np.where(monthly_exp == 0, 1.0, monthly_exp)
+            put('Months_of_Savings', np.where(np.isinf(months_of_savings), 0.0, months_of_savings))
+
+            # Binary flags
+            put('Is_Overspending', total_exp > income)
+            put('High_Housing_Burden', housing_ratio > 0.35)
+            put('Low_Savings', savings_rate < 0.10)
+
+        return out
+
+    def transform_frame(self, df):
+        """Derive features from a DataFrame holding INPUT_COLUMNS; returns a new DataFrame."""
+        derived = pd.DataFrame(
+            self.transform(df[INPUT_COLUMNS].to_numpy(dtype=np.float64)),
+            columns=DERIVED_COLUMNS,
+            index=df.index
+        )
+        derived[FLAG_COLUMNS] = derived[FLAG_COLUMNS].astype(int)
+        return derived
+
+training_features = FeatureTransformer(TRAINING_SPENDING_COLUMNS)
+serving_features = FeatureTransformer(SERVING_SPENDING_COLUMNS)
+
+# Survey columns the API does not collect, filled with typical household values
+SERVING_DEFAULTS = {
+    'Unnamed: 0': 0,
+    'Head_Sex': 'Male',
+    'Head_Age': 40,
+    'Household Head Marital Status': 'Married',
+    'Household Head Highest Grade Completed': 'High School Graduate',
+    'Household Head Occupation': 'Unknown',
+    'Household Head Class of Worker': 'Employed',
+    'Members with age less than 5 year old': 0,
+    'Members with age 5 - 17 years old': 0,
+    'Total number of family members employed': 1,
+    'Alcoholic Beverages Expenditure': 0,
+    'Tobacco Expenditure': 0,
+    'Main Source of Income': 'Wage/Salaries',
+    'Number of Airconditioner': 0,
+    'Electricity': 1,
+    'House Age': 15,
+    'Number of bedrooms': 2,
+    'Number of Personal Computer': 1,
+    'Total Income from Entrepreneurial Acitivites': 0,
+    'Number of Component/Stereo set': 0,
+    'Type of Roof': 'Strong material(galvanized,iron,al,tile,concrete,brick,stone,asbestos)',
+    'Number of Washing Machine': 1,
+    'Number of Motorized Banca': 0,
+    'Number of Cellular phone': 2,
+    'Number of Television': 1,
+    'Toilet Facilities': 'Water-sealed, sewer septic tank, used exclusively by household',
+    'Type of Walls': 'Strong',
+    'House Floor Area': 50,
+    'Agricultural Household indicator': 0,
+    'Type of Building/House': 'Single house',
+    'Number of Stove with Oven/Gas Range': 1,
+    'Number of Refrigerator/Freezer': 1,
+    'Number of Car, Jeep, Van': 0,
+    'Number of Landline/wireless telephones': 0,
+    'Number of Motorcycle/Tricycle': 0,
+    'Crop Farming and Gardening expenses': 0,
+    'Main Source of Water Supply': 'Own use, faucet, community water system',
+    'Tenure Status': 'Own or owner-like possession of house and lot',
+    'Number of CD/VCD/DVD': 0
+}
+
+# Survey columns estimated as a fixed share of a user-supplied category
+PROPORTIONAL_DEFAULTS = {
+    'Food': {
+        'Bread and Cereals Expenditure': 0.5,
+        'Total Rice Expenditure': 0.4,
+        'Meat Expenditure': 0.2,
+        'Total Fish and  marine products Expenditure': 0.15,
+        'Fruit Expenditure': 0.05,
+        'Vegetables Expenditure': 0.1
+    },
+    'Recreation': {
+        'Special_Occasions': 1.0
+    },
+    'Housing': {
+        'Imputed House Rental Value': 0.5
+    }
+}
+
+class FeatureRowTemplate:
+    """
+    Precompiled model row laid out in the model's feature_columns order.
+    Constants and categorical defaults are placed once; per request only the
+    user-supplied, derived and proportional slots are written.
+    """
+
+    def __init__(self, feature_columns, categorical_features,
+                 defaults=SERVING_DEFAULTS, proportional_defaults=PROPORTIONAL_DEFAULTS):
+        """Compile the template for a model's feature layout."""
+        self.feature_columns = list(feature_columns)
+        self.categorical_features = list(categorical_features)
+        self.column_index = {col: i for i, col in enumerate(self.feature_columns)}
+
+        # Columns nobody fills get the same fallback the predictor uses
+        self.row = np.array([
+            defaults.get(col, 'Unknown' if col in self.categorical_features else 0)
+            for col in self.feature_columns
+        ], dtype=object)
+
+        self.proportional = []
+        for source, targets in proportional_defaults.items():
+            targets = {col: share for col, share in targets.items() if col in self.column_index}
+            if targets:
+                self.proportional.append((
+                    source,
+                    np.array([self.column_index[col] for col in targets]),
+                    np.array(list(targets.values()), dtype=np.float64)
+                ))
+
+    def build(self, values):
+        """
+        Fill the template for N households.
+
+        Args:
+            values: dict of column name -> sequence of N values (user inputs and derived features)
+
+        Returns:
+            (N, len(feature_columns)) object array in model column order
+        """
+        n_rows = len(next(iter(values.values())))
+        return self.fill(np.tile(self.row, (n_rows, 1)), values)
+
+    def fill(self, X, values):
+        """
+        Overwrite columns of already-built rows in place; the proportional
+        columns of any source category in `values` are recomputed too.
+
+        Args:
+            X: (N, len(feature_columns)) object array from build()
+            values: dict of column name -> sequence of N values
+
+        Returns:
+            X
+        """
+        for col, column_values in values.items():
+            idx = self.column_index.get(col)
+            if idx is not None:
+                X[:, idx] = column_values
+
+        for source, target_idx, shares in self.proportional:
+            if source in values:
+                source_values = np.asarray(values[source], dtype=np.float64)
+                X[:, target_idx] = source_values[:, np.newaxis] * shares
+
+        return X
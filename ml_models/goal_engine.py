@@ -0,0 +1,93 @@
+"""
+Goal Engine: Vectorized goal-feasibility grid
+Evaluates the /analyze_goal formulas for households x goal amounts x durations
+in one pass over NumPy arrays (H households, G goal amounts, T durations).
+"""
+
+import numpy as np
+
+from feature_engineering import SERVING_SPENDING_COLUMNS
+
+# Indexed by the feasibility code in evaluate_goal_grid's output
+FEASIBILITY_LABELS = ['Achievable', 'Tight', 'Not Feasible']
+
+EMERGENCY_SHARE = 0.10      # of income kept back as an emergency buffer
+MAX_HOUSING_SHARE = 0.60    # income share housing plus savings may take
+MIN_DISPOSABLE_RATIO = 0.20
+
+MAX_GRID_CELLS = 250000
+
+def evaluate_goal_grid(columns, goal_amounts, durations):
+    """
+    Goal feasibility for every household x goal amount x duration.
+
+    Args:
+        columns: dict of Net_Income and the spending categories -> H values
+        goal_amounts: G goal amounts
+        durations: T durations in months
+
+    Returns:
+        dict of arrays:
+            raw_surplus, emergency_buffer, safe_surplus: (H,)
+            required_monthly: (G, T)
+            gap, distress_impact_pct: (H, G, T) floats
+            feasibility: (H, G, T) codes into FEASIBILITY_LABELS
+            healthy_months: (H, G) months to reach the goal at the safe surplus (inf without one)
+    """
+    I = np.asarray(columns['Net_Income'], dtype=np.float64)
+
+    # Summed one category at a time, in order, like the scalar sum() it replaces
+    E = np.zeros_like(I)
+    for col in SERVING_SPENDING_COLUMNS:
+        E = E + np.asarray(columns[col], dtype=np.float64)
+
+    # Housing is counted again on top of total spending as the debt-like fixed cost
+    D = np.asarray(columns['Housing'], dtype=np.float64)
+
+    G = np.asarray(goal_amounts, dtype=np.float64)
+    T = np.asarray(durations, dtype=np.float64)
+
+    S_raw = I - (E + D)
+    S_emergency = EMERGENCY_SHARE * I
+    S_safe = np.maximum(0, np.minimum(S_raw - S_emergency, (MAX_HOUSING_SHARE * I) - D))
+
+    S_required = G[:, np.newaxis] / T[np.newaxis, :]                 # (G, T)
+    S_safe_cell = S_safe[:, np.newaxis, np.newaxis]                    # (H, 1, 1)
+    S_raw_cell = S_raw[:, np.newaxis, np.newaxis]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        T_healthy = np.where(
+            S_safe[:, np.newaxis] > 0,
+            np.floor(G[np.newaxis, :] / S_safe[:, np.newaxis]),
+            np.inf
+        )
+
+        has_income = (I > 0)[:, np.newaxis, np.newaxis]
+        I_cell = I[:, np.newaxis, np.newaxis]
+        DIR_current = np.where(has_income, ((I - (E + D)) / I)[:, np.newaxis, np.newaxis], 0)
+        DIR_with_goal = np.where(
+            has_income, (I_cell - ((E + D)[:, np.newaxis, np.newaxis] + S_required)) / I_cell, 0
+        )
+
+    distress_impact = np.select(
+        [DIR_with_goal < MIN_DISPOSABLE_RATIO, DIR_with_goal < DIR_current],
+        [15.0, np.abs(DIR_current - DIR_with_goal) * 50],
+        default=0
+    )
+
+    feasibility = np.select(
+        [S_required <= S_safe_cell, (S_safe_cell < S_required) & (S_required <= S_raw_cell)],
+        [0, 1],
+        default=2
+    )
+
+    return {
+        'raw_surplus': S_raw,
+        'emergency_buffer': S_emergency,
+        'safe_surplus': S_safe,
+        'required_monthly': S_required,
+        'gap': S_required - S_safe_cell,
+        'distress_impact_pct': distress_impact,
+        'feasibility': feasibility,
+        'healthy_months': T_healthy
+    }
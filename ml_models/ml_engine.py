@@ -7,41 +7,56 @@ import pandas as pd
 import numpy as np
 import joblib
 import json
+import time
+import argparse
 from pathlib import Path
 
 
 from catboost import CatBoostClassifier, Pool
-from sklearn.model_selection import train_test_split, StratifiedKFold
-from sklearn.metrics import (classification_report, confusion_matrix, 
-                            accuracy_score, precision_recall_fscore_support,
-                            roc_auc_score)
-from sklearn.preprocessing import LabelEncoder
-
-
-import shap
-import matplotlib
-matplotlib.use('Agg')  # Non-interactive backend
-import matplotlib.pyplot as plt
+# scikit-learn (training), shap (shap_backend='shap') and matplotlib (waterfall
+# plots) are imported where they are used: scoring and native CatBoost SHAP,
+# which the API's explanations need, load none of them
 import base64
 from io import BytesIO
 
+from feature_engineering import FeatureRowTemplate, API_VARIED_COLUMNS, SERVING_DEFAULTS
+from processed_dataset import load_processed_dataset
+from cross_validation import parallel_cross_validate
+from pool_cache import QuantizedPoolCache
+from tuning import DEFAULT_TRAIN_PARAMS, tune_predictor, load_tuned_params
+from compiled_scorer import (MODEL_VARIANTS, COMPILED_MODEL_FILES, export_compiled_model, format_predictions,
+                             model_fingerprint)
+from model_registry import REGISTRY_DIR, ModelRegistry
+
+# A distilled model that agrees with the full model on fewer held-out serving
+# rows than this is not saved (run_pipeline(distill=True), --min-agreement)
+MIN_DISTILL_AGREEMENT = 0.95
+
 class FinancialDistressPredictor:
     """
     Production ML Engine for Financial Distress Prediction
     Uses CatBoost for classification and SHAP for explainability
     """
     
-    def __init__(self, model_dir='../ml_models'):
-        """Initialize the predictor."""
+    def __init__(self, model_dir='../ml_models', shap_backend='catboost'):
+        """
+        Initialize the predictor.
+        shap_backend: 'catboost' for native tree SHAP, 'shap' for shap.TreeExplainer
+        """
         self.model_dir = Path(model_dir)
         self.model_dir.mkdir(exist_ok=True, parents=True)
         
         self.model = None
         self.feature_columns = None
         self.categorical_features = None
-        self.label_encoder = LabelEncoder()
+        self.shap_backend = shap_backend
         self.explainer = None
         self.feature_importance = None
+        self.row_template = None
+        self.pool_cache = QuantizedPoolCache()
+        self.variant = 'full'
+        self.model_version = None
+        self.distillation_report = None
         
     def prepare_data(self, df, target_col='Financial_Distress_Encoded'):
         """Prepare data for training."""
@@ -56,7 +71,7 @@ class FinancialDistressPredictor:
         y = df[target_col].copy()
         
         # Identify categorical features
-        self.categorical_features = X.select_dtypes(include=['object']).columns.tolist()
+        self.categorical_features = X.select_dtypes(include=['object', 'category']).columns.tolist()
         print(f"   Categorical features: {self.categorical_features}")
         
         # Store feature columns
@@ -65,17 +80,26 @@ class FinancialDistressPredictor:
         print(f"✅ Data prepared: {X.shape[0]} samples, {X.shape[1]} features")
         return X, y
     
-    def train(self, X, y, optimize_for_recall=True):
+    def train(self, X, y, optimize_for_recall=True, params=None):
         """
         Train CatBoost model with cross-validation.
         Optimize for recall on High Distress class.
+        params: overrides for iterations, learning_rate, depth, l2_leaf_reg and
+        class_weights (e.g. from tune()); defaults are DEFAULT_TRAIN_PARAMS.
         """
+        import shap
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
+        
+        params = {**DEFAULT_TRAIN_PARAMS, **(params or {})}
         print("\n🤖 Training CatBoost Classifier...")
         
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
+        # Split data (by position; tuning.py holds out the same test rows)
+        train_idx, test_idx = train_test_split(
+            np.arange(len(X)), test_size=0.2, random_state=42, stratify=y
         )
+        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+        y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
         
         print(f"   Train set: {X_train.shape[0]} samples")
         print(f"   Test set: {X_test.shape[0]} samples")
@@ -85,19 +109,15 @@ class FinancialDistressPredictor:
         class_weights = {}
         if optimize_for_recall:
             # Give more weight to High Distress class (class 2)
-            class_weights = {
-                0: 1.0,  # Low
-                1: 1.5,  # Medium
-                2: 3.0   # High - we cannot miss these!
-            }
+            class_weights = params['class_weights']
             print(f"   Using class weights: {class_weights}")
         
         # Initialize CatBoost
         self.model = CatBoostClassifier(
-            iterations=500,
-            learning_rate=0.05,
-            depth=8,
-            l2_leaf_reg=3,
+            iterations=params['iterations'],
+            learning_rate=params['learning_rate'],
+            depth=params['depth'],
+            l2_leaf_reg=params['l2_leaf_reg'],
             class_weights=class_weights,
             cat_features=self.categorical_features,
             random_seed=42,
@@ -106,8 +126,9 @@ class FinancialDistressPredictor:
             early_stopping_rounds=50
         )
         
-        # Create Pool objects for CatBoost
-        train_pool = Pool(X_train, y_train, cat_features=self.categorical_features)
+        # Borders and category hashes come from the training rows only (cached);
+        # CatBoost quantizes the raw eval set with them, so the test rows stay held out
+        train_pool = self.pool_cache.load(X_train, y_train, self.categorical_features)
         test_pool = Pool(X_test, y_test, cat_features=self.categorical_features)
         
         # Train with validation
@@ -155,106 +176,304 @@ class FinancialDistressPredictor:
         
         return self.model, X_test, y_test
     
-    def cross_validate(self, X, y, n_splits=5):
-        """Perform stratified k-fold cross-validation."""
+    def cross_validate(self, X, y, n_splits=5, n_jobs=None, thread_count=None):
+        """
+        Perform stratified k-fold cross-validation.
+        Folds train in parallel processes on one shared quantized pool;
+        n_jobs folds run at once with thread_count CatBoost threads each
+        (defaults split the available cores between the folds).
+        """
         print(f"\n🔄 Performing {n_splits}-Fold Cross-Validation...")
         
-        skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
-        
-        cv_scores = []
-        fold = 1
-        
-        for train_idx, val_idx in skf.split(X, y):
-            X_train_fold, X_val_fold = X.iloc[train_idx], X.iloc[val_idx]
-            y_train_fold, y_val_fold = y.iloc[train_idx], y.iloc[val_idx]
-            
-            # Train model
-            model_fold = CatBoostClassifier(
-                iterations=300,
-                learning_rate=0.05,
-                depth=8,
-                cat_features=self.categorical_features,
-                random_seed=42,
-                verbose=False
-            )
-            
-            train_pool = Pool(X_train_fold, y_train_fold, cat_features=self.categorical_features)
-            model_fold.fit(train_pool)
-            
-            # Evaluate
-            y_pred = model_fold.predict(X_val_fold)
-            accuracy = accuracy_score(y_val_fold, y_pred)
-            cv_scores.append(accuracy)
-            
-            print(f"   Fold {fold}: Accuracy = {accuracy:.4f}")
-            fold += 1
-        
-        print(f"\n   Mean CV Accuracy: {np.mean(cv_scores):.4f} (+/- {np.std(cv_scores):.4f})")
-        return cv_scores
-    
-    def get_shap_explanation(self, user_data, return_base64=True):
+        fold_params = {
+            'iterations': 300,
+            'learning_rate': 0.05,
+            'depth': 8,
+            'random_seed': 42,
+            'verbose': False
+        }
+        
+        pool_path = self.pool_cache.get_path(X, y, self.categorical_features)
+        cv_results = parallel_cross_validate(
+            pool_path, y, fold_params,
+            n_splits=n_splits, n_jobs=n_jobs, thread_count=thread_count
+        )
+        print(f"   {cv_results['n_jobs']} parallel folds x {cv_results['thread_count']} threads")
+        
+        for fold in cv_results['folds']:
+            print(f"   Fold {fold['fold']}: Accuracy = {fold['accuracy']:.4f}, "
+                  f"Macro F1 = {fold['macro_f1']:.4f}, High Recall = {fold['high_recall']:.4f} "
+                  f"({fold['seconds']}s)")
+        
+        mean, std = cv_results['mean'], cv_results['std']
+        print(f"\n   Mean CV Accuracy: {mean['accuracy']:.4f} (+/- {std['accuracy']:.4f})")
+        print(f"   Mean CV Macro F1: {mean['macro_f1']:.4f} (+/- {std['macro_f1']:.4f})")
+        print(f"   Mean CV High Recall: {mean['high_recall']:.4f} (+/- {std['high_recall']:.4f})")
+        return cv_results
+    
+    def tune(self, X, y, n_trials=27, n_jobs=None):
+        """Search depth, learning rate, L2 and class weights; saves tuned_config.json and returns the params."""
+        return tune_predictor(self, X, y, n_trials=n_trials, n_jobs=n_jobs)
+    
+    def load_tuned_params(self):
+        """Params saved by tune(), or None."""
+        return load_tuned_params(self.model_dir)
+    
+    def distill(self, X, y, depth=4, iterations=300, learning_rate=0.1, temperature=1.0):
         """
-        Generate SHAP explanation for a single prediction.
-        Returns base64 encoded plot for API response.
+        Train a shallow student on this model's soft probabilities.
+        The student only sees the columns the API varies (API_VARIED_COLUMNS);
+        the rest are constant defaults at serving time, so the teacher is scored
+        on the same serving rows (see serving_frame()) for both the soft targets
+        and the agreement check. Soft targets are fitted by expanding every row
+        into one row per class, weighted by the teacher probability, which is
+        cross-entropy against the teacher distribution.
+        Returns a predictor holding the student; save it with save_model(variant='fast').
         """
-        if self.explainer is None:
-            raise ValueError("Model must be trained before generating SHAP explanations")
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import precision_recall_fscore_support
         
-        # Ensure user_data is a DataFrame
-        if isinstance(user_data, dict):
-            user_data = pd.DataFrame([user_data])
+        print(f"\n🧪 Distilling Serving Model (depth {depth}, {iterations} trees)...")
         
-        # Ensure columns match
-        user_data = user_data[self.feature_columns]
+        student_features = [col for col in self.feature_columns if col in API_VARIED_COLUMNS]
+        student_categorical = [col for col in self.categorical_features if col in student_features]
+        print(f"   Student features: {len(student_features)} of {len(self.feature_columns)}")
         
-        # Calculate SHAP values
-        shap_values = self.explainer.shap_values(user_data)
+        # Same split as train(): fit on the train rows, report on the test rows
+        train_idx, test_idx = train_test_split(
+            np.arange(len(X)), test_size=0.2, random_state=42, stratify=y
+        )
+        # Rows as the API builds them: what the student can't see is what the API doesn't send
+        X_serving = self.serving_frame(X)
+        X_train, X_test = X_serving.iloc[train_idx], X_serving.iloc[test_idx]
+        y_test = y.iloc[test_idx]
+        
+        raw = self.model.predict(X_train, prediction_type='RawFormulaVal') / temperature
+        soft_targets = np.exp(raw - raw.max(axis=1, keepdims=True))
+        soft_targets /= soft_targets.sum(axis=1, keepdims=True)
+        n_classes = soft_targets.shape[1]
+        
+        expanded = X_train[student_features].iloc[np.repeat(np.arange(len(X_train)), n_classes)]
+        soft_pool = Pool(
+            expanded,
+            np.tile(np.arange(n_classes), len(X_train)),
+            cat_features=student_categorical,
+            weight=soft_targets.ravel()
+        )
         
-        # For multi-class, get SHAP values for predicted class
-        prediction = self.model.predict(user_data)[0]
+        student_model = CatBoostClassifier(
+            iterations=iterations,
+            learning_rate=learning_rate,
+            depth=depth,
+            loss_function='MultiClass',
+            random_seed=42,
+            verbose=False
+        )
+        student_model.fit(soft_pool)
+        
+        student = FinancialDistressPredictor(model_dir=self.model_dir, shap_backend=self.shap_backend)
+        student.model = student_model
+        student.feature_columns = student_features
+        student.categorical_features = student_categorical
+        student.feature_importance = pd.DataFrame({
+            'feature': student_features,
+            'importance': student_model.get_feature_importance()
+        }).sort_values('importance', ascending=False)
+        student.row_template = FeatureRowTemplate(student_features, student_categorical)
+        student.variant = 'fast'
+        
+        # Agreement with the teacher and quality on the held-out rows
+        teacher_proba = self.model.predict_proba(X_test)
+        student_proba = student_model.predict_proba(X_test[student_features])
+        teacher_pred, student_pred = teacher_proba.argmax(axis=1), student_proba.argmax(axis=1)
+        _, teacher_recall, teacher_f1, _ = precision_recall_fscore_support(y_test, teacher_pred, labels=[0, 1, 2], zero_division=0)
+        _, student_recall, student_f1, _ = precision_recall_fscore_support(y_test, student_pred, labels=[0, 1, 2], zero_division=0)
+        
+        # Single-row and batch latency on the object arrays the API builds
+        def latency_ms(model, rows, repeats):
+            model.predict_proba(rows)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                model.predict_proba(rows)
+            return (time.perf_counter() - start) / repeats * 1000
+        
+        teacher_row = X_test.iloc[0:1].to_numpy(dtype=object)
+        student_row = X_test[student_features].iloc[0:1].to_numpy(dtype=object)
+        teacher_batch = X_test.iloc[:1000].to_numpy(dtype=object)
+        student_batch = X_test[student_features].iloc[:1000].to_numpy(dtype=object)
+        teacher_row_ms = latency_ms(self.model, teacher_row, 200)
+        student_row_ms = latency_ms(student_model, student_row, 200)
+        teacher_batch_ms = latency_ms(self.model, teacher_batch, 20)
+        student_batch_ms = latency_ms(student_model, student_batch, 20)
+        
+        student.distillation_report = {
+            'depth': depth,
+            'iterations': student_model.tree_count_,
+            'teacher_iterations': self.model.tree_count_,
+            'temperature': temperature,
+            'agreement': float((teacher_pred == student_pred).mean()),
+            'mean_abs_probability_diff': float(np.abs(teacher_proba - student_proba).mean()),
+            'teacher_macro_f1': float(teacher_f1.mean()),
+            'student_macro_f1': float(student_f1.mean()),
+            'teacher_high_recall': float(teacher_recall[2]),
+            'student_high_recall': float(student_recall[2]),
+            'teacher_row_ms': round(teacher_row_ms, 4),
+            'student_row_ms': round(student_row_ms, 4),
+            'row_speedup': round(teacher_row_ms / student_row_ms, 2),
+            'batch_speedup': round(teacher_batch_ms / student_batch_ms, 2)
+        }
+        
+        report = student.distillation_report
+        print(f"   Agreement with teacher: {report['agreement']:.4f} "
+              f"(mean |Δp| = {report['mean_abs_probability_diff']:.4f})")
+        print(f"   Macro F1: teacher {report['teacher_macro_f1']:.4f}, student {report['student_macro_f1']:.4f}")
+        print(f"   High recall: teacher {report['teacher_high_recall']:.4f}, student {report['student_high_recall']:.4f}")
+        print(f"   Single-row latency: {teacher_row_ms:.3f} ms -> {student_row_ms:.3f} ms "
+              f"({report['row_speedup']}x), batch speedup {report['batch_speedup']}x")
+        
+        return student
+    
+    def serving_frame(self, X):
+        """
+        Rows of X as the API would score them: the API_VARIED_COLUMNS are kept,
+        every other column is its SERVING_DEFAULTS value (or its fixed share of a
+        varied category), filled through the same FeatureRowTemplate.
+        """
+        template = FeatureRowTemplate(self.feature_columns, self.categorical_features)
+        values = {col: X[col].to_numpy() for col in API_VARIED_COLUMNS if col in template.column_index}
+        rows = template.build(values)
+        return pd.DataFrame(rows, columns=self.feature_columns, index=X.index).astype(X[self.feature_columns].dtypes.to_dict())
+    
+    def get_shap_values(self, user_data, predicted_class=None):
+        """
+        Compute SHAP values for the predicted class of every row.
+        
+        Args:
+            user_data: DataFrame, dict or feature-ordered array (one or many rows)
+            predicted_class: class index or label per row (or one for all rows),
+                e.g. from predict_batch. Derived from the SHAP sums when omitted.
+        
+        Returns:
+            dict with 'values' (N x features), 'base_values' (N,), 'predicted_class' (N,)
+        """
+        if self.model is None:
+            raise ValueError("Model must be trained before generating SHAP explanations")
         
-        # Create waterfall plot - fix expected_value indexing
-        plt.figure(figsize=(10, 6))
+        if not isinstance(user_data, np.ndarray):
+            user_data = self._align_features(user_data)
         
-        # Get base value for the predicted class
-        if isinstance(self.explainer.expected_value, (list, np.ndarray)):
-            base_value = self.explainer.expected_value[int(prediction)]
+        if self.shap_backend == 'shap':
+            values, base_values = self._tree_explainer_shap_values(user_data)
         else:
-            base_value = self.explainer.expected_value
-            
-        shap.waterfall_plot(
-            shap.Explanation(
-                values=shap_values[int(prediction)][0],
-                base_values=base_value,
-                data=user_data.iloc[0],
-                feature_names=user_data.columns.tolist()
-            ),
-            show=False
-        )
-        plt.title(f"Why Risk Level = {['Low', 'Medium', 'High'][prediction]}", 
-                 fontsize=14, fontweight='bold')
-        plt.tight_layout()
-        
-        if return_base64:
-            # Convert plot to base64
-            buffer = BytesIO()
-            plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-            plt.close()
-            return image_base64
+            # CatBoost native tree SHAP: (rows, classes, features + expected value)
+            pool = Pool(user_data, cat_features=self.model.get_cat_feature_indices())
+            shap_matrix = self.model.get_feature_importance(data=pool, type='ShapValues')
+            values, base_values = shap_matrix[:, :, :-1], shap_matrix[:, :, -1]
+        
+        n_rows = values.shape[0]
+        if predicted_class is None:
+            # Per-class SHAP sums are the raw scores, so their argmax is the prediction
+            predicted_class = (values.sum(axis=2) + base_values).argmax(axis=1)
         else:
-            plt.show()
-            return None
+            risk_levels = ['Low', 'Medium', 'High']
+            predicted_class = np.broadcast_to(np.atleast_1d(predicted_class), (n_rows,))
+            predicted_class = np.array([
+                risk_levels.index(cls) if isinstance(cls, str) else int(cls)
+                for cls in predicted_class
+            ])
+        
+        rows = np.arange(n_rows)
+        return {
+            'values': values[rows, predicted_class],
+            'base_values': base_values[rows, predicted_class],
+            'predicted_class': predicted_class
+        }
     
-    def predict(self, user_data):
-        """Make prediction with confidence scores."""
+    def get_shap_summary(self, user_data, predicted_class=None, top_k=10):
+        """
+        Structured SHAP explanation for every row, for clients that draw their own charts.
+        Each summary has the base value, every feature's contribution and the
+        top_k features by absolute contribution.
+        """
+        if not isinstance(user_data, np.ndarray):
+            user_data = self._align_features(user_data).to_numpy(dtype=object)
+        
+        shap_result = self.get_shap_values(user_data, predicted_class)
+        risk_levels = ['Low', 'Medium', 'High']
+        
+        summaries = []
+        for i, values in enumerate(shap_result['values']):
+            top_idx = np.argsort(-np.abs(values))[:top_k]
+            summaries.append({
+                'predicted_class': risk_levels[int(shap_result['predicted_class'][i])],
+                'base_value': float(shap_result['base_values'][i]),
+                'contributions': dict(zip(self.feature_columns, values.tolist())),
+                'top_features': [
+                    {
+                        'feature': self.feature_columns[j],
+                        'value': user_data[i, j] if isinstance(user_data[i, j], str) else float(user_data[i, j]),
+                        'shap_value': float(values[j])
+                    }
+                    for j in top_idx
+                ]
+            })
+        
+        return summaries
+    
+    def _tree_explainer_shap_values(self, user_data):
+        """SHAP values via shap.TreeExplainer, as (rows, classes, features) and (rows, classes)."""
+        import shap
+        
+        if self.explainer is None:
+            self.explainer = shap.TreeExplainer(self.model)
+        
+        if isinstance(user_data, np.ndarray):
+            user_data = pd.DataFrame(user_data, columns=self.feature_columns)
+        
+        shap_values = self.explainer.shap_values(user_data)
+        if isinstance(shap_values, list):
+            # Older shap releases return one array per class
+            values = np.stack(shap_values, axis=1)
+        else:
+            values = np.transpose(shap_values, (0, 2, 1))
+        
+        base_values = np.tile(np.asarray(self.explainer.expected_value), (values.shape[0], 1))
+        return values, base_values
+    
+    def get_shap_explanation(self, user_data, return_base64=True, predicted_class=None):
+        """
+        Generate SHAP explanation for a single prediction.
+        Returns base64 encoded plot for API response.
+        Pass predicted_class from predict() to avoid a second inference.
+        """
         if self.model is None:
-            raise ValueError("Model must be trained before prediction")
+            raise ValueError("Model must be trained before generating SHAP explanations")
         
+        # SHAP values for the predicted class of the first row
+        if isinstance(user_data, np.ndarray):
+            shap_result = self.get_shap_values(user_data[0:1], predicted_class)
+            user_data = pd.DataFrame(user_data[0:1], columns=self.feature_columns)
+        else:
+            user_data = self._align_features(user_data).iloc[0:1]
+            shap_result = self.get_shap_values(user_data, predicted_class)
+        prediction = int(shap_result['predicted_class'][0])
+        
+        return render_shap_waterfall(
+            shap_result['values'][0],
+            shap_result['base_values'][0],
+            user_data.iloc[0],
+            user_data.columns.tolist(),
+            prediction,
+            return_base64=return_base64
+        )
+    
+    def _align_features(self, user_data):
+        """Return a DataFrame with exactly the training feature columns, in order."""
         # Ensure DataFrame
         if isinstance(user_data, dict):
             user_data = pd.DataFrame([user_data])
+        elif isinstance(user_data, list):
+            user_data = pd.DataFrame(user_data)
         
         # Make a copy to avoid modifying original
         user_data = user_data.copy()
@@ -269,33 +488,38 @@ class FinancialDistressPredictor:
                     user_data[col] = 0
         
         # Ensure columns match training data order
-        user_data = user_data[self.feature_columns]
-        
-        # Predict
-        prediction = int(self.model.predict(user_data)[0])
-        probabilities = self.model.predict_proba(user_data)[0]
+        return user_data[self.feature_columns]
+    
+    def predict(self, user_data):
+        """Make prediction with confidence scores."""
+        return self.predict_batch(user_data)[0]
+    
+    def predict_batch(self, user_data):
+        """
+        Score many households with a single predict_proba call.
+        Returns one result dict per row, in input order.
+        """
+        if self.model is None:
+            raise ValueError("Model must be trained before prediction")
         
-        # Map to labels
-        risk_levels = ['Low', 'Medium', 'High']
-        predicted_risk = risk_levels[prediction]
-        confidence = probabilities[prediction]
+        if isinstance(user_data, np.ndarray):
+            # Already laid out in feature_columns order (see FeatureRowTemplate)
+            features = user_data
+        else:
+            features = self._align_features(user_data)
         
-        return {
-            'prediction': predicted_risk,
-            'confidence': float(confidence),
-            'probabilities': {
-                'Low': float(probabilities[0]),
-                'Medium': float(probabilities[1]),
-                'High': float(probabilities[2])
-            }
-        }
+        # Predict - the class is the argmax of the probabilities,
+        # so a single predict_proba call covers both
+        return format_predictions(self.model.predict_proba(features))
     
-    def save_model(self):
-        """Save trained model and metadata."""
+    def save_model(self, variant='full'):
+        """Save trained model and metadata (variant='fast' for a distilled model)."""
         print("\n💾 Saving Model...")
         
+        model_file, metadata_file = MODEL_VARIANTS[variant]
+        
         # Save CatBoost model
-        model_path = self.model_dir / 'catboost_model.cbm'
+        model_path = self.model_dir / model_file
         self.model.save_model(str(model_path))
         print(f"   ✅ Model saved to: {model_path}")
         
@@ -305,18 +529,36 @@ class FinancialDistressPredictor:
             'categorical_features': self.categorical_features,
             'feature_importance': self.feature_importance.to_dict('records')
         }
+        if self.distillation_report is not None:
+            metadata['distillation'] = self.distillation_report
         
-        metadata_path = self.model_dir / 'model_metadata.json'
+        metadata_path = self.model_dir / metadata_file
         with open(metadata_path, 'w') as f:
             json.dump(metadata, f, indent=2)
         print(f"   ✅ Metadata saved to: {metadata_path}")
     
-    def load_model(self):
-        """Load trained model and metadata."""
+    def export_compiled(self, X):
+        """
+        Compile the model into NumPy arrays for the API (see compiled_scorer.py).
+        X (the training data) supplies the category values to hash and the rows
+        the export is checked on; the serving row template's defaults are added.
+        """
+        print("\n📦 Exporting Compiled Scorer...")
+        path = self.model_dir / COMPILED_MODEL_FILES[self.variant]
+        serving_categories = ['Unknown'] + [value for value in SERVING_DEFAULTS.values() if isinstance(value, str)]
+        return export_compiled_model(self.model, X[self.feature_columns], path,
+                                     extra_categories=serving_categories)
+    
+    def load_model(self, variant='full'):
+        """
+        Load trained model and metadata.
+        variant='fast' loads the distilled model (see distill()).
+        """
         print("\n📂 Loading Model...")
         
-        model_path = self.model_dir / 'catboost_model.cbm'
-        metadata_path = self.model_dir / 'model_metadata.json'
+        model_file, metadata_file = MODEL_VARIANTS[variant]
+        model_path = self.model_dir / model_file
+        metadata_path = self.model_dir / metadata_file
         
         if not model_path.exists():
             raise FileNotFoundError(f"Model not found at {model_path}")
@@ -333,20 +575,80 @@ class FinancialDistressPredictor:
         self.feature_columns = metadata['feature_columns']
         self.categorical_features = metadata['categorical_features']
         self.feature_importance = pd.DataFrame(metadata['feature_importance'])
+        self.distillation_report = metadata.get('distillation')
+        self.variant = variant
+        self.model_version = model_fingerprint(self.model_dir, variant)
         
-        # Initialize SHAP explainer
-        self.explainer = shap.TreeExplainer(self.model)
-        print(f"   ✅ Metadata and SHAP explainer loaded")
+        # Precompile the serving row layout for this feature list
+        self.row_template = FeatureRowTemplate(self.feature_columns, self.categorical_features)
+        
+        # SHAP values come from CatBoost itself; a shap.TreeExplainer is
+        # only built on first use when shap_backend='shap'
+        self.explainer = None
+        print(f"   ✅ Metadata loaded (SHAP backend: {self.shap_backend})")
+
+def render_shap_waterfall(values, base_value, data, feature_names, predicted_class, return_base64=True):
+    """
+    Render a SHAP waterfall plot for one row.
+    Module-level so it can run in a separate worker process.
+    """
+    import matplotlib
+    matplotlib.use('Agg')  # Non-interactive backend
+    import matplotlib.pyplot as plt
+    import shap
+    
+    plt.figure(figsize=(10, 6))
+    
+    shap.waterfall_plot(
+        shap.Explanation(
+            values=np.asarray(values),
+            base_values=base_value,
+            data=data,
+            feature_names=feature_names
+        ),
+        show=False
+    )
+    plt.title(f"Why Risk Level = {['Low', 'Medium', 'High'][int(predicted_class)]}", 
+             fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    
+    if return_base64:
+        # Convert plot to base64
+        buffer = BytesIO()
+        plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
+        buffer.seek(0)
+        image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
+        plt.close()
+        return image_base64
+    else:
+        plt.show()
+        return None
 
-def main():
-    """Main training pipeline."""
+def main(distill=False, export=False, publish=False, min_agreement=MIN_DISTILL_AGREEMENT):
+    """
+    Main training pipeline.
+    distill=True skips training and distills the saved model into the fast variant
+    (refused, with nothing saved, if the student's agreement is below min_agreement);
+    export=True only recompiles the saved model(s) for the API;
+    publish=True then copies the saved model(s) into a new model registry version.
+    """
+    predictor = run_pipeline(distill=distill, export=export, min_agreement=min_agreement)
+    
+    if publish:
+        print("\n🗂️  Publishing Model Version...")
+        ModelRegistry(predictor.model_dir / REGISTRY_DIR).publish(predictor.model_dir)
+    
+    return predictor
+
+def run_pipeline(distill=False, export=False, min_agreement=MIN_DISTILL_AGREEMENT):
+    """Train, distill or export (see main())."""
     print("="*70)
     print("🤖 FINANCIAL DISTRESS PREDICTOR - ML TRAINING PIPELINE")
     print("="*70)
     
     # Load processed data
     print("\n📂 Loading Processed Data...")
-    df = pd.read_csv('../data/processed/household_budget_processed.csv')
+    df = load_processed_dataset()
     print(f"   Loaded {len(df)} samples")
     
     # Initialize predictor
@@ -355,14 +657,38 @@ def main():
     # Prepare data
     X, y = predictor.prepare_data(df)
     
+    if distill:
+        predictor.load_model()
+        student = predictor.distill(X, y)
+        agreement = student.distillation_report['agreement']
+        if agreement < min_agreement:
+            raise ValueError(f"Distilled model agrees with the full model on {agreement:.4f} of held-out rows "
+                             f"(minimum {min_agreement}); not saved")
+        student.save_model(variant='fast')
+        student.export_compiled(X)
+        return student
+    
+    if export:
+        for variant in MODEL_VARIANTS:
+            try:
+                predictor.load_model(variant=variant)
+            except FileNotFoundError:
+                continue
+            predictor.export_compiled(X)
+        return predictor
+    
     # Cross-validation
     predictor.cross_validate(X, y, n_splits=5)
     
-    # Train final model
-    model, X_test, y_test = predictor.train(X, y, optimize_for_recall=True)
+    # Train final model (with the tuned config if tuning.py has been run)
+    tuned_params = predictor.load_tuned_params()
+    if tuned_params:
+        print(f"\n🎛️  Using tuned config: {tuned_params}")
+    model, X_test, y_test = predictor.train(X, y, optimize_for_recall=True, params=tuned_params)
     
     # Save model
     predictor.save_model()
+    predictor.export_compiled(X)
     
     # Test SHAP explanation
     print("\n🔍 Testing SHAP Explanation...")
@@ -377,4 +703,15 @@ def main():
     return predictor
 
 if __name__ == '__main__':
-    predictor = main()
+    parser = argparse.ArgumentParser(description='Train the financial distress model')
+    parser.add_argument('--distill', action='store_true',
+                        help='Distill the saved model into the fast serving variant instead of training')
+    parser.add_argument('--export', action='store_true',
+                        help='Only recompile the saved model(s) into the NumPy scorer the API loads')
+    parser.add_argument('--publish', action='store_true',
+                        help='Copy the saved model(s) into a new version of the model registry')
+    parser.add_argument('--min-agreement', type=float, default=MIN_DISTILL_AGREEMENT,
+                        help='With --distill, the teacher agreement below which the student is not saved')
+    args = parser.parse_args()
+    predictor = main(distill=args.distill, export=args.export, publish=args.publish,
+                     min_agreement=args.min_agreement)
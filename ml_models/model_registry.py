@@ -0,0 +1,88 @@
+"""
+Model Registry: Versioned model bundles for hot reload
+registry/<version>/ holds one trained model: the CatBoost file and metadata of
+each variant it has, plus their compiled exports. publish() copies a model
+directory's files into a new version, written under a temporary name and then
+renamed, so a half-copied bundle is never visible. The API serves the newest
+version and can switch to another without restarting (see POST /admin/models/reload).
+
+    python ml_engine.py --export --publish
+"""
+
+import shutil
+import time
+from pathlib import Path
+
+from compiled_scorer import MODEL_VARIANTS, COMPILED_MODEL_FILES, model_fingerprint
+
+REGISTRY_DIR = 'registry'
+
+class ModelRegistry:
+    """Versions under one directory; version names sort oldest to newest."""
+
+    def __init__(self, root):
+        """Initialize over a registry directory (created on first publish)."""
+        self.root = Path(root)
+
+    @staticmethod
+    def bundle_files(model_dir):
+        """The model files of every variant present in a model directory."""
+        model_dir = Path(model_dir)
+        names = [name for variant in MODEL_VARIANTS for name in MODEL_VARIANTS[variant]]
+        names += list(COMPILED_MODEL_FILES.values())
+        return [model_dir / name for name in names if (model_dir / name).exists()]
+
+    def versions(self):
+        """Published versions that hold at least the full model, oldest first."""
+        if not self.root.exists():
+            return []
+        model_file, _ = MODEL_VARIANTS['full']
+        return sorted(
+            path.name for path in self.root.iterdir()
+            if path.is_dir() and not path.name.startswith('.')
+            and ((path / model_file).exists() or (path / COMPILED_MODEL_FILES['full']).exists())
+        )
+
+    def latest(self):
+        """The newest version, or None if nothing has been published."""
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def path(self, version):
+        """Directory of a version; raises FileNotFoundError if it is not published."""
+        if version not in self.versions():
+            raise FileNotFoundError(f"Model version '{version}' not found in {self.root}")
+        return self.root / version
+
+    def publish(self, model_dir, version=None):
+        """
+        Copy a model directory's files into a new version.
+
+        Args:
+            model_dir: directory holding the trained model (see FinancialDistressPredictor.save_model)
+            version: version name (default: UTC timestamp plus the full model's fingerprint)
+
+        Returns:
+            the version name
+        """
+        files = self.bundle_files(model_dir)
+        if not any(path.name == MODEL_VARIANTS['full'][0] for path in files):
+            raise FileNotFoundError(f"No trained model in {model_dir}")
+
+        version = version or '{}-{}'.format(
+            time.strftime('%Y%m%d-%H%M%S', time.gmtime()),
+            model_fingerprint(model_dir).split('-')[-1]
+        )
+        target = self.root / version
+        if target.exists():
+            raise FileExistsError(f"Model version '{version}' already exists in {self.root}")
+
+        staging = self.root / f'.{version}.tmp'
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        for path in files:
+            shutil.copy2(path, staging / path.name)
+        staging.rename(target)
+
+        print(f"   ✅ Published model version {version} to {target}")
+        return version
@@ -0,0 +1,58 @@
+"""
+Pool Cache: Persisted quantized CatBoost training pools
+Quantizing the prepared features (float borders, categorical hashes) is
+done once per distinct dataset; repeated training runs, cross-validation
+and hyperparameter trials load the saved binary pool instead.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from catboost import Pool
+
+class QuantizedPoolCache:
+    """Quantized pools on disk, keyed by a hash of the data, feature list and quantization settings."""
+
+    def __init__(self, cache_dir='../data/processed/pool_cache'):
+        """Initialize the cache directory (created on first write)."""
+        self.cache_dir = Path(cache_dir)
+
+    def key(self, X, y, cat_features, quantization_params=None):
+        """Content hash identifying one quantized pool."""
+        digest = hashlib.sha256()
+        digest.update(json.dumps({
+            'columns': [str(col) for col in X.columns],
+            'dtypes': [str(dtype) for dtype in X.dtypes],
+            'cat_features': list(cat_features),
+            'quantization': quantization_params or {}
+        }, sort_keys=True).encode())
+        # Row hashes cover values and row order; index labels do not matter to CatBoost
+        digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+        digest.update(np.asarray(y).tobytes())
+        return digest.hexdigest()[:24]
+
+    def get_path(self, X, y, cat_features, **quantization_params):
+        """Path of the quantized pool for this data, building and saving it on a cache miss."""
+        path = self.cache_dir / f'{self.key(X, y, cat_features, quantization_params)}.quantized'
+        if path.exists():
+            print(f"   Quantized pool cache hit: {path.name}")
+            return str(path)
+
+        print(f"   Quantizing training pool -> {path.name}")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        pool = Pool(X, y, cat_features=cat_features)
+        pool.quantize(**quantization_params)
+
+        # Write then rename so concurrent runs never load a half-written pool
+        tmp_path = path.with_suffix(f'.tmp{os.getpid()}')
+        pool.save(str(tmp_path))
+        os.replace(tmp_path, path)
+        return str(path)
+
+    def load(self, X, y, cat_features, **quantization_params):
+        """The quantized Pool for this data (from the cache when present)."""
+        return Pool(f'quantized://{self.get_path(X, y, cat_features, **quantization_params)}')
@@ -0,0 +1,104 @@
+"""
+Processed Dataset: Columnar storage for the preprocessed survey data
+The pipeline writes Parquet with dictionary-encoded categorical columns;
+readers load only the columns they need. Trees that only have the legacy
+CSV keep working through the CSV fallback.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+PARQUET_PATH = '../data/processed/household_budget_processed.parquet'
+CSV_PATH = '../data/processed/household_budget_processed.csv'
+
+# The CSV was written with its index, which read_csv returns as this column
+# and the trained model expects as a feature; Parquet stores it the same way
+INDEX_COLUMN = 'Unnamed: 0'
+
+def _to_storage_frame(df):
+    """Move the index into INDEX_COLUMN and turn text columns into categoricals."""
+    frame = df.rename_axis(INDEX_COLUMN).reset_index()
+
+    text_cols = frame.select_dtypes(include=['object']).columns
+    frame[text_cols] = frame[text_cols].astype('category')
+    return frame
+
+def save_processed_dataset(df, path=PARQUET_PATH):
+    """Write the processed frame as Parquet, storing text columns as categoricals."""
+    _to_storage_frame(df).to_parquet(path, engine='pyarrow', index=False, compression='zstd')
+    return path
+
+class ProcessedDatasetWriter:
+    """
+    Append processed chunks to one Parquet file, one row group per chunk.
+    The schema is fixed by the first chunk; categorical columns use int32
+    dictionary indices so chunks with different category counts still match.
+    """
+
+    def __init__(self, path=PARQUET_PATH):
+        """Initialize the writer; the file is created on the first write."""
+        self.path = path
+        self.schema = None
+        self.rows_written = 0
+        self._writer = None
+
+    def write(self, df):
+        """Append one processed chunk."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        frame = _to_storage_frame(df)
+        if self._writer is None:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            self.schema = pa.schema(
+                [pa.field(field.name, pa.dictionary(pa.int32(), pa.string()))
+                 if pa.types.is_dictionary(field.type) else field
+                 for field in table.schema],
+                metadata=table.schema.metadata
+            )
+            self._writer = pq.ParquetWriter(self.path, self.schema, compression='zstd')
+
+        self._writer.write_table(pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False))
+        self.rows_written += len(frame)
+
+    def close(self):
+        """Finish the file."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        return self.path
+
+def resolve_dataset_path(path=None):
+    """The given path, else the Parquet dataset if it exists, else the legacy CSV."""
+    if path is not None:
+        return Path(path)
+    if Path(PARQUET_PATH).exists():
+        return Path(PARQUET_PATH)
+    return Path(CSV_PATH)
+
+def load_processed_dataset(columns=None, path=None, nrows=None):
+    """
+    Load the processed dataset.
+
+    Args:
+        columns: Columns to read (None reads all of them)
+        path: Parquet or CSV file (defaults to resolve_dataset_path())
+        nrows: Read only the first nrows rows
+
+    Returns:
+        DataFrame; categorical columns come back as pandas categoricals from Parquet
+    """
+    path = resolve_dataset_path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Processed data not found at {path}")
+
+    if path.suffix != '.parquet':
+        return pd.read_csv(path, usecols=columns, nrows=nrows)
+
+    if nrows is None:
+        return pd.read_parquet(path, columns=columns, engine='pyarrow')
+
+    import pyarrow.parquet as pq
+    batch = next(pq.ParquetFile(path).iter_batches(batch_size=nrows, columns=columns))
+    return batch.to_pandas()
@@ -2,201 +2,233 @@
 Recommendation Engine: Generate actionable financial advice based on distress level
 """
 
+from string import Formatter
+
 import pandas as pd
 import numpy as np
 
+# Recommendations in output order. A rule applies to households at its distress
+# `level` (None: every level; anything but High/Medium counts as Low) when its
+# `when` condition (metric, comparison, threshold) holds. A {metric} placeholder
+# in the message is filled with that ratio as a percentage to one decimal; a
+# household whose ratio is undefined (NaN, e.g. spending without income) skips it.
+RECOMMENDATION_RULES = [
+    # HIGH DISTRESS RECOMMENDATIONS
+    {
+        'level': 'High', 'when': None,
+        'category': 'Critical', 'priority': 'High',
+        'title': 'Immediate Action Required',
+        'message': 'Your expenses are {spending_ratio}% of your income. Take immediate steps to reduce spending.',
+        'action': 'Review all expenses and eliminate non-essentials'
+    },
+    {
+        'level': 'High', 'when': ('housing_ratio', '>', 0.40),
+        'category': 'Housing', 'priority': 'High',
+        'title': 'Housing Costs Too High',
+        'message': 'Housing is {housing_ratio}% of income (recommended: <35%). Consider downsizing or refinancing.',
+        'action': 'Explore lower-cost housing options or negotiate rent'
+    },
+    {
+        'level': 'High', 'when': ('food_ratio', '>', 0.30),
+        'category': 'Food', 'priority': 'High',
+        'title': 'Optimize Food Spending',
+        'message': 'Food is {food_ratio}% of expenses. Meal planning and bulk buying can reduce costs by 20-30%.',
+        'action': 'Create weekly meal plans, use coupons, buy generic brands'
+    },
+    {
+        'level': 'High', 'when': ('disc_ratio', '>', 0.15),
+        'category': 'Lifestyle', 'priority': 'High',
+        'title': 'Cut Discretionary Spending',
+        'message': 'Lifestyle expenses are {disc_ratio}% of budget. Temporary cuts can create breathing room.',
+        'action': 'Pause subscriptions, reduce dining out, postpone non-essential purchases'
+    },
+    {
+        'level': 'High', 'when': None,
+        'category': 'Income', 'priority': 'High',
+        'title': 'Increase Income',
+        'message': 'Consider additional income sources to improve your financial position.',
+        'action': 'Explore freelancing, part-time work, or selling unused items'
+    },
+
+    # MEDIUM DISTRESS RECOMMENDATIONS
+    {
+        'level': 'Medium', 'when': None,
+        'category': 'Warning', 'priority': 'Medium',
+        'title': 'Budget Optimization Needed',
+        'message': 'Spending at {spending_ratio}% of income. Build a buffer to avoid financial stress.',
+        'action': 'Create a detailed monthly budget and track all expenses'
+    },
+    {
+        'level': 'Medium', 'when': ('housing_ratio', '>', 0.35),
+        'category': 'Housing', 'priority': 'Medium',
+        'title': 'Housing Costs Elevated',
+        'message': 'Housing at {housing_ratio}% of income. Aim for <35% for better financial flexibility.',
+        'action': 'Look for ways to reduce utilities or consider roommate'
+    },
+    {
+        'level': 'Medium', 'when': ('savings_rate', '<', 0.10),
+        'category': 'Savings', 'priority': 'Medium',
+        'title': 'Build Emergency Fund',
+        'message': 'Savings rate at {savings_rate}%. Aim for 10-20% to build financial resilience.',
+        'action': 'Set up automatic transfers to savings account, start with 5%'
+    },
+    {
+        'level': 'Medium', 'when': ('disc_ratio', '>', 0.20),
+        'category': 'Lifestyle', 'priority': 'Medium',
+        'title': 'Optimize Lifestyle Spending',
+        'message': 'Discretionary spending at {disc_ratio}%. Small cuts can significantly improve savings.',
+        'action': 'Review subscriptions, negotiate bills, find free entertainment'
+    },
+    {
+        'level': 'Medium', 'when': None,
+        'category': 'Planning', 'priority': 'Medium',
+        'title': 'Financial Planning',
+        'message': 'Create a 3-6 month emergency fund and review your budget monthly.',
+        'action': 'Use budgeting apps, set financial goals, track progress'
+    },
+
+    # LOW DISTRESS RECOMMENDATIONS
+    {
+        'level': 'Low', 'when': None,
+        'category': 'Success', 'priority': 'Low',
+        'title': 'Healthy Financial Position',
+        'message': 'Spending at {spending_ratio}% of income. Maintain good habits and optimize further.',
+        'action': 'Continue current practices and look for growth opportunities'
+    },
+    {
+        'level': 'Low', 'when': ('savings_rate', '<', 0.20),
+        'category': 'Growth', 'priority': 'Low',
+        'title': 'Maximize Savings',
+        'message': 'Savings rate at {savings_rate}%. Increase to 20%+ for wealth building.',
+        'action': 'Consider high-yield savings, investment accounts, or retirement funds'
+    },
+    {
+        'level': 'Low', 'when': None,
+        'category': 'Investment', 'priority': 'Low',
+        'title': 'Consider Investing',
+        'message': 'Your financial foundation is solid. Explore investment opportunities.',
+        'action': 'Research index funds, retirement accounts, or real estate'
+    },
+    {
+        'level': 'Low', 'when': None,
+        'category': 'Goals', 'priority': 'Low',
+        'title': 'Set Long-term Goals',
+        'message': 'Plan for major financial goals like home ownership, education, or retirement.',
+        'action': 'Create a 5-year financial plan with specific milestones'
+    },
+    {
+        'level': 'Low', 'when': None,
+        'category': 'Optimization', 'priority': 'Low',
+        'title': 'Fine-tune Budget',
+        'message': 'Review recurring expenses for potential savings.',
+        'action': 'Negotiate insurance rates, refinance loans, optimize subscriptions'
+    },
+
+    # Universal recommendations
+    {
+        'level': None, 'when': None,
+        'category': 'Protection', 'priority': 'Medium',
+        'title': 'Financial Protection',
+        'message': 'Ensure adequate insurance coverage (health, life, property).',
+        'action': 'Review insurance policies annually and adjust coverage as needed'
+    }
+]
+
+COMPARISONS = {'>': np.greater, '<': np.less}
+
 class RecommendationEngine:
     """Generate personalized financial recommendations."""
     
-    def __init__(self):
-        """Initialize recommendation rules."""
-        pass
+    def __init__(self, rules=RECOMMENDATION_RULES):
+        """Compile the rule table into output records and preformatted message templates."""
+        self.rules = []
+        for rule in rules:
+            parts = list(Formatter().parse(rule['message']))
+            metric = parts[0][1]
+            template = rule['message'] if metric is None else rule['message'].replace(f'{{{metric}}}', '{:.1f}')
+            record = {key: rule[key] for key in ['category', 'priority', 'title', 'message', 'action']}
+            self.rules.append((rule['level'], rule['when'], metric, template, record))
     
-    def generate_recommendations(self, user_data, prediction_result):
+    def _metrics(self, user_data):
+        """Ratios the rules test and format, one array entry per household."""
+        n_rows = len(user_data) if isinstance(user_data, pd.DataFrame) else len(next(iter(user_data.values())))
+        
+        def col(name):
+            if name not in user_data:
+                return np.zeros(n_rows)
+            return np.asarray(user_data[name], dtype=np.float64)
+        
+        income = col('Net_Income')
+        total_exp = col('Total_Expenditure')
+        
+        has_income = income > 0
+        has_spending = total_exp > 0
+        safe_income = np.where(has_income, income, 1.0)
+        safe_total = np.where(has_spending, total_exp, 1.0)
+        
+        return {
+            # Spending-to-income has no value without income
+            'spending_ratio': np.where(has_income, total_exp / safe_income, np.nan),
+            'housing_ratio': np.where(has_income, col('Housing') / safe_income, 0),
+            'food_ratio': np.where(has_spending, col('Food') / safe_total, 0),
+            'savings_rate': np.where(has_income, col('Savings') / safe_income, 0),
+            'disc_ratio': np.where(has_spending, col('Discretionary_Spending') / safe_total, 0)
+        }
+    
+    def generate_recommendations_batch(self, user_data, predictions):
         """
-        Generate actionable recommendations based on financial distress level.
+        Generate recommendations for N households in one pass over the rule table.
         
         Args:
-            user_data: dict or DataFrame with household financial data
-            prediction_result: dict with prediction, confidence, probabilities
+            user_data: DataFrame or dict of column -> N values (inputs and derived features)
+            predictions: N predicted distress levels ('High', 'Medium', 'Low')
         
         Returns:
-            list of recommendation dictionaries
+            list of N recommendation lists
         """
-        if isinstance(user_data, pd.DataFrame):
-            user_data = user_data.iloc[0].to_dict()
-        
-        recommendations = []
-        distress_level = prediction_result['prediction']
+        levels = np.asarray(predictions, dtype=object)
+        levels = np.where(np.isin(levels, ['High', 'Medium']), levels, 'Low')
+        metrics = self._metrics(user_data)
         
-        # Calculate key ratios
-        income = user_data.get('Net_Income', 0)
-        total_exp = user_data.get('Total_Expenditure', 0)
-        housing = user_data.get('Housing', 0)
-        food = user_data.get('Food', 0)
-        savings = user_data.get('Savings', 0)
-        discretionary = user_data.get('Discretionary_Spending', 0)
+        level_masks = {level: levels == level for level in ['High', 'Medium', 'Low']}
+        level_masks[None] = np.ones(len(levels), dtype=bool)
         
-        housing_ratio = housing / income if income > 0 else 0
-        food_ratio = food / total_exp if total_exp > 0 else 0
-        savings_rate = savings / income if income > 0 else 0
-        disc_ratio = discretionary / total_exp if total_exp > 0 else 0
-        
-        # HIGH DISTRESS RECOMMENDATIONS
-        if distress_level == 'High':
-            recommendations.append({
-                'category': 'Critical',
-                'priority': 'High',
-                'title': 'Immediate Action Required',
-                'message': f'Your expenses are {(total_exp/income)*100:.1f}% of your income. Take immediate steps to reduce spending.',
-                'action': 'Review all expenses and eliminate non-essentials'
-            })
-            
-            # Housing burden
-            if housing_ratio > 0.40:
-                recommendations.append({
-                    'category': 'Housing',
-                    'priority': 'High',
-                    'title': 'Housing Costs Too High',
-                    'message': f'Housing is {housing_ratio*100:.1f}% of income (recommended: <35%). Consider downsizing or refinancing.',
-                    'action': 'Explore lower-cost housing options or negotiate rent'
-                })
-            
-            # Food spending
-            if food_ratio > 0.30:
-                recommendations.append({
-                    'category': 'Food',
-                    'priority': 'High',
-                    'title': 'Optimize Food Spending',
-                    'message': f'Food is {food_ratio*100:.1f}% of expenses. Meal planning and bulk buying can reduce costs by 20-30%.',
-                    'action': 'Create weekly meal plans, use coupons, buy generic brands'
-                })
+        recommendations = [[] for _ in range(len(levels))]
+        for level, when, metric, template, record in self.rules:
+            mask = level_masks[level]
+            if when is not None:
+                mask = mask & COMPARISONS[when[1]](metrics[when[0]], when[2])
+            if metric is not None:
+                mask = mask & ~np.isnan(metrics[metric])
+            rows = np.flatnonzero(mask).tolist()
             
-            # Discretionary spending
-            if disc_ratio > 0.15:
-                recommendations.append({
-                    'category': 'Lifestyle',
-                    'priority': 'High',
-                    'title': 'Cut Discretionary Spending',
-                    'message': f'Lifestyle expenses are {disc_ratio*100:.1f}% of budget. Temporary cuts can create breathing room.',
-                    'action': 'Pause subscriptions, reduce dining out, postpone non-essential purchases'
-                })
-            
-            # Income
-            recommendations.append({
-                'category': 'Income',
-                'priority': 'High',
-                'title': 'Increase Income',
-                'message': 'Consider additional income sources to improve your financial position.',
-                'action': 'Explore freelancing, part-time work, or selling unused items'
-            })
+            if metric is None:
+                records = [record.copy() for _ in rows]
+            else:
+                records = [{**record, 'message': template.format(value)}
+                           for value in (metrics[metric][rows] * 100).tolist()]
+            for row, row_record in zip(rows, records):
+                recommendations[row].append(row_record)
         
-        # MEDIUM DISTRESS RECOMMENDATIONS
-        elif distress_level == 'Medium':
-            recommendations.append({
-                'category': 'Warning',
-                'priority': 'Medium',
-                'title': 'Budget Optimization Needed',
-                'message': f'Spending at {(total_exp/income)*100:.1f}% of income. Build a buffer to avoid financial stress.',
-                'action': 'Create a detailed monthly budget and track all expenses'
-            })
-            
-            # Housing
-            if housing_ratio > 0.35:
-                recommendations.append({
-                    'category': 'Housing',
-                    'priority': 'Medium',
-                    'title': 'Housing Costs Elevated',
-                    'message': f'Housing at {housing_ratio*100:.1f}% of income. Aim for <35% for better financial flexibility.',
-                    'action': 'Look for ways to reduce utilities or consider roommate'
-                })
-            
-            # Savings
-            if savings_rate < 0.10:
-                recommendations.append({
-                    'category': 'Savings',
-                    'priority': 'Medium',
-                    'title': 'Build Emergency Fund',
-                    'message': f'Savings rate at {savings_rate*100:.1f}%. Aim for 10-20% to build financial resilience.',
-                    'action': 'Set up automatic transfers to savings account, start with 5%'
-                })
-            
-            # Discretionary
-            if disc_ratio > 0.20:
-                recommendations.append({
-                    'category': 'Lifestyle',
-                    'priority': 'Medium',
-                    'title': 'Optimize Lifestyle Spending',
-                    'message': f'Discretionary spending at {disc_ratio*100:.1f}%. Small cuts can significantly improve savings.',
-                    'action': 'Review subscriptions, negotiate bills, find free entertainment'
-                })
-            
-            # General advice
-            recommendations.append({
-                'category': 'Planning',
-                'priority': 'Medium',
-                'title': 'Financial Planning',
-                'message': 'Create a 3-6 month emergency fund and review your budget monthly.',
-                'action': 'Use budgeting apps, set financial goals, track progress'
-            })
+        return recommendations
+    
+    def generate_recommendations(self, user_data, prediction_result):
+        """
+        Generate actionable recommendations based on financial distress level.
         
-        # LOW DISTRESS RECOMMENDATIONS
-        else:
-            recommendations.append({
-                'category': 'Success',
-                'priority': 'Low',
-                'title': 'Healthy Financial Position',
-                'message': f'Spending at {(total_exp/income)*100:.1f}% of income. Maintain good habits and optimize further.',
-                'action': 'Continue current practices and look for growth opportunities'
-            })
-            
-            # Optimize savings
-            if savings_rate < 0.20:
-                recommendations.append({
-                    'category': 'Growth',
-                    'priority': 'Low',
-                    'title': 'Maximize Savings',
-                    'message': f'Savings rate at {savings_rate*100:.1f}%. Increase to 20%+ for wealth building.',
-                    'action': 'Consider high-yield savings, investment accounts, or retirement funds'
-                })
-            
-            # Investment
-            recommendations.append({
-                'category': 'Investment',
-                'priority': 'Low',
-                'title': 'Consider Investing',
-                'message': 'Your financial foundation is solid. Explore investment opportunities.',
-                'action': 'Research index funds, retirement accounts, or real estate'
-            })
-            
-            # Financial goals
-            recommendations.append({
-                'category': 'Goals',
-                'priority': 'Low',
-                'title': 'Set Long-term Goals',
-                'message': 'Plan for major financial goals like home ownership, education, or retirement.',
-                'action': 'Create a 5-year financial plan with specific milestones'
-            })
-            
-            # Optimize existing expenses
-            recommendations.append({
-                'category': 'Optimization',
-                'priority': 'Low',
-                'title': 'Fine-tune Budget',
-                'message': 'Review recurring expenses for potential savings.',
-                'action': 'Negotiate insurance rates, refinance loans, optimize subscriptions'
-            })
+        Args:
+            user_data: dict or DataFrame with household financial data (first row is used)
+            prediction_result: dict with prediction, confidence, probabilities
         
-        # Universal recommendations
-        recommendations.append({
-            'category': 'Protection',
-            'priority': 'Medium',
-            'title': 'Financial Protection',
-            'message': 'Ensure adequate insurance coverage (health, life, property).',
-            'action': 'Review insurance policies annually and adjust coverage as needed'
-        })
+        Returns:
+            list of recommendation dictionaries
+        """
+        if isinstance(user_data, pd.DataFrame):
+            user_data = user_data.iloc[:1]
+        else:
+            user_data = {name: [value] for name, value in user_data.items()}
         
-        return recommendations
+        return self.generate_recommendations_batch(user_data, [prediction_result['prediction']])[0]
     
     def get_benchmark_comparison(self, user_data, national_avg):
         """
@@ -230,15 +262,16 @@ class RecommendationEngine:
         
         return comparison
 
+# Spending categories compared against the national averages
+NATIONAL_AVERAGE_CATEGORIES = ['Housing', 'Food', 'Transport', 'Health', 'Education', 
+                               'Recreation', 'Clothing', 'Communication', 'Restaurants']
+
 def calculate_national_averages(df):
     """Calculate national average spending patterns from dataset."""
     
-    categories = ['Housing', 'Food', 'Transport', 'Health', 'Education', 
-                 'Recreation', 'Clothing', 'Communication', 'Restaurants']
-    
     averages = {}
     
-    for cat in categories:
+    for cat in NATIONAL_AVERAGE_CATEGORIES:
         avg_pct = (df[cat] / df['Net_Income']).mean() * 100
         averages[f'{cat}_Pct'] = round(avg_pct, 2)
     
@@ -12,19 +12,39 @@ from reportlab.platypus import (SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
 from reportlab.pdfgen import canvas
 from datetime import datetime
+from functools import lru_cache
 import base64
 import io
 from pathlib import Path
 
+RISK_COLORS = {
+    'Low': colors.HexColor('#4caf50'),
+    'Medium': colors.HexColor('#ff9800'),
+    'High': colors.HexColor('#f44336')
+}
+
+PRIORITY_COLORS = {
+    'High': colors.HexColor('#f44336'),
+    'Medium': colors.HexColor('#ff9800'),
+    'Low': colors.HexColor('#4caf50')
+}
+
+@lru_cache(maxsize=32)
+def decode_image(image_base64):
+    """Decoded bytes of a base64 image; a chart shared by many reports is decoded once."""
+    return base64.b64decode(image_base64)
+
 class FinancialReportGenerator:
     """Generate PDF reports for financial health assessments."""
     
     def __init__(self, output_dir='../reports'):
-        """Initialize report generator."""
-        self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(exist_ok=True, parents=True)
+        """Initialize report generator (output_dir=None: reports are only rendered to buffers)."""
+        self.output_dir = Path(output_dir) if output_dir is not None else None
+        if self.output_dir is not None:
+            self.output_dir.mkdir(exist_ok=True, parents=True)
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
+        self._setup_shared_flowables()
     
     def _setup_custom_styles(self):
         """Set up custom paragraph styles."""
@@ -60,8 +80,70 @@ class FinancialReportGenerator:
             fontName='Helvetica-Bold'
         ))
     
+    def _setup_shared_flowables(self):
+        """Build the table styles and fixed-text paragraphs every report reuses."""
+        header = [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3f51b5')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke)
+        ]
+        self.table_styles = {
+            'probability': TableStyle(header + [
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 12),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#e8eaf6')),
+                ('GRID', (0, 0), (-1, -1), 1, colors.grey)
+            ]),
+            'metrics': TableStyle(header + [
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 12),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#e8eaf6')),
+                ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.HexColor('#e8eaf6'), colors.white])
+            ]),
+            'spending': TableStyle(header + [
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.HexColor('#e8eaf6'), colors.white])
+            ])
+        }
+        
+        self.risk_styles = {
+            level: ParagraphStyle('RiskColored', parent=self.styles['RiskLevel'], textColor=color)
+            for level, color in RISK_COLORS.items()
+        }
+        
+        # Paragraphs are re-wrapped on every build, so fixed text is parsed once
+        self.fixed_paragraphs = {
+            'title': Paragraph("Financial Health Assessment Report", self.styles['CustomTitle']),
+            'risk_heading': Paragraph("Financial Distress Level", self.styles['CustomSubtitle']),
+            'metrics_heading': Paragraph("Key Financial Metrics", self.styles['CustomSubtitle']),
+            'spending_heading': Paragraph("Monthly Spending Breakdown", self.styles['CustomSubtitle']),
+            'shap_heading': Paragraph("AI Explanation: Why This Risk Level?", self.styles['CustomSubtitle']),
+            'shap_intro': Paragraph(
+                "The chart below shows which factors contributed most to your risk assessment. "
+                "Bars pointing right increase risk, while bars pointing left decrease risk.",
+                self.styles['Normal']
+            ),
+            'recommendations_heading': Paragraph("Personalized Recommendations", self.styles['CustomSubtitle']),
+            'disclaimer': Paragraph(
+                "<i>Disclaimer: This report is generated by an AI system for informational purposes only. "
+                "It should not be considered as professional financial advice. Please consult with a "
+                "certified financial advisor for personalized guidance.</i>",
+                self.styles['Normal']
+            )
+        }
+    
     def generate_report(self, user_id, user_data, prediction_result, 
-                       recommendations, financial_metrics, shap_plot_base64=None):
+                       recommendations, financial_metrics, shap_plot_base64=None, output=None):
         """
         Generate comprehensive financial health PDF report.
         
@@ -72,18 +154,20 @@ class FinancialReportGenerator:
             recommendations: List of recommendation dicts
             financial_metrics: Dict with calculated metrics
             shap_plot_base64: Base64 encoded SHAP plot (optional)
+            output: File-like object to write the PDF into instead of a file in output_dir (optional)
         
         Returns:
-            Path to generated PDF
+            Path to generated PDF (or `output`)
         """
-        # Create PDF filename
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        pdf_filename = f'financial_report_{user_id}_{timestamp}.pdf'
-        pdf_path = self.output_dir / pdf_filename
+        if output is None:
+            # Create PDF filename
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            pdf_filename = f'financial_report_{user_id}_{timestamp}.pdf'
+            pdf_path = self.output_dir / pdf_filename
         
         # Create PDF document
         doc = SimpleDocTemplate(
-            str(pdf_path),
+            str(pdf_path) if output is None else output,
             pagesize=letter,
             rightMargin=72,
             leftMargin=72,
@@ -95,7 +179,7 @@ class FinancialReportGenerator:
         story = []
         
         # Title Section
-        story.append(Paragraph("Financial Health Assessment Report", self.styles['CustomTitle']))
+        story.append(self.fixed_paragraphs['title'])
         story.append(Spacer(1, 0.2*inch))
         
         # Report info
@@ -105,24 +189,15 @@ class FinancialReportGenerator:
         story.append(Spacer(1, 0.3*inch))
         
         # Risk Assessment Section
-        story.append(Paragraph("Financial Distress Level", self.styles['CustomSubtitle']))
+        story.append(self.fixed_paragraphs['risk_heading'])
         
         # Risk level with color
         risk_level = prediction_result['prediction']
         confidence = prediction_result['confidence'] * 100
         
-        risk_colors = {
-            'Low': colors.HexColor('#4caf50'),
-            'Medium': colors.HexColor('#ff9800'),
-            'High': colors.HexColor('#f44336')
-        }
-        
-        risk_color = risk_colors.get(risk_level, colors.black)
-        risk_style = ParagraphStyle(
-            'RiskColored',
-            parent=self.styles['RiskLevel'],
-            textColor=risk_color
-        )
+        risk_style = self.risk_styles.get(risk_level)
+        if risk_style is None:
+            risk_style = ParagraphStyle('RiskColored', parent=self.styles['RiskLevel'], textColor=colors.black)
         
         story.append(Paragraph(f"{risk_level} Risk", risk_style))
         story.append(Paragraph(f"Confidence: {confidence:.1f}%", self.styles['Normal']))
@@ -137,22 +212,13 @@ class FinancialReportGenerator:
         ]
         
         prob_table = Table(prob_data, colWidths=[3*inch, 2*inch])
-        prob_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3f51b5')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#e8eaf6')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-        ]))
+        prob_table.setStyle(self.table_styles['probability'])
         
         story.append(prob_table)
         story.append(Spacer(1, 0.4*inch))
         
         # Financial Metrics Section
-        story.append(Paragraph("Key Financial Metrics", self.styles['CustomSubtitle']))
+        story.append(self.fixed_paragraphs['metrics_heading'])
         
         metrics_data = [
             ['Metric', 'Value'],
@@ -165,24 +231,13 @@ class FinancialReportGenerator:
         ]
         
         metrics_table = Table(metrics_data, colWidths=[3*inch, 2*inch])
-        metrics_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3f51b5')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#e8eaf6')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.HexColor('#e8eaf6'), colors.white])
-        ]))
+        metrics_table.setStyle(self.table_styles['metrics'])
         
         story.append(metrics_table)
         story.append(Spacer(1, 0.4*inch))
         
         # Spending Breakdown
-        story.append(Paragraph("Monthly Spending Breakdown", self.styles['CustomSubtitle']))
+        story.append(self.fixed_paragraphs['spending_heading'])
         
         spending_categories = [
             ('Food', user_data['Food']),
@@ -203,35 +258,20 @@ class FinancialReportGenerator:
             spending_data.append([cat, f"${amount:,.2f}", f"{pct:.1f}%"])
         
         spending_table = Table(spending_data, colWidths=[2*inch, 1.8*inch, 1.2*inch])
-        spending_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3f51b5')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.HexColor('#e8eaf6'), colors.white])
-        ]))
+        spending_table.setStyle(self.table_styles['spending'])
         
         story.append(spending_table)
         story.append(PageBreak())
         
         # SHAP Explanation (if available)
         if shap_plot_base64:
-            story.append(Paragraph("AI Explanation: Why This Risk Level?", self.styles['CustomSubtitle']))
-            story.append(Paragraph(
-                "The chart below shows which factors contributed most to your risk assessment. "
-                "Bars pointing right increase risk, while bars pointing left decrease risk.",
-                self.styles['Normal']
-            ))
+            story.append(self.fixed_paragraphs['shap_heading'])
+            story.append(self.fixed_paragraphs['shap_intro'])
             story.append(Spacer(1, 0.2*inch))
             
             try:
                 # Decode base64 image
-                image_data = base64.b64decode(shap_plot_base64)
-                image_buffer = io.BytesIO(image_data)
+                image_buffer = io.BytesIO(decode_image(shap_plot_base64))
                 
                 # Add image to PDF
                 img = Image(image_buffer, width=6*inch, height=3*inch)
@@ -242,7 +282,7 @@ class FinancialReportGenerator:
         
         # Recommendations Section
         story.append(PageBreak())
-        story.append(Paragraph("Personalized Recommendations", self.styles['CustomSubtitle']))
+        story.append(self.fixed_paragraphs['recommendations_heading'])
         story.append(Spacer(1, 0.2*inch))
         
         for i, rec in enumerate(recommendations, 1):
@@ -251,13 +291,7 @@ class FinancialReportGenerator:
             story.append(Spacer(1, 0.1*inch))
             
             # Priority and category
-            priority_colors = {
-                'High': colors.HexColor('#f44336'),
-                'Medium': colors.HexColor('#ff9800'),
-                'Low': colors.HexColor('#4caf50')
-            }
-            
-            rec_info = f"<font color='grey'>Priority: </font><font color='{priority_colors.get(rec['priority'], colors.black)}'><b>{rec['priority']}</b></font> | Category: {rec['category']}"
+            rec_info = f"<font color='grey'>Priority: </font><font color='{PRIORITY_COLORS.get(rec['priority'], colors.black)}'><b>{rec['priority']}</b></font> | Category: {rec['category']}"
             story.append(Paragraph(rec_info, self.styles['Normal']))
             story.append(Spacer(1, 0.05*inch))
             
@@ -269,19 +303,32 @@ class FinancialReportGenerator:
         
         # Footer/Disclaimer
         story.append(Spacer(1, 0.5*inch))
-        disclaimer = (
-            "<i>Disclaimer: This report is generated by an AI system for informational purposes only. "
-            "It should not be considered as professional financial advice. Please consult with a "
-            "certified financial advisor for personalized guidance.</i>"
-        )
-        story.append(Paragraph(disclaimer, self.styles['Normal']))
+        story.append(self.fixed_paragraphs['disclaimer'])
         
         # Build PDF
         doc.build(story)
         
+        if output is not None:
+            return output
+        
         print(f"✅ Report generated: {pdf_path}")
         return str(pdf_path)
 
+_worker_generator = None
+
+def render_report_in_worker(**report_kwargs):
+    """
+    Render a report to PDF bytes from a worker process; nothing is written to disk.
+    The generator (and its styles) is built once per process and reused.
+    """
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = FinancialReportGenerator(output_dir=None)
+    
+    buffer = io.BytesIO()
+    _worker_generator.generate_report(output=buffer, **report_kwargs)
+    return buffer.getvalue()
+
 if __name__ == '__main__':
     # Test report generation
     generator = FinancialReportGenerator()
@@ -0,0 +1,107 @@
+"""
+Scenario Engine: Batched what-if variants of one household
+A base household plus a list of deltas, or a sweep of one input over a range,
+is expanded into N variants. The derived features of the base and all variants
+come from one vectorized kernel call. The base row is laid out once; each
+variant is a copy of it with only the moved inputs and the derived (and
+proportional) columns that depend on them rewritten, so every variant is
+scored in a single model call.
+"""
+
+import numpy as np
+
+from feature_engineering import INPUT_COLUMNS, DERIVED_COLUMNS, serving_features
+
+MAX_SCENARIOS = 500
+
+# Allowed range of each input a scenario may move (same limits as HouseholdInput)
+INPUT_BOUNDS = {col: (0, None) for col in INPUT_COLUMNS}
+INPUT_BOUNDS['Household_Size'] = (1, 10)
+INTEGER_INPUTS = {'Household_Size'}
+
+class ScenarioEngine:
+    """Expand a base household into what-if variants and lay them out for the model."""
+
+    def __init__(self, transformer=serving_features, max_scenarios=MAX_SCENARIOS):
+        """Initialize with the derived-feature kernel used at serving time."""
+        self.transformer = transformer
+        self.max_scenarios = max_scenarios
+
+    def _check(self, field, value):
+        """Validate one scenario input; returns it (rounded for integer inputs)."""
+        if field not in INPUT_BOUNDS:
+            raise ValueError(f"'{field}' is not a numeric household input")
+
+        if field in INTEGER_INPUTS:
+            value = int(round(value))
+        low, high = INPUT_BOUNDS[field]
+        if value < low or (high is not None and value > high):
+            limit = f">= {low}" if high is None else f"between {low} and {high}"
+            raise ValueError(f"{field} must be {limit} (scenario value {value})")
+        return value
+
+    def _check_count(self, n_scenarios):
+        """Reject empty or oversized scenario lists."""
+        if n_scenarios < 1:
+            raise ValueError("At least one scenario is required")
+        if n_scenarios > self.max_scenarios:
+            raise ValueError(f"At most {self.max_scenarios} scenarios per request ({n_scenarios} given)")
+
+    def expand_deltas(self, base, deltas):
+        """
+        One variant per delta.
+
+        Args:
+            base: household input dict
+            deltas: list of dicts of input name -> amount added to the base value
+
+        Returns:
+            list of dicts of the changed input name -> new value
+        """
+        self._check_count(len(deltas))
+        return [
+            {field: self._check(field, base[field] + amount) for field, amount in delta.items()}
+            for delta in deltas
+        ]
+
+    def expand_sweep(self, base, field, start, stop, steps):
+        """One variant per point of `field` from start to stop (inclusive) in `steps` points."""
+        self._check_count(steps)
+        return [{field: self._check(field, float(value))} for value in np.linspace(start, stop, steps)]
+
+    def build(self, template, base, variants):
+        """
+        Derive and lay out the base household followed by its variants.
+
+        Args:
+            template: FeatureRowTemplate of the model that will score the rows
+            base: household input dict (inputs, categoricals)
+            variants: list of dicts of changed input name -> value
+
+        Returns:
+            (1 + N, len(DERIVED_COLUMNS)) derived features and the (1 + N, n_features)
+            model matrix, base first
+        """
+        changed = [col for col in INPUT_COLUMNS if any(col in variant for variant in variants)]
+
+        inputs = np.tile(np.array([base[col] for col in INPUT_COLUMNS], dtype=np.float64), (1 + len(variants), 1))
+        for row, variant in enumerate(variants, start=1):
+            for field, value in variant.items():
+                inputs[row, INPUT_COLUMNS.index(field)] = value
+
+        # One kernel call over every row: cheaper than deriving the base and then
+        # recomputing a subset of columns for the variants
+        derived = self.transformer.transform(inputs)
+        # Only these differ from the base row, so only they are written into the model rows
+        dependent = self.transformer.dependent_columns(changed)
+
+        base_values = {col: [value] for col, value in base.items()}
+        base_values.update({col: [value] for col, value in zip(DERIVED_COLUMNS, derived[0].tolist())})
+        X = np.tile(template.build(base_values)[0], (1 + len(variants), 1))
+
+        moved = {col: inputs[1:, INPUT_COLUMNS.index(col)].tolist() for col in changed}
+        moved.update({col: derived[1:, DERIVED_COLUMNS.index(col)].tolist() for col in dependent})
+        if moved:
+            template.fill(X[1:], moved)
+
+        return derived, X
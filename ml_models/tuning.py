@@ -0,0 +1,207 @@
+"""
+Hyperparameter Tuning: Successive halving over CatBoost settings
+Samples depth, learning rate, L2 regularization and class weights, trains
+every candidate for a small iteration budget, keeps the best 1/eta and
+retrains the survivors with eta times the budget. Trials of a rung run in
+parallel processes on the cached quantized pool.
+Run from ml_models/: python tuning.py [--trials 27]
+"""
+
+import argparse
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from catboost import CatBoostClassifier, Pool
+
+from cross_validation import available_cores
+
+# Settings train() uses when no tuned config is given
+DEFAULT_TRAIN_PARAMS = {
+    'iterations': 500,
+    'learning_rate': 0.05,
+    'depth': 8,
+    'l2_leaf_reg': 3,
+    'class_weights': {
+        0: 1.0,  # Low
+        1: 1.5,  # Medium
+        2: 3.0   # High - we cannot miss these!
+    }
+}
+
+# TotalF1 as train() uses it, but unweighted so configs with different
+# class weights are compared on the same footing
+TUNING_METRIC = 'TotalF1:use_weights=false'
+
+TUNED_CONFIG_FILE = 'tuned_config.json'
+
+def sample_config(rng):
+    """Draw one candidate from the search space."""
+    return {
+        'depth': int(rng.choice([4, 6, 8, 10])),
+        'learning_rate': float(np.exp(rng.uniform(np.log(0.01), np.log(0.3)))),
+        'l2_leaf_reg': float(np.exp(rng.uniform(np.log(1.0), np.log(30.0)))),
+        'class_weights': {
+            0: 1.0,
+            1: round(float(rng.uniform(1.0, 2.5)), 3),
+            2: round(float(rng.uniform(1.5, 5.0)), 3)
+        }
+    }
+
+def run_trial(pool_path, train_idx, val_idx, config, iterations, thread_count, random_seed=42):
+    """Train one candidate for `iterations` rounds; returns its best validation TotalF1."""
+    pool = Pool(f'quantized://{pool_path}')
+
+    model = CatBoostClassifier(
+        iterations=iterations,
+        thread_count=thread_count,
+        eval_metric=TUNING_METRIC,
+        early_stopping_rounds=50,
+        random_seed=random_seed,
+        verbose=False,
+        **config
+    )
+    model.fit(pool.slice(train_idx), eval_set=pool.slice(val_idx))
+
+    return {
+        'score': float(model.get_best_score()['validation'][TUNING_METRIC]),
+        'best_iteration': int(model.get_best_iteration())
+    }
+
+def successive_halving(pool_path, train_idx, val_idx, n_trials=27, min_iterations=50,
+                       max_iterations=500, eta=3, n_jobs=None, thread_count=None, seed=42):
+    """
+    Successive halving: every rung trains the surviving configs with the
+    current budget, keeps the top 1/eta and multiplies the budget by eta.
+
+    Returns:
+        dict with the best config, its score and iteration count, and the rung history
+    """
+    cores = available_cores()
+    n_jobs = n_jobs or cores
+    thread_count = thread_count or max(1, cores // n_jobs)
+
+    rng = np.random.default_rng(seed)
+    configs = [sample_config(rng) for _ in range(n_trials)]
+    survivors = list(range(n_trials))
+    budget = min_iterations
+    history = []
+
+    # spawn: CatBoost's thread pools do not survive fork
+    with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('spawn')) as executor:
+        while True:
+            start = time.perf_counter()
+            futures = [
+                executor.submit(run_trial, pool_path, train_idx, val_idx, configs[i], budget, thread_count)
+                for i in survivors
+            ]
+            results = {i: future.result() for i, future in zip(survivors, futures)}
+
+            ranked = sorted(survivors, key=lambda i: results[i]['score'], reverse=True)
+            history.append({
+                'iterations': budget,
+                'trials': [{'trial': i, **results[i], 'config': configs[i]} for i in ranked],
+                'seconds': round(time.perf_counter() - start, 2)
+            })
+            print(f"   Rung {len(history)}: {len(survivors)} trials x {budget} iterations, "
+                  f"best TotalF1 = {results[ranked[0]]['score']:.4f} ({history[-1]['seconds']}s)")
+
+            survivors = ranked[:max(1, len(ranked) // eta)]
+            if len(survivors) == 1 or budget >= max_iterations:
+                break
+            budget = min(budget * eta, max_iterations)
+
+    best = ranked[0]
+    return {
+        'config': configs[best],
+        'score': results[best]['score'],
+        'iterations': budget,
+        'best_iteration': results[best]['best_iteration'],
+        'n_jobs': n_jobs,
+        'thread_count': thread_count,
+        'history': history
+    }
+
+def tune_predictor(predictor, X, y, n_trials=27, min_iterations=50, max_iterations=500, eta=3,
+                   n_jobs=None, thread_count=None):
+    """
+    Tune on the rows train() trains on (its test split is held out), with an
+    inner stratified validation split, and save the result as tuned_config.json
+    next to model_metadata.json.
+    """
+    # Imported here: ml_engine imports this module, and the API must not load scikit-learn
+    from sklearn.model_selection import train_test_split
+
+    print(f"\n🎛️  Tuning Hyperparameters ({n_trials} trials, successive halving, eta={eta})...")
+
+    # Same outer split as train(); the tuning validation set comes from its train part
+    train_idx, _ = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42, stratify=y)
+    X_train, y_train = X.iloc[train_idx], y.iloc[train_idx]
+    fit_idx, val_idx = train_test_split(
+        np.arange(len(train_idx)), test_size=0.2, random_state=42, stratify=y_train
+    )
+
+    # Quantized on the train split only (the same cached pool train() fits on)
+    pool_path = predictor.pool_cache.get_path(X_train, y_train, predictor.categorical_features)
+    result = successive_halving(
+        pool_path, fit_idx, val_idx, n_trials=n_trials, min_iterations=min_iterations,
+        max_iterations=max_iterations, eta=eta, n_jobs=n_jobs, thread_count=thread_count
+    )
+
+    tuned = {
+        'params': {**result['config'], 'iterations': max_iterations},
+        'score': result['score'],
+        'metric': TUNING_METRIC,
+        'search': {key: result[key] for key in ['iterations', 'best_iteration', 'n_jobs', 'thread_count', 'history']}
+    }
+
+    config_path = predictor.model_dir / TUNED_CONFIG_FILE
+    with open(config_path, 'w') as f:
+        json.dump(tuned, f, indent=2)
+
+    print(f"   ✅ Best TotalF1: {result['score']:.4f} with {result['config']}")
+    print(f"   ✅ Tuned config saved to: {config_path}")
+    return tuned['params']
+
+def load_tuned_params(model_dir):
+    """Tuned train() params from tuned_config.json, or None if tuning has not been run."""
+    config_path = model_dir / TUNED_CONFIG_FILE
+    if not config_path.exists():
+        return None
+
+    with open(config_path, 'r') as f:
+        params = json.load(f)['params']
+    # JSON object keys are strings; CatBoost wants the integer class labels
+    params['class_weights'] = {int(label): weight for label, weight in params['class_weights'].items()}
+    return params
+
+def main():
+    """Tune on the processed dataset and save tuned_config.json."""
+    from ml_engine import FinancialDistressPredictor
+    from processed_dataset import load_processed_dataset
+
+    parser = argparse.ArgumentParser(description='Tune CatBoost hyperparameters')
+    parser.add_argument('--trials', type=int, default=27)
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--min-iterations', type=int, default=50)
+    parser.add_argument('--max-iterations', type=int, default=500)
+    parser.add_argument('--jobs', type=int, default=None, help='Trials trained at once')
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🎛️  FINANCIAL DISTRESS PREDICTOR - HYPERPARAMETER TUNING")
+    print("="*70)
+
+    df = load_processed_dataset()
+    predictor = FinancialDistressPredictor()
+    X, y = predictor.prepare_data(df)
+
+    return tune_predictor(
+        predictor, X, y, n_trials=args.trials, min_iterations=args.min_iterations,
+        max_iterations=args.max_iterations, eta=args.eta, n_jobs=args.jobs
+    )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+"""
+Test setup: the backend and ml_models modules import each other by plain name
+(as the API and the training scripts do), so both directories go on sys.path.
+
+    pip install pytest && python -m pytest -q
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+for directory in ['backend', 'ml_models']:
+    if str(ROOT / directory) not in sys.path:
+        sys.path.insert(0, str(ROOT / directory))
@@ -0,0 +1,103 @@
+"""The compiled NumPy scorer reproduces CatBoost's predictions."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from catboost import CatBoostClassifier
+
+from compiled_scorer import (MODEL_VARIANTS, COMPILED_MODEL_FILES, CompiledPredictor, CompiledScorer,
+                             export_compiled_model, format_predictions, model_fingerprint)
+
+REGIONS = [f'Region {i}' for i in range(8)]
+
+def make_rows(n_rows, seed, regions=REGIONS):
+    """Float columns (one with missing values), a CTR-encoded and a one-hot categorical."""
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        'income': rng.lognormal(10, 1, n_rows),
+        'savings_rate': rng.normal(0.1, 0.2, n_rows),
+        'region': rng.choice(regions, n_rows),
+        'urban': rng.choice(['Yes', 'No'], n_rows),
+    })
+    X.loc[rng.random(n_rows) < 0.1, 'savings_rate'] = np.nan
+    return X
+
+@pytest.fixture(scope='module')
+def model():
+    """A small three-class model trained on make_rows()."""
+    X = make_rows(600, seed=0)
+    risk = -X['savings_rate'].fillna(0) * 5 + X['region'].map({r: i / 4 for i, r in enumerate(REGIONS)})
+    y = np.digitize(risk + np.random.default_rng(1).normal(0, 0.3, len(X)), [0.5, 1.5])
+    classifier = CatBoostClassifier(iterations=40, depth=4, loss_function='MultiClass',
+                                    random_seed=42, thread_count=1, verbose=False, allow_writing_files=False)
+    classifier.fit(X, y, cat_features=['region', 'urban'])
+    return classifier, X
+
+def test_export_matches_catboost(model, tmp_path):
+    """Probabilities of the saved export match CatBoost on rows it was not checked on."""
+    classifier, X = model
+    export_compiled_model(classifier, X, tmp_path / 'model.npz')
+    scorer = CompiledScorer.load(tmp_path / 'model.npz')
+
+    rows = make_rows(300, seed=7)
+    np.testing.assert_allclose(scorer.predict_proba(rows.to_numpy(dtype=object)),
+                               classifier.predict_proba(rows), atol=1e-6)
+
+def test_unseen_category_matches_catboost(model, tmp_path):
+    """A category value missing at export time scores as CatBoost scores it."""
+    classifier, X = model
+    scorer = export_compiled_model(classifier, X, tmp_path / 'model.npz')
+
+    rows = make_rows(50, seed=8, regions=['Region 99'])
+    np.testing.assert_allclose(scorer.predict_proba(rows.to_numpy(dtype=object)),
+                               classifier.predict_proba(rows), atol=1e-6)
+
+def test_compiled_predictor_matches_catboost(model, tmp_path):
+    """CompiledPredictor returns the API's prediction dicts and the model's version."""
+    classifier, X = model
+    model_file, _ = MODEL_VARIANTS['full']
+    classifier.save_model(str(tmp_path / model_file))
+    export_compiled_model(classifier, X, tmp_path / COMPILED_MODEL_FILES['full'])
+
+    predictor = CompiledPredictor(model_dir=tmp_path)
+    predictor.load_model()
+    assert predictor.model_version == model_fingerprint(tmp_path)
+
+    rows = make_rows(100, seed=9)
+    expected = format_predictions(classifier.predict_proba(rows))
+    actual = predictor.predict_batch(rows)
+    assert [r['prediction'] for r in actual] == [r['prediction'] for r in expected]
+    for actual_row, expected_row in zip(actual, expected):
+        assert actual_row['probabilities'] == pytest.approx(expected_row['probabilities'], abs=1e-6)
+
+EXPLAIN_SCRIPT = '''
+import sys
+import numpy as np
+from compiled_scorer import CompiledPredictor
+from feature_engineering import INPUT_COLUMNS, DERIVED_COLUMNS, FeatureRowTemplate, serving_features
+
+predictor = CompiledPredictor(model_dir=sys.argv[1])
+explainer = predictor._explainer()
+inputs = np.array([[4000, 4, 900, 1200, 300, 150, 200, 100, 120, 80, 150, 100]], dtype=np.float64)
+derived = serving_features.transform(inputs)
+values = {col: inputs[:, i] for i, col in enumerate(INPUT_COLUMNS)}
+values.update({col: derived[:, i] for i, col in enumerate(DERIVED_COLUMNS)})
+values.update(Region=['Central Hungary'], Household_Type=['Family with children'], Employment_Status=['Employed'])
+rows = FeatureRowTemplate(explainer.feature_columns, explainer.categorical_features).build(values)
+
+assert predictor.get_shap_summary(rows)[0]['contributions']
+print('heavy modules:', [name for name in ['shap', 'matplotlib', 'sklearn'] if name in sys.modules])
+'''
+
+def test_json_explanation_skips_shap_matplotlib_and_sklearn():
+    """A JSON explanation (the /predict default) uses native CatBoost SHAP only."""
+    root = Path(__file__).parent.parent
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(str(root / d) for d in ['backend', 'ml_models']))
+    result = subprocess.run([sys.executable, '-c', EXPLAIN_SCRIPT, str(root / 'ml_models')],
+                            env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == 'heavy modules: []'
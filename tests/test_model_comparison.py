@@ -0,0 +1,62 @@
+"""Candidate traffic routing and per-candidate comparison runs."""
+
+import pytest
+
+from model_comparison import ModelComparison
+
+def households(n):
+    """Distinct /predict payloads."""
+    return [{'Net_Income': 30000.0 + i, 'Food': 8000.0, 'Region': 'NCR', 'Household_Size': 1 + i % 10}
+            for i in range(n)]
+
+def comparison(mode='split', fraction=0.3):
+    """A comparison holding a stand-in candidate model."""
+    comparison = ModelComparison()
+    comparison.set_candidate(object(), 'candidate-v2', mode, fraction)
+    return comparison
+
+def test_routing_is_deterministic():
+    """A household sticks to one model, whatever its field order or the instance asked."""
+    first, second = comparison(), comparison()
+    for household in households(200):
+        reordered = dict(reversed(list(household.items())))
+        routed = first.routes_to_candidate(household)
+        assert first.routes_to_candidate(household) == routed
+        assert first.routes_to_candidate(reordered) == routed
+        assert second.routes_to_candidate(household) == routed
+
+def test_split_fraction():
+    """About `fraction` of households go to the candidate; 0 and 1 are exact."""
+    sample = households(2000)
+    routed = sum(comparison(fraction=0.3).routes_to_candidate(h) for h in sample)
+    assert 0.25 < routed / len(sample) < 0.35
+    assert not any(comparison(fraction=0).routes_to_candidate(h) for h in sample)
+    assert all(comparison(fraction=1).routes_to_candidate(h) for h in sample)
+
+def test_shadow_mode_and_no_candidate_route_to_primary():
+    """Only 'split' mode with a loaded candidate answers from the candidate."""
+    household = households(1)[0]
+    assert not comparison(mode='shadow', fraction=1).routes_to_candidate(household)
+    assert not ModelComparison().routes_to_candidate(household)
+
+def test_invalid_settings_rejected():
+    """Unknown modes and fractions outside [0, 1] raise ValueError."""
+    with pytest.raises(ValueError):
+        comparison(mode='canary')
+    with pytest.raises(ValueError):
+        comparison(fraction=1.5)
+
+def test_replaced_candidate_drops_late_results():
+    """Results of the previous candidate's run never reach the new run's stats."""
+    current = comparison()
+    old_run = current.run
+    current.set_candidate(object(), 'candidate-v3')
+    result = {'prediction': 'Low', 'probabilities': {'Low': 0.8, 'Medium': 0.15, 'High': 0.05}}
+
+    old_run.record('candidate', result, 1.0)
+    old_run.compare(result, result)
+
+    assert old_run.shadow_late == 1 and old_run.compared == 0
+    metrics = current.metrics()
+    assert metrics['candidate_version'] == 'candidate-v3'
+    assert metrics['models']['candidate']['scored'] == 0 and metrics['compared'] == 0
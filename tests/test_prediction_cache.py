@@ -0,0 +1,58 @@
+"""Prediction cache keys, LRU eviction and TTL expiry."""
+
+import time
+from types import SimpleNamespace
+
+from prediction_cache import LRUCache, PredictionCache
+
+HOUSEHOLD = {'Net_Income': 52000.0, 'Food': 12000.0, 'Region': 'NCR', 'Household_Size': 4}
+
+def model(variant='full', version='full-0123456789abcdef'):
+    """Stand-in for a loaded predictor: the key only reads variant and model_version."""
+    return SimpleNamespace(variant=variant, model_version=version)
+
+def test_key_ignores_field_order_and_float_noise():
+    """Payloads that canonicalize the same (money to cents) share a key."""
+    cache = PredictionCache()
+    reordered = dict(reversed(list(HOUSEHOLD.items())))
+    noisy = dict(HOUSEHOLD, Net_Income=52000.0000001)
+    assert cache.key(model(), reordered) == cache.key(model(), HOUSEHOLD)
+    assert cache.key(model(), noisy) == cache.key(model(), HOUSEHOLD)
+    assert cache.key(model(), dict(HOUSEHOLD, Net_Income=52000.01)) != cache.key(model(), HOUSEHOLD)
+
+def test_key_separates_models():
+    """Another variant or model version never reads the entry."""
+    cache = PredictionCache()
+    key = cache.key(model(), HOUSEHOLD)
+    assert cache.key(model(variant='fast'), HOUSEHOLD) != key
+    assert cache.key(model(version='full-fedcba9876543210'), HOUSEHOLD) != key
+
+def test_lru_evicts_least_recently_used():
+    """Beyond max_entries the entry used longest ago goes first."""
+    cache = LRUCache('test', max_entries=2, ttl_seconds=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.metrics()['evictions'] == 1
+
+def test_entries_expire_after_ttl():
+    """An entry older than its TTL is a miss and is dropped."""
+    cache = LRUCache('test', max_entries=4, ttl_seconds=0.05)
+    cache.put('a', 1)
+    assert cache.get('a') == 1
+    time.sleep(0.1)
+
+    assert cache.get('a') is None
+    metrics = cache.metrics()
+    assert (metrics['hits'], metrics['misses'], metrics['expired'], metrics['entries']) == (1, 1, 1, 0)
+
+def test_layers_from_environment(monkeypatch):
+    """FDP_CACHE_<LAYER>_SIZE / _TTL override a layer's defaults."""
+    monkeypatch.setenv('FDP_CACHE_PREDICTION_SIZE', '3')
+    monkeypatch.setenv('FDP_CACHE_PREDICTION_TTL', '1.5')
+    layer = PredictionCache().layers['prediction']
+    assert (layer.max_entries, layer.ttl_seconds) == (3, 1.5)
@@ -0,0 +1,53 @@
+"""Batch recommendations over households with and without income."""
+
+import numpy as np
+
+from recommendation_engine import RecommendationEngine
+
+def households(net_income):
+    """Column dict of households spending 3000 (1200 on housing) against the given incomes."""
+    n_rows = len(net_income)
+    return {
+        'Net_Income': list(net_income),
+        'Total_Expenditure': [3000.0] * n_rows,
+        'Housing': [1200.0] * n_rows,
+        'Food': [1000.0] * n_rows,
+        'Savings': [income - 3000.0 for income in net_income],
+        'Discretionary_Spending': [600.0] * n_rows,
+    }
+
+def titles(recommendations):
+    """Recommendation titles of one household."""
+    return [recommendation['title'] for recommendation in recommendations]
+
+def test_mixed_batch_with_zero_income():
+    """A zero-income row leaves out only the spending-to-income message; other rows are unaffected."""
+    engine = RecommendationEngine()
+    levels = ['High', 'High', 'Medium', 'Medium']
+    batch = engine.generate_recommendations_batch(households([2500.0, 0.0, 4000.0, 0.0]), levels)
+
+    assert 'Immediate Action Required' in titles(batch[0])
+    assert batch[0][0]['message'] == ('Your expenses are 120.0% of your income. '
+                                      'Take immediate steps to reduce spending.')
+    assert 'Immediate Action Required' not in titles(batch[1])
+    assert 'Housing Costs Too High' not in titles(batch[1])
+    assert {'Optimize Food Spending', 'Increase Income', 'Financial Protection'} <= set(titles(batch[1]))
+
+    assert 'Budget Optimization Needed' in titles(batch[2])
+    assert 'Budget Optimization Needed' not in titles(batch[3])
+    assert not any('nan%' in recommendation['message'] for row in batch for recommendation in row)
+
+def test_batch_matches_single_household():
+    """Every row of a batch gets what the single-household wrapper returns for it."""
+    engine = RecommendationEngine()
+    columns = households([2500.0, 0.0, 4000.0, 6000.0])
+    levels = ['High', 'High', 'Medium', 'Low']
+    batch = engine.generate_recommendations_batch(columns, levels)
+
+    for i, level in enumerate(levels):
+        household = {name: values[i] for name, values in columns.items()}
+        assert engine.generate_recommendations(household, {'prediction': level}) == batch[i]
+
+def test_no_rows():
+    """An empty batch has no recommendations."""
+    assert RecommendationEngine().generate_recommendations_batch(households([]), np.array([])) == []
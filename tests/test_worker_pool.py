@@ -0,0 +1,71 @@
+"""StagePool queue limits and recovery from a dead worker process."""
+
+import asyncio
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from worker_pool import StagePool, StageOverloaded
+
+def test_full_queue_rejects():
+    """With every worker busy and the queue full, the next call is rejected."""
+    pool = StagePool('test', kind='thread', max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.run(release.wait, 5))
+        queued = asyncio.ensure_future(pool.run(lambda: 'queued'))
+        while pool.in_flight < 1 or pool.queued < 1:
+            await asyncio.sleep(0.01)
+
+        with pytest.raises(StageOverloaded):
+            await pool.run(lambda: 'rejected')
+
+        release.set()
+        return await running, await queued
+
+    try:
+        assert asyncio.run(scenario()) == (True, 'queued')
+    finally:
+        release.set()
+        pool.shutdown()
+
+    metrics = pool.metrics()
+    assert metrics['rejected'] == 1
+    assert metrics['submitted'] == 2
+    assert metrics['completed'] == 2
+    assert metrics['in_flight'] == 0 and metrics['queued'] == 0
+
+def test_failed_call_is_counted():
+    """An exception from the work reaches the caller and counts as failed."""
+    pool = StagePool('test', kind='thread', max_workers=1, max_queue=1)
+    try:
+        with pytest.raises(ZeroDivisionError):
+            asyncio.run(pool.run(divmod, 1, 0))
+    finally:
+        pool.shutdown()
+    assert pool.metrics()['failed'] == 1
+
+def test_process_pool_recovers_after_worker_dies():
+    """The call whose worker died fails; the stage then runs calls on a new pool."""
+    pool = StagePool('test', kind='process', max_workers=1, max_queue=1)
+
+    async def scenario():
+        assert await pool.run(abs, -1) == 1
+        broken = pool.executor
+        with pytest.raises(BrokenProcessPool):
+            await pool.run(os._exit, 1)
+        assert pool.executor is not broken
+        return await pool.run(abs, -42)
+
+    try:
+        assert asyncio.run(scenario()) == 42
+    finally:
+        pool.shutdown()
+
+    metrics = pool.metrics()
+    assert metrics['restarts'] == 1
+    assert metrics['failed'] == 1
+    assert metrics['completed'] == 2